@@ -2,7 +2,8 @@
 set -e
 
 # Main entrypoint script for Sparta Docker container
-# Handles different commands: get-repos, scan-repos, commit-results, query-cve, aggregate-scans
+# Handles different commands: get-repos, scan-repos, commit-results, query-cve, aggregate-scans,
+# build-cve-index
 
 COMMAND="${1:-help}"
 
@@ -27,6 +28,9 @@ case "$COMMAND" in
     aggregate-scans)
         python3 /app/scripts/aggregate-scans.py
         ;;
+    build-cve-index)
+        python3 /app/scripts/build_cve_index.py
+        ;;
     batch-repos)
         python3 /app/scripts/batch_repos.py
         ;;
@@ -47,6 +51,7 @@ case "$COMMAND" in
         echo "  commit-results     Commit scan results to repository"
         echo "  query-cve [CVE]    Query for specific CVE across all scans"
         echo "  aggregate-scans    Aggregate and index scan results"
+        echo "  build-cve-index    Build the CVE lookup index used by query-cve"
         echo "  batch-repos        Split repositories into batches for parallel processing"
         echo "  scan-state [cmd]   Manage scan state (init, completed, failed, summary)"
         echo "  orchestrate-scan   Run complete scan orchestration (single or multi-org)"
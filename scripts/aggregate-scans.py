@@ -13,79 +13,340 @@ Usage:
 """
 
 import argparse
-import json
+import os
 import sys
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, List, Any, Set
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple
 
 # Import security utilities
 try:
     from security_utils import sanitize_path
+    from json_utils import JSONDecodeError, dump_file as dump_json_file, dumps as dumps_json, load_file as load_json_file
+    from report_files import iter_report_entries, report_metadata
 except ImportError:
     # Fallback if running from different directory
-    import os
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from security_utils import sanitize_path
+    from json_utils import JSONDecodeError, dump_file as dump_json_file, dumps as dumps_json, load_file as load_json_file
+    from report_files import iter_report_entries, report_metadata
 
+# Compact per-vulnerability record extracted from a report:
+# (cve_id, severity, package, installed_version, fixed_version)
+Finding = Tuple[str, str, str, str, str]
 
-def load_scan_reports(reports_dir: Path) -> List[Dict[str, Any]]:
+# Fields Trivy always sets on a vulnerability; FixedVersion is omitted for
+# unfixed vulnerabilities and is read separately
+_VULN_FIELDS = itemgetter('VulnerabilityID', 'Severity', 'PkgName', 'InstalledVersion')
+
+# Severity -> index into RepoStats.counts; anything else is counted as
+# UNKNOWN (index 0), which only contributes to the total
+_SEVERITY_INDEX = {
+    'UNKNOWN': 0,
+    'CRITICAL': 1,
+    'HIGH': 2,
+    'MEDIUM': 3,
+    'LOW': 4,
+}
+
+# Parsing is spread across worker processes only when there are enough
+# reports to amortize the pool start-up cost
+PARALLEL_PARSE_THRESHOLD = 64
+PARSE_CHUNKSIZE = 32
+
+# Bump whenever the cached findings layout changes so stale caches are ignored
+REPORT_CACHE_VERSION = 1
+
+
+def _extract_findings(report_data: Dict[str, Any]) -> List[Finding]:
     """
-    Load all scan reports from the reports directory.
+    Reduce a parsed Trivy report to the fields used for aggregation.
     
     Args:
-        reports_dir: Directory containing vulnerability reports
+        report_data: Parsed trivy-report.json document
+        
+    Returns:
+        List of (cve_id, severity, package, installed_version, fixed_version)
+        tuples for every vulnerability that has an ID
+    """
+    findings = []
+    append = findings.append
+    for result in report_data.get('Results') or ():
+        for vuln in result.get('Vulnerabilities') or ():
+            try:
+                cve_id, severity, pkg_name, installed_version = _VULN_FIELDS(vuln)
+            except KeyError:
+                cve_id = vuln.get('VulnerabilityID', '')
+                severity = vuln.get('Severity', 'UNKNOWN')
+                pkg_name = vuln.get('PkgName', 'unknown')
+                installed_version = vuln.get('InstalledVersion', '')
+            if cve_id:
+                append((
+                    cve_id,
+                    severity.upper(),
+                    pkg_name,
+                    installed_version,
+                    vuln.get('FixedVersion', ''),
+                ))
+    return findings
+
+
+def _parse_one(report_file: str) -> Tuple[str, Optional[List[Finding]], Optional[str]]:
+    """
+    Parse a single report file (runs in a worker process).
+    
+    Only the compact findings leave this function, so the full decoded
+    report is released as soon as it has been summarized instead of being
+    retained (and pickled back to the parent process).
+    
+    Args:
+        report_file: Path to a trivy-report.json file
         
     Returns:
-        List of report data with metadata
+        Tuple of (report_file, findings, error_message). findings is None
+        for reports recording a failed scan; on parse failure it is None
+        and error_message describes the problem.
+    """
+    try:
+        report_data = load_json_file(report_file)
+        if 'error' in report_data:
+            return report_file, None, None
+        return report_file, _extract_findings(report_data), None
+    except JSONDecodeError as e:
+        return report_file, None, f"Failed to parse {report_file}: {e}"
+    except Exception as e:
+        return report_file, None, f"Error processing {report_file}: {e}"
+
+
+def _parse_reports(report_files: List[str], workers: Optional[int]) -> Iterator[Tuple[str, Optional[List[Finding]], Optional[str]]]:
+    """
+    Parse report files, spreading the work across processes when worthwhile.
+    
+    Args:
+        report_files: Paths of the reports to parse
+        workers: Number of worker processes (None = CPU count)
+        
+    Yields:
+        Results of _parse_one for each report file
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    done = 0
+    if workers > 1 and len(report_files) >= PARALLEL_PARSE_THRESHOLD:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for result in executor.map(_parse_one, report_files, chunksize=PARSE_CHUNKSIZE):
+                    done += 1
+                    yield result
+            return
+        except (OSError, BrokenProcessPool) as e:
+            # Some sandboxed runners do not allow worker processes
+            print(f"Warning: Parallel parsing unavailable ({e}), parsing remaining reports sequentially", file=sys.stderr)
+    
+    # Results are yielded in order, so resume after the last parsed report
+    for report_file in report_files[done:]:
+        yield _parse_one(report_file)
+
+
+def _load_report_cache(cache_file: Path) -> Dict[str, list]:
+    """
+    Load the parsed-report cache.
+    
+    Args:
+        cache_file: Path to the cache file
+        
+    Returns:
+        Mapping of report path -> [mtime_ns, size, findings]; empty if the
+        cache is missing, unreadable or from an older version
+    """
+    try:
+        cache = load_json_file(cache_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, JSONDecodeError) as e:
+        print(f"Warning: Ignoring unreadable report cache {cache_file}: {e}", file=sys.stderr)
+        return {}
+    
+    if not isinstance(cache, dict) or cache.get('version') != REPORT_CACHE_VERSION:
+        return {}
+    reports = cache.get('reports')
+    return reports if isinstance(reports, dict) else {}
+
+
+def _save_report_cache(cache_file: Path, reports: Dict[str, list]) -> None:
+    """
+    Save the parsed-report cache, replacing the previous file atomically.
+    
+    Args:
+        cache_file: Path to the cache file
+        reports: Mapping of report path -> [mtime_ns, size, findings]
+    """
+    tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        dump_json_file({'version': REPORT_CACHE_VERSION, 'reports': reports}, tmp_file)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Warning: Failed to save report cache {cache_file}: {e}", file=sys.stderr)
+
+
+class CveIds(dict):
+    """
+    Dense integer ids for CVE IDs, assigned in first-seen order.
+    
+    Per-repository and per-package CVE sets store these small ints instead
+    of the CVE ID strings; they are decoded back once when serializing.
+    """
+    
+    __slots__ = ('names',)
+    
+    def __init__(self):
+        super().__init__()
+        self.names = []
+    
+    def __missing__(self, cve_id: str) -> int:
+        cid = self[cve_id] = len(self.names)
+        self.names.append(cve_id)
+        return cid
+    
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        """Return the sorted CVE IDs for a collection of ids."""
+        names = self.names
+        return sorted([names[cid] for cid in ids])
+
+
+class RepoStats:
+    """Vulnerability counters for a single repository."""
+    
+    __slots__ = ('counts', 'cves')
+    
+    def __init__(self):
+        # Per-severity counts, indexed by _SEVERITY_INDEX
+        self.counts = [0] * len(_SEVERITY_INDEX)
+        # CVEs as CveIds ids
+        self.cves = set()
+    
+    def to_dict(self, cve_ids: CveIds) -> Dict[str, Any]:
+        """Convert to the JSON structure used in repository-summary.json."""
+        counts = self.counts
+        return {
+            'total': sum(counts),
+            'critical': counts[_SEVERITY_INDEX['CRITICAL']],
+            'high': counts[_SEVERITY_INDEX['HIGH']],
+            'medium': counts[_SEVERITY_INDEX['MEDIUM']],
+            'low': counts[_SEVERITY_INDEX['LOW']],
+            'cves': cve_ids.decode(self.cves)
+        }
+
+
+class PackageStats:
+    """CVEs and repositories affected through a single package."""
+    
+    __slots__ = ('cves', 'repos')
+    
+    def __init__(self):
+        # CVEs as CveIds ids
+        self.cves = set()
+        self.repos = set()
+    
+    def to_dict(self, cve_ids: CveIds) -> Dict[str, Any]:
+        """Convert to the JSON structure used in statistics.json."""
+        return {
+            'cves': cve_ids.decode(self.cves),
+            'repos': sorted(self.repos)
+        }
+
+
+def load_scan_reports(reports_dir: Path, workers: Optional[int] = None,
+                      cache_file: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
     """
-    reports = []
+    Load all scan reports from the reports directory.
     
+    Reports are yielded as soon as they are parsed so the caller can
+    aggregate them in a single pass without holding the whole corpus.
+    
+    When a cache file is given, the findings of every parsed report are
+    stored with the report's mtime and size, and reports that have not
+    changed since the previous run are served from the cache without being
+    parsed again.
+    
+    Args:
+        reports_dir: Directory containing vulnerability reports
+        workers: Number of worker processes used for parsing (None = CPU count)
+        cache_file: Optional path of the parsed-report cache
+        
+    Yields:
+        Report findings with metadata, in directory walk order
+    """
     if not reports_dir.exists():
         print(f"Error: Reports directory '{reports_dir}' does not exist", file=sys.stderr)
-        return reports
+        return
+    
+    cache = _load_report_cache(cache_file) if cache_file is not None else {}
+    new_cache = {}
     
-    for report_file in reports_dir.rglob('trivy-report.json'):
+    # Decide up front which reports need parsing; cached entries are
+    # resolved here and everything else goes to the parser
+    plan = []
+    report_files = []
+    for entry in iter_report_entries(str(reports_dir)):
         try:
-            with open(report_file, 'r') as f:
-                report_data = json.load(f)
-            
-            # Extract metadata from path
-            parts = report_file.parts
-            if len(parts) >= 4:
-                org = parts[-4] if len(parts) >= 4 else 'unknown'
-                repo = parts[-3] if len(parts) >= 3 else 'unknown'
-                scan_date = parts[-2] if len(parts) >= 2 else 'unknown'
-            else:
-                org = 'unknown'
-                repo = 'unknown'
-                scan_date = 'unknown'
-            
-            reports.append({
-                'file': str(report_file),
-                'org': org,
-                'repo': repo,
-                'scan_date': scan_date,
-                'data': report_data
-            })
+            st = entry.stat()
+            signature = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            signature = None
         
-        except json.JSONDecodeError as e:
-            print(f"Warning: Failed to parse {report_file}: {e}", file=sys.stderr)
-            continue
-        except Exception as e:
-            print(f"Warning: Error processing {report_file}: {e}", file=sys.stderr)
-            continue
-    
-    return reports
+        cached = cache.get(entry.path)
+        if signature and isinstance(cached, list) and len(cached) == 3 and cached[:2] == signature:
+            findings = cached[2]
+            if findings is not None:
+                findings = [tuple(finding) for finding in findings]
+            new_cache[entry.path] = cached
+            plan.append((entry.path, findings, signature, True))
+        else:
+            report_files.append(entry.path)
+            plan.append((entry.path, None, signature, False))
+    
+    # Parsed results come back in submission order, so they can be merged
+    # with the cached entries while preserving the walk order
+    parsed = _parse_reports(report_files, workers)
+    for report_file, findings, signature, from_cache in plan:
+        if not from_cache:
+            report_file, findings, error = next(parsed)
+            if error:
+                print(f"Warning: {error}", file=sys.stderr)
+                continue
+            if signature:
+                new_cache[report_file] = signature + [findings]
+        
+        org, repo, scan_date = report_metadata(report_file)
+        yield {
+            'file': report_file,
+            'org': org,
+            'repo': repo,
+            'scan_date': scan_date,
+            'scan_failed': findings is None,
+            'findings': findings or []
+        }
+    
+    if cache_file is not None:
+        _save_report_cache(cache_file, new_cache)
 
 
-def aggregate_statistics(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+def aggregate_statistics(reports: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Aggregate statistics from all scan reports.
     
+    Each report is folded into the statistics as it arrives, so this works
+    directly on the load_scan_reports generator in a single pass.
+    
     Args:
-        reports: List of report data
+        reports: Report findings from load_scan_reports
         
     Returns:
         Aggregated statistics
@@ -96,89 +357,127 @@ def aggregate_statistics(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
         'total_orgs': set(),
         'scan_dates': set(),
         'cve_index': defaultdict(list),  # CVE -> list of occurrences
-        'repo_vulnerabilities': defaultdict(lambda: {
-            'total': 0,
-            'critical': 0,
-            'high': 0,
-            'medium': 0,
-            'low': 0,
-            'cves': set()
-        }),
-        'severity_distribution': defaultdict(int),
-        'package_vulnerabilities': defaultdict(lambda: {
-            'cves': set(),
-            'repos': set()
-        })
+        'repo_vulnerabilities': defaultdict(RepoStats),
+        'severity_distribution': Counter(),
+        'package_vulnerabilities': defaultdict(PackageStats)
     }
+    cve_index = stats['cve_index']
+    severity_distribution = stats['severity_distribution']
+    package_vulnerabilities = stats['package_vulnerabilities']
+    cve_ids_map = CveIds()
+    intern = sys.intern
+    severity_index = _SEVERITY_INDEX.get
     
     for report in reports:
-        if 'error' in report['data']:
+        if report['scan_failed']:
             continue
         
+        org = intern(report['org'])
+        repo = intern(report['repo'])
+        scan_date = intern(report['scan_date'])
+        repo_key = intern(f"{org}/{repo}")
+        
         stats['total_scans'] += 1
-        stats['total_repositories'].add(f"{report['org']}/{report['repo']}")
-        stats['total_orgs'].add(report['org'])
-        stats['scan_dates'].add(report['scan_date'])
+        stats['total_repositories'].add(repo_key)
+        stats['total_orgs'].add(org)
+        stats['scan_dates'].add(scan_date)
+        
+        # Look the repository record up once per report, not once per vulnerability
+        repo_stats = stats['repo_vulnerabilities'][repo_key]
+        repo_counts = repo_stats.counts
+        repo_cves = repo_stats.cves
+        
+        findings = report['findings']
+        if not findings:
+            continue
         
-        repo_key = f"{report['org']}/{report['repo']}"
+        # Work on the report column by column: the counting and set updates
+        # below then run as single C-level calls instead of per-vulnerability
+        # Python statements. Every report decodes its own copy of these
+        # strings; interning keeps a single instance of each across the corpus.
+        cve_ids, severities, pkg_names, installed_versions, fixed_versions = zip(*findings)
+        cve_ids = tuple(map(intern, cve_ids))
+        severities = tuple(map(intern, severities))
+        pkg_names = tuple(map(intern, pkg_names))
         
-        # Process vulnerabilities
-        if 'Results' in report['data']:
-            for result in report['data'].get('Results', []):
-                if 'Vulnerabilities' in result:
-                    for vuln in result['Vulnerabilities']:
-                        cve_id = vuln.get('VulnerabilityID', '')
-                        severity = vuln.get('Severity', 'UNKNOWN').upper()
-                        pkg_name = vuln.get('PkgName', 'unknown')
-                        
-                        if cve_id:
-                            # Add to CVE index
-                            stats['cve_index'][cve_id].append({
-                                'repository': repo_key,
-                                'org': report['org'],
-                                'repo': report['repo'],
-                                'scan_date': report['scan_date'],
-                                'severity': severity,
-                                'package': pkg_name,
-                                'package_version': vuln.get('InstalledVersion', ''),
-                                'fixed_version': vuln.get('FixedVersion', ''),
-                            })
-                            
-                            # Update repository stats
-                            stats['repo_vulnerabilities'][repo_key]['total'] += 1
-                            stats['repo_vulnerabilities'][repo_key]['cves'].add(cve_id)
-                            if severity == 'CRITICAL':
-                                stats['repo_vulnerabilities'][repo_key]['critical'] += 1
-                            elif severity == 'HIGH':
-                                stats['repo_vulnerabilities'][repo_key]['high'] += 1
-                            elif severity == 'MEDIUM':
-                                stats['repo_vulnerabilities'][repo_key]['medium'] += 1
-                            elif severity == 'LOW':
-                                stats['repo_vulnerabilities'][repo_key]['low'] += 1
-                            
-                            # Update severity distribution
-                            stats['severity_distribution'][severity] += 1
-                            
-                            # Update package stats
-                            stats['package_vulnerabilities'][pkg_name]['cves'].add(cve_id)
-                            stats['package_vulnerabilities'][pkg_name]['repos'].add(repo_key)
+        # Update repository stats and severity distribution
+        severity_counts = Counter(severities)
+        for severity, count in severity_counts.items():
+            repo_counts[severity_index(severity, 0)] += count
+        severity_distribution.update(severity_counts)
+        cids = tuple(map(cve_ids_map.__getitem__, cve_ids))
+        repo_cves.update(cids)
+        
+        # Update package stats (dict.fromkeys de-duplicates in report order)
+        for pkg_name in dict.fromkeys(pkg_names):
+            package_vulnerabilities[pkg_name].repos.add(repo_key)
+        for pkg_name, cid in dict.fromkeys(zip(pkg_names, cids)):
+            package_vulnerabilities[pkg_name].cves.add(cid)
+        
+        # Add to CVE index
+        for cve_id, severity, pkg_name, installed_version, fixed_version in zip(
+            cve_ids, severities, pkg_names, installed_versions, fixed_versions
+        ):
+            cve_index[cve_id].append({
+                'repository': repo_key,
+                'org': org,
+                'repo': repo,
+                'scan_date': scan_date,
+                'severity': severity,
+                'package': pkg_name,
+                'package_version': installed_version,
+                'fixed_version': fixed_version,
+            })
     
     # Convert sets to lists for JSON serialization
     stats['total_repositories'] = sorted(list(stats['total_repositories']))
     stats['total_orgs'] = sorted(list(stats['total_orgs']))
     stats['scan_dates'] = sorted(list(stats['scan_dates']))
     
-    # Convert CVE index sets
-    for repo_key in stats['repo_vulnerabilities']:
-        stats['repo_vulnerabilities'][repo_key]['cves'] = sorted(list(stats['repo_vulnerabilities'][repo_key]['cves']))
+    # Convert per-repository and per-package records to plain dicts in place,
+    # so no second copy of either mapping is built
+    repo_vulnerabilities = stats['repo_vulnerabilities']
+    for repo_key, repo_stats in repo_vulnerabilities.items():
+        repo_vulnerabilities[repo_key] = repo_stats.to_dict(cve_ids_map)
+    for pkg_name, pkg_stats in package_vulnerabilities.items():
+        package_vulnerabilities[pkg_name] = pkg_stats.to_dict(cve_ids_map)
     
-    for pkg_name in stats['package_vulnerabilities']:
-        stats['package_vulnerabilities'][pkg_name]['cves'] = sorted(list(stats['package_vulnerabilities'][pkg_name]['cves']))
-        stats['package_vulnerabilities'][pkg_name]['repos'] = sorted(list(stats['package_vulnerabilities'][pkg_name]['repos']))
+    # Serialize the defaultdicts as they are; dropping the default factories
+    # makes later lookups behave like plain dicts without copying them
+    cve_index.default_factory = None
+    repo_vulnerabilities.default_factory = None
+    package_vulnerabilities.default_factory = None
     
     return stats
 
 
+def _dumps_indented_object(obj: Dict[str, Any], serialized: Dict[str, bytes]) -> bytes:
+    """
+    Serialize a dict as indented JSON, reusing already serialized values.
+    
+    Produces the same bytes as dumps_json(obj, indent=True), but values
+    listed in serialized are spliced in rather than encoded again. Encoded
+    JSON strings never contain a raw newline, so re-indenting a nested
+    document is a plain replace on its line breaks.
+    
+    Args:
+        obj: Top-level object to serialize
+        serialized: Indented JSON for some of obj's keys
+        
+    Returns:
+        UTF-8 encoded JSON document
+    """
+    if not obj:
+        return b'{}'
+    members = []
+    for key, value in obj.items():
+        data = serialized.get(key)
+        if data is None:
+            data = dumps_json(value, indent=True)
+        members.append(b'  ' + dumps_json(key) + b': ' + data.replace(b'\n', b'\n  '))
+    return b'{\n' + b',\n'.join(members) + b'\n}'
+
+
 def generate_summary_report(stats: Dict[str, Any]) -> str:
     """
     Generate a human-readable summary report.
@@ -237,8 +536,6 @@ def generate_summary_report(stats: Dict[str, Any]) -> str:
 
 
 def main():
-    import os
-    
     parser = argparse.ArgumentParser(
         description='Aggregate and index Trivy scan results',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -267,6 +564,26 @@ Examples:
         help='Output directory for aggregated data (default: aggregated or OUTPUT_DIR env var)'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=int(os.environ['AGGREGATE_WORKERS']) if os.environ.get('AGGREGATE_WORKERS') else None,
+        help='Number of worker processes used to parse reports (default: CPU count or AGGREGATE_WORKERS env var)'
+    )
+    
+    parser.add_argument(
+        '--cache-file',
+        type=Path,
+        default=Path(os.environ['AGGREGATE_CACHE_FILE']) if os.environ.get('AGGREGATE_CACHE_FILE') else None,
+        help='Cache of parsed reports reused for unchanged files (default: AGGREGATE_CACHE_FILE env var, otherwise no cache)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Parse every report and do not read or write the report cache'
+    )
+    
     args = parser.parse_args()
     
     # Sanitize and validate paths
@@ -294,41 +611,52 @@ Examples:
         else:
             # Use explicitly provided output directory
             sanitized_output_dir = sanitize_path(str(args.output_dir), base_dir)
+        
+        cache_file = None
+        if args.cache_file is not None and not args.no_cache:
+            cache_file = sanitize_path(str(args.cache_file), base_dir)
     except ValueError as e:
         print(f"Error: Invalid path: {e}", file=sys.stderr)
         sys.exit(1)
     
-    print("Loading scan reports...")
-    reports = load_scan_reports(sanitized_reports_dir)
+    print("Loading and aggregating scan reports...")
+    stats = aggregate_statistics(
+        load_scan_reports(sanitized_reports_dir, workers=args.workers, cache_file=cache_file)
+    )
     
-    if not reports:
+    if not stats['total_scans']:
         print("No reports found.", file=sys.stderr)
         sys.exit(1)
     
-    print(f"Loaded {len(reports)} scan reports")
-    print("Aggregating statistics...")
-    
-    stats = aggregate_statistics(reports)
+    print(f"Aggregated {stats['total_scans']} scan reports")
     
     # Create output directory
     sanitized_output_dir.mkdir(parents=True, exist_ok=True)
     
+    # The CVE index and repository summary are serialized once and reused
+    # for both their own files and statistics.json
+    cve_index_json = dumps_json(stats['cve_index'], indent=True)
+    repo_summary_json = dumps_json(stats['repo_vulnerabilities'], indent=True)
+    
     # Save aggregated data
     stats_file = sanitized_output_dir / 'statistics.json'
-    with open(stats_file, 'w') as f:
-        json.dump(stats, f, indent=2)
+    with open(stats_file, 'wb') as f:
+        f.write(_dumps_indented_object(stats, {
+            'cve_index': cve_index_json,
+            'repo_vulnerabilities': repo_summary_json,
+        }))
     print(f"Saved statistics to {stats_file}")
     
     # Save CVE index
     cve_index_file = sanitized_output_dir / 'cve-index.json'
-    with open(cve_index_file, 'w') as f:
-        json.dump(dict(stats['cve_index']), f, indent=2)
+    with open(cve_index_file, 'wb') as f:
+        f.write(cve_index_json)
     print(f"Saved CVE index to {cve_index_file}")
     
     # Save repository summary
     repo_summary_file = sanitized_output_dir / 'repository-summary.json'
-    with open(repo_summary_file, 'w') as f:
-        json.dump(dict(stats['repo_vulnerabilities']), f, indent=2)
+    with open(repo_summary_file, 'wb') as f:
+        f.write(repo_summary_json)
     print(f"Saved repository summary to {repo_summary_file}")
     
     # Generate and save summary report
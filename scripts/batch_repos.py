@@ -7,7 +7,6 @@ into batches for parallel processing via GitHub Actions matrix strategy.
 """
 
 import os
-import json
 import sys
 import math
 from pathlib import Path
@@ -15,17 +14,31 @@ from pathlib import Path
 # Import security utilities
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from security_utils import sanitize_path, sanitize_error_message
+from json_utils import dump_file as dump_json_file, dumps as dumps_json
+from repos_file import load_repos_file
+
+def iter_batches(items, batch_size):
+    """Yield consecutive slices of a list, each at most batch_size long."""
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
 
 def split_into_batches(items, batch_size):
     """Split a list into batches of specified size."""
-    batches = []
-    for i in range(0, len(items), batch_size):
-        batches.append(items[i:i + batch_size])
-    return batches
+    return list(iter_batches(items, batch_size))
 
-def main():
+def main(batch_size=None):
+    """
+    Split repos.json into batches and write repo-batches.json.
+
+    Args:
+        batch_size: Repositories per batch; defaults to BATCH_SIZE (100)
+
+    Returns:
+        List of batch dictionaries, as written to repo-batches.json
+    """
     # Get batch size from environment (default: 100)
-    batch_size = int(os.environ.get('BATCH_SIZE', '100'))
+    if batch_size is None:
+        batch_size = int(os.environ.get('BATCH_SIZE', '100'))
     if batch_size < 1:
         print("Error: BATCH_SIZE must be at least 1")
         sys.exit(1)
@@ -34,8 +47,7 @@ def main():
     try:
         base_dir = Path.cwd()
         repos_file = sanitize_path('repos.json', base_dir)
-        with open(repos_file, 'r') as f:
-            repos_data = json.load(f)
+        repos_data = load_repos_file(repos_file)
     except Exception as e:
         print(f"Error: Failed to read repos file - {sanitize_error_message(str(e), [])}")
         sys.exit(1)
@@ -53,6 +65,7 @@ def main():
         # Multi-org format: create batches per org
         all_batches = []
         batch_info = []
+        matrix_include = []
         
         for org_data in repos_data:
             org_name = org_data['org']
@@ -62,29 +75,29 @@ def main():
                 continue
             
             # Split repos for this org into batches
-            batches = split_into_batches(repos, batch_size)
+            org_total_batches = math.ceil(len(repos) / batch_size)
             
-            for batch_idx, batch in enumerate(batches):
+            for batch_idx, batch in enumerate(iter_batches(repos, batch_size)):
                 batch_id = f"{org_name}-batch-{batch_idx + 1}"
                 all_batches.append({
                     'batch_id': batch_id,
                     'org': org_name,
                     'repos': batch,
                     'batch_index': batch_idx,
-                    'total_batches': len(batches)
+                    'total_batches': org_total_batches
                 })
                 batch_info.append({
                     'batch_id': batch_id,
                     'org': org_name,
                     'size': len(batch),
                     'batch_index': batch_idx,
-                    'total_batches': len(batches)
+                    'total_batches': org_total_batches
                 })
+                matrix_include.append({'batch_id': batch_id})
         
         # Save batches to file
         batches_file = sanitize_path('repo-batches.json', base_dir)
-        with open(batches_file, 'w') as f:
-            json.dump(all_batches, f, indent=2)
+        dump_json_file(all_batches, batches_file)
         
         # Print summary
         total_repos = sum(len(org_data['repos']) for org_data in repos_data)
@@ -96,11 +109,11 @@ def main():
         # Set GitHub Actions output for matrix strategy
         github_output = os.environ.get('GITHUB_OUTPUT', '/dev/stdout')
         with open(github_output, 'a') as f:
-            # Create matrix include list
-            matrix_include = json.dumps([{'batch_id': b['batch_id']} for b in all_batches])
-            f.write(f"matrix={matrix_include}\n")
-            f.write(f"total_batches={total_batches}\n")
-            f.write(f"total_repos={total_repos}\n")
+            f.write(
+                f"matrix={dumps_json(matrix_include).decode('utf-8')}\n"
+                f"total_batches={total_batches}\n"
+                f"total_repos={total_repos}\n"
+            )
     else:
         # Single org format: backward compatible
         repos = repos_data
@@ -110,26 +123,26 @@ def main():
             sys.exit(1)
         
         # Split repos into batches
-        batches = split_into_batches(repos, batch_size)
+        total_batches = math.ceil(len(repos) / batch_size)
         
         all_batches = []
-        for batch_idx, batch in enumerate(batches):
+        matrix_include = []
+        for batch_idx, batch in enumerate(iter_batches(repos, batch_size)):
             batch_id = f"batch-{batch_idx + 1}"
             all_batches.append({
                 'batch_id': batch_id,
                 'repos': batch,
                 'batch_index': batch_idx,
-                'total_batches': len(batches)
+                'total_batches': total_batches
             })
+            matrix_include.append({'batch_id': batch_id})
         
         # Save batches to file
         batches_file = sanitize_path('repo-batches.json', base_dir)
-        with open(batches_file, 'w') as f:
-            json.dump(all_batches, f, indent=2)
+        dump_json_file(all_batches, batches_file)
         
         # Print summary
         total_repos = len(repos)
-        total_batches = len(batches)
         print(f"Split {total_repos} repositories into {total_batches} batch(es) (batch size: {batch_size})")
         for batch in all_batches:
             print(f"  - {batch['batch_id']}: {len(batch['repos'])} repos (batch {batch['batch_index'] + 1}/{total_batches})")
@@ -137,11 +150,13 @@ def main():
         # Set GitHub Actions output for matrix strategy
         github_output = os.environ.get('GITHUB_OUTPUT', '/dev/stdout')
         with open(github_output, 'a') as f:
-            # Create matrix include list
-            matrix_include = json.dumps([{'batch_id': b['batch_id']} for b in all_batches])
-            f.write(f"matrix={matrix_include}\n")
-            f.write(f"total_batches={total_batches}\n")
-            f.write(f"total_repos={total_repos}\n")
+            f.write(
+                f"matrix={dumps_json(matrix_include).decode('utf-8')}\n"
+                f"total_batches={total_batches}\n"
+                f"total_repos={total_repos}\n"
+            )
+    
+    return all_batches
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Build a SQLite index of CVE findings from stored Trivy scan results.
+
+Every trivy-report.json under the reports directory is parsed once and
+each vulnerability is stored as a row keyed by its CVE identifier, so
+query-cve.py can answer a lookup with one indexed SELECT instead of
+walking and parsing every report.
+
+Usage:
+    python3 build_cve_index.py
+    python3 build_cve_index.py --reports-dir vulnerability-reports
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Import security utilities
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from security_utils import sanitize_path
+from json_utils import JSONDecodeError, load_file as load_json_file
+from report_files import iter_report_entries, report_metadata
+
+# Index file name, stored at the top of the reports directory
+INDEX_FILE_NAME = '.index.sqlite'
+
+# Bumped whenever the table layout changes; an index with another
+# version is ignored by readers until it is rebuilt
+INDEX_SCHEMA_VERSION = 2
+
+FINDING_COLUMNS = (
+    'cve', 'org', 'repo', 'scan_date', 'severity', 'package', 'package_version',
+    'title', 'description', 'fixed_version', 'published_date', 'last_modified_date',
+)
+
+
+def get_index_file(reports_dir: Path) -> Path:
+    """
+    Get the CVE index path for a reports directory.
+
+    Args:
+        reports_dir: Directory containing vulnerability reports
+
+    Returns:
+        Path of the index file
+    """
+    return reports_dir / INDEX_FILE_NAME
+
+
+def report_fingerprint(entries: List[os.DirEntry]) -> Tuple[int, int]:
+    """
+    Summarize a set of reports so an index built from them can be checked.
+
+    Adding, replacing or rewriting a report changes the count or moves the
+    newest modification time forward.
+
+    Args:
+        entries: Report entries from iter_report_entries()
+
+    Returns:
+        Tuple of (number of reports, newest modification time in ns)
+    """
+    newest = 0
+    for entry in entries:
+        try:
+            newest = max(newest, entry.stat().st_mtime_ns)
+        except OSError:
+            pass  # Removed since the walk; the count no longer matches
+    return len(entries), newest
+
+
+def _iter_rows(reports_dir: Path, report_files: List[str]) -> Iterator[Tuple[str, ...]]:
+    """
+    Yield one index row per vulnerability found in the reports.
+
+    Args:
+        reports_dir: Directory containing vulnerability reports
+        report_files: Report paths below reports_dir
+
+    Yields:
+        Row tuples in FINDING_COLUMNS order
+    """
+    for report_file in sorted(report_files):
+        # Path format: vulnerability-reports/{org}/{repo}/{date}/trivy-report.json
+        if len(os.path.relpath(report_file, reports_dir).split(os.sep)) != 4:
+            continue
+        org, repo, scan_date = report_metadata(report_file)
+
+        try:
+            report_data = load_json_file(report_file)
+        except (JSONDecodeError, OSError) as e:
+            print(f"Warning: Failed to parse {report_file}: {e}", file=sys.stderr)
+            continue
+
+        if not isinstance(report_data, dict) or 'error' in report_data:
+            continue
+
+        for result in report_data.get('Results') or []:
+            for vuln in result.get('Vulnerabilities') or []:
+                cve_id = vuln.get('VulnerabilityID')
+                if not cve_id:
+                    continue
+                yield (
+                    cve_id, org, repo, scan_date,
+                    vuln.get('Severity', 'UNKNOWN'),
+                    vuln.get('PkgName', 'unknown'),
+                    vuln.get('InstalledVersion', 'unknown'),
+                    vuln.get('Title', ''),
+                    vuln.get('Description', ''),
+                    vuln.get('FixedVersion', ''),
+                    vuln.get('PublishedDate', ''),
+                    vuln.get('LastModifiedDate', ''),
+                )
+
+
+def build_index(reports_dir: Path, index_file: Optional[Path] = None) -> int:
+    """
+    Build the CVE index for a reports directory.
+
+    The index is written to a temporary file and moved into place, so
+    readers never see a partially written index. It records the
+    report_fingerprint() of the reports it was built from.
+
+    Args:
+        reports_dir: Directory containing vulnerability reports
+        index_file: Destination path (defaults to .index.sqlite in reports_dir)
+
+    Returns:
+        Number of findings indexed
+    """
+    if index_file is None:
+        index_file = get_index_file(reports_dir)
+    tmp_file = index_file.with_name(index_file.name + '.tmp')
+    tmp_file.unlink(missing_ok=True)
+
+    # Fingerprinted before parsing, so a report changed during the build
+    # makes the index stale rather than silently missing from it
+    entries = list(iter_report_entries(str(reports_dir)))
+    report_count, newest_mtime_ns = report_fingerprint(entries)
+
+    conn = sqlite3.connect(tmp_file)
+    try:
+        conn.execute(f"CREATE TABLE findings ({', '.join(f'{c} TEXT' for c in FINDING_COLUMNS)})")
+        conn.executemany(
+            f"INSERT INTO findings VALUES ({', '.join('?' * len(FINDING_COLUMNS))})",
+            _iter_rows(reports_dir, [entry.path for entry in entries])
+        )
+        conn.execute("CREATE TABLE reports (report_count INTEGER, newest_mtime_ns INTEGER)")
+        conn.execute("INSERT INTO reports VALUES (?, ?)", (report_count, newest_mtime_ns))
+        conn.execute("CREATE INDEX idx_cve ON findings(cve)")
+        conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        count = conn.execute("SELECT COUNT(*) FROM findings").fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_file, index_file)
+    return count
+
+
+def query_index(index_file: Path, cve_id: str,
+                fingerprint: Optional[Tuple[int, int]] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Look up a CVE in the index.
+
+    Args:
+        index_file: Path of the index file
+        cve_id: CVE identifier (e.g., 'CVE-2024-1234')
+        fingerprint: report_fingerprint() of the current reports; the index
+            is only used if it was built from the same reports
+
+    Returns:
+        List of finding dictionaries, or None if the index is missing,
+        unreadable, out of date, or was built with another schema version
+    """
+    if not index_file.is_file():
+        return None
+
+    try:
+        conn = sqlite3.connect(f"{index_file.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_SCHEMA_VERSION:
+                return None
+            if fingerprint is not None and conn.execute("SELECT * FROM reports").fetchone() != tuple(fingerprint):
+                print(f"Warning: CVE index {index_file} is out of date, searching the reports", file=sys.stderr)
+                return None
+            rows = conn.execute(
+                f"SELECT {', '.join(FINDING_COLUMNS)} FROM findings WHERE cve = ? ORDER BY rowid",
+                (cve_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Ignoring unreadable CVE index {index_file}: {e}", file=sys.stderr)
+        return None
+
+    # Same key order as query-cve.py builds from the reports themselves
+    return [
+        {'cve': row[0], 'repository': f"{row[1]}/{row[2]}", **dict(zip(FINDING_COLUMNS[1:], row[1:]))}
+        for row in rows
+    ]
+
+
+def main(reports_dir: Optional[Path] = None) -> int:
+    """
+    Build the CVE index.
+
+    Args:
+        reports_dir: Directory containing vulnerability reports (defaults to
+            the --reports-dir argument, REPORTS_DIR env var, or
+            vulnerability-reports)
+
+    Returns:
+        Exit code
+    """
+    if reports_dir is None:
+        parser = argparse.ArgumentParser(description='Build the CVE index for stored Trivy scan results')
+        parser.add_argument(
+            '--reports-dir',
+            type=Path,
+            default=Path(os.environ.get('REPORTS_DIR', 'vulnerability-reports')),
+            help='Directory containing vulnerability reports (default: vulnerability-reports or REPORTS_DIR env var)'
+        )
+        args = parser.parse_args()
+        try:
+            reports_dir = sanitize_path(str(args.reports_dir), Path.cwd())
+        except ValueError as e:
+            print(f"Error: Invalid reports directory path: {e}", file=sys.stderr)
+            return 1
+
+    if not reports_dir.is_dir():
+        print(f"Error: Reports directory '{reports_dir}' does not exist", file=sys.stderr)
+        return 1
+
+    count = build_index(reports_dir)
+    print(f"Indexed {count} finding(s) in {get_index_file(reports_dir)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,35 +9,229 @@ Supports both single org (GITHUB_ORG) and multiple orgs (GITHUB_ORGS, comma-sepa
 import os
 import json
 import sys
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from pathlib import Path
-from github import Github
-from github.Auth import Token
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional
+from urllib3.util.retry import Retry
 
 # Import security utilities
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from security_utils import (
-    sanitize_path, validate_org_name, validate_repo_name,
-    validate_repo_full_name, sanitize_error_message
+    sanitize_path, validate_org_name, validate_repo_full_name_split,
+    sanitize_error_message, compile_token_sanitizer
 )
+from json_utils import JSONDecodeError, dump_file as dump_json_file, dump_ndjson, load_file as load_json_file
+from repos_file import ndjson_enabled
 
-def get_org_repos(org_name, g, tokens_to_sanitize):
-    """Get all repositories for a single organization."""
+GITHUB_GRAPHQL_URL = 'https://api.github.com/graphql'
+
+# Maximum number of organizations whose repositories are fetched concurrently
+ORG_FETCH_WORKERS = 8
+
+# Retries for transient GraphQL failures (502/503/504 and connection errors)
+REQUEST_RETRIES = 5
+
+@dataclass(slots=True)
+class RepoRecord:
+    """One repos.json entry; serialized by json_utils as a JSON object."""
+    name: str
+    full_name: str
+    private: bool
+    default_branch: str
+    # Head commit of the default branch; None for empty repositories
+    head_sha: Optional[str] = None
+
+
+# Only the fields written to repos.json are requested, 100 repositories
+# (the GraphQL maximum) per round trip
+ORG_REPOS_QUERY = """
+query($org: String!, $cursor: String) {
+  organization(login: $org) {
+    repositories(first: 100, after: $cursor, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { endCursor hasNextPage }
+      nodes { name nameWithOwner isPrivate defaultBranchRef { name target { oid } } }
+    }
+  }
+}
+"""
+
+# Cheap query whose result changes whenever a repository is created,
+# deleted, renamed, otherwise updated or pushed to (cached listings carry
+# each default branch's head commit); used to validate cached listings
+ORG_REPOS_FINGERPRINT_QUERY = """
+query($org: String!) {
+  organization(login: $org) {
+    repositories(first: 1, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      totalCount
+      nodes { nameWithOwner updatedAt }
+    }
+    pushed: repositories(first: 1, orderBy: {field: PUSHED_AT, direction: DESC}) {
+      nodes { nameWithOwner pushedAt }
+    }
+  }
+}
+"""
+
+def create_session():
+    """
+    Create an HTTP session for GraphQL requests.
+    
+    The connection pool fits ORG_FETCH_WORKERS threads, and transient
+    gateway errors are retried with backoff by the adapter.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=REQUEST_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        # GraphQL reads are POST requests, which urllib3 does not retry by default
+        allowed_methods=frozenset({'POST'}),
+        raise_on_status=False
+    )
+    session.mount('https://', HTTPAdapter(pool_maxsize=ORG_FETCH_WORKERS, max_retries=retry))
+    return session
+
+@lru_cache(maxsize=None)
+def get_session():
+    """
+    Return the process-wide HTTP session, creating it on first use.
+    
+    Tokens are sent per request, so one session (and its keep-alive
+    connections) serves every organization and every main() call.
+    """
+    return create_session()
+
+def query_organization(org_name, query, variables, token, session=None):
+    """
+    Run a GraphQL query and return its organization object.
+    
+    Args:
+        org_name: Organization login (passed to the query as $org)
+        query: GraphQL query with an organization(login: $org) root field
+        variables: Additional query variables
+        token: GitHub App installation token for the organization
+        session: Optional requests.Session to reuse connections across calls
+    
+    Returns:
+        The 'organization' object from the response data
+    
+    Raises:
+        requests.RequestException: On network or HTTP errors
+        RuntimeError: If the query returns errors or the organization is not found
+    """
+    post = session.post if session is not None else requests.post
+    response = post(
+        GITHUB_GRAPHQL_URL,
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Accept': 'application/vnd.github+json'
+        },
+        json={'query': query, 'variables': {'org': org_name, **variables}},
+        timeout=30
+    )
+    response.raise_for_status()
+    payload = response.json()
+    
+    if payload.get('errors'):
+        messages = '; '.join(error.get('message', 'unknown error') for error in payload['errors'])
+        raise RuntimeError(f"GraphQL query failed: {messages}")
+    organization = (payload.get('data') or {}).get('organization')
+    if organization is None:
+        raise RuntimeError(f"Organization {org_name} not found or not accessible")
+    return organization
+
+def fetch_org_repo_nodes(org_name, token, session=None):
+    """
+    Fetch the repository nodes of an organization through the GraphQL API.
+    
+    Args:
+        org_name: Organization login
+        token: GitHub App installation token for the organization
+        session: Optional requests.Session to reuse connections across calls
+    
+    Returns:
+        List of repository nodes with name, nameWithOwner, isPrivate and
+        defaultBranchRef (name and head commit) fields
+    
+    Raises:
+        requests.RequestException: On network or HTTP errors
+        RuntimeError: If the query returns errors or the organization is not found
+    """
+    nodes = []
+    cursor = None
+    while True:
+        organization = query_organization(org_name, ORG_REPOS_QUERY, {'cursor': cursor}, token, session)
+        repositories = organization['repositories']
+        nodes.extend(repositories['nodes'])
+        if not repositories['pageInfo']['hasNextPage']:
+            return nodes
+        cursor = repositories['pageInfo']['endCursor']
+
+def fetch_org_repo_nodes_cached(org_name, token, session=None, cache_dir=None):
+    """
+    Fetch repository nodes, reusing the cached listing when nothing changed.
+    
+    A small fingerprint query (repository count plus the most recently
+    updated and most recently pushed repositories) is compared with the fingerprint stored
+    alongside the cached listing in <cache_dir>/<org>.json. Only when they
+    differ is the full listing paginated again and the cache rewritten.
+    
+    Args:
+        org_name: Organization login (already validated)
+        token: GitHub App installation token for the organization
+        session: Optional requests.Session to reuse connections across calls
+        cache_dir: Cache directory; None disables caching
+    
+    Returns:
+        List of repository nodes, as returned by fetch_org_repo_nodes
+    """
+    if cache_dir is None:
+        return fetch_org_repo_nodes(org_name, token, session)
+    
+    fingerprint = query_organization(org_name, ORG_REPOS_FINGERPRINT_QUERY, {}, token, session)
+    cache_file = Path(cache_dir) / f'{org_name}.json'
+    try:
+        cached = load_json_file(cache_file)
+    except (OSError, JSONDecodeError):
+        cached = None
+    
+    if isinstance(cached, dict) and cached.get('fingerprint') == fingerprint and isinstance(cached.get('nodes'), list):
+        print(f"Using cached repository list for {org_name} (unchanged since last run)")
+        return cached['nodes']
+    
+    nodes = fetch_org_repo_nodes(org_name, token, session)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        dump_json_file({'fingerprint': fingerprint, 'nodes': nodes}, cache_file)
+    except OSError as e:
+        print(f"Warning: Failed to cache repository list for {org_name}: {e}")
+    return nodes
+
+def get_org_repos(org_name, token, tokens_to_sanitize, session=None, cache_dir=None):
+    """Get all repositories for a single organization as RepoRecords."""
     try:
-        org = g.get_organization(org_name)
         repos = []
-        for repo in org.get_repos():
+        for repo in fetch_org_repo_nodes_cached(org_name, token, session, cache_dir):
             try:
-                repo_name = validate_repo_name(repo.name)
-                repo_full_name = validate_repo_full_name(repo.full_name)
-                repos.append({
-                    'name': repo_name,
-                    'full_name': repo_full_name,
-                    'private': repo.private,
-                    'default_branch': repo.default_branch or 'main'
-                })
+                # One validation covers both the owner and the repository name
+                repo_full_name = repo['nameWithOwner']
+                _, repo_name = validate_repo_full_name_split(repo_full_name)
+                if repo['name'] != repo_name:
+                    raise ValueError(f"Repository name does not match full name: {repo_full_name}")
+                default_branch_ref = repo.get('defaultBranchRef') or {}
+                repos.append(RepoRecord(
+                    name=repo_name,
+                    full_name=repo_full_name,
+                    private=repo['isPrivate'],
+                    default_branch=default_branch_ref.get('name') or 'main',
+                    head_sha=(default_branch_ref.get('target') or {}).get('oid')
+                ))
             except ValueError as e:
-                print(f"Warning: Skipping invalid repository {repo.name} in {org_name}: {sanitize_error_message(str(e), tokens_to_sanitize)}")
+                print(f"Warning: Skipping invalid repository {repo['name']} in {org_name}: {sanitize_error_message(str(e), tokens_to_sanitize)}")
                 continue
         return repos
     except Exception as e:
@@ -45,51 +239,97 @@ def get_org_repos(org_name, g, tokens_to_sanitize):
         print(f"Error fetching repositories for {org_name}: {error_msg}")
         raise
 
+def write_repos_file(repos_file, repos_data, org_repos):
+    """
+    Write repos.json as a JSON array, or as NDJSON when SPARTA_REPOS_NDJSON is set.
+    
+    Args:
+        repos_file: Destination path
+        repos_data: Repository data for the JSON array format
+        org_repos: (org name, RepoRecord list) pairs for the NDJSON format
+    """
+    if ndjson_enabled():
+        dump_ndjson(
+            ({'org': org_name, **asdict(repo)} for org_name, repos in org_repos for repo in repos),
+            repos_file
+        )
+    else:
+        dump_json_file(repos_data, repos_file)
+
 def get_token_for_org(org_name, token_map, default_token):
     """Get the appropriate token for an organization from the token map."""
     if token_map:
         return token_map.get(org_name, default_token)
     return default_token
 
-def main():
+def main(org_names=None, token_map=None, fallback_token=None, multi=None):
+    """
+    List repositories for the configured organizations and write repos.json.
+
+    Arguments left as None are read from the environment (GITHUB_ORGS or
+    GITHUB_ORG, GITHUB_APP_TOKEN_MAP and GITHUB_APP_TOKEN).
+
+    Args:
+        org_names: Organization names to list
+        token_map: Dictionary mapping org names to installation tokens
+        fallback_token: Token used for orgs missing from token_map
+        multi: Write the multi-org format; defaults to True when more than
+            one org is given
+
+    Returns:
+        Repository data as written to repos.json, with RepoRecord entries
+    """
     # Validate and sanitize inputs
-    installation_token = os.environ.get('GITHUB_APP_TOKEN', '')
-    token_map_json = os.environ.get('GITHUB_APP_TOKEN_MAP', '')
+    installation_token = fallback_token if fallback_token is not None else os.environ.get('GITHUB_APP_TOKEN', '')
     
     # Parse token map if provided
-    token_map = {}
-    if token_map_json:
-        try:
-            token_map = json.loads(token_map_json)
-            # Add all tokens to sanitize list
-            tokens_to_sanitize = list(token_map.values()) + [installation_token]
-        except json.JSONDecodeError:
-            print("Warning: Failed to parse GITHUB_APP_TOKEN_MAP, using default token")
-            tokens_to_sanitize = [installation_token]
-    else:
-        tokens_to_sanitize = [installation_token]
+    if token_map is None:
+        token_map = {}
+        token_map_json = os.environ.get('GITHUB_APP_TOKEN_MAP', '')
+        if token_map_json:
+            try:
+                token_map = json.loads(token_map_json)
+            except json.JSONDecodeError:
+                print("Warning: Failed to parse GITHUB_APP_TOKEN_MAP, using default token")
+    # Sanitize all tokens; compiled once and reused for every message below
+    tokens_to_sanitize = compile_token_sanitizer([*token_map.values(), installation_token])
     
     if not installation_token:
         print("Error: GITHUB_APP_TOKEN environment variable is not set")
         sys.exit(1)
     
-    # Check for GITHUB_ORGS (multi-org) or GITHUB_ORG (single org, backward compatible)
-    orgs_env = os.environ.get('GITHUB_ORGS', '').strip()
-    org_env = os.environ.get('GITHUB_ORG', '').strip()
-    
-    if orgs_env:
-        # Multi-org mode: GITHUB_ORGS is set
-        org_names = [validate_org_name(org.strip()) for org in orgs_env.split(',') if org.strip()]
+    if org_names is not None:
+        org_names = [validate_org_name(org) for org in org_names]
         if not org_names:
-            print("Error: GITHUB_ORGS is set but contains no valid organization names")
+            print("Error: No organization names given")
             sys.exit(1)
-        use_multi_org_format = True
-    elif org_env:
-        # Single org mode: GITHUB_ORG is set (backward compatible)
-        org_names = [validate_org_name(org_env)]
-        use_multi_org_format = False
+        use_multi_org_format = multi if multi is not None else len(org_names) > 1
     else:
-        print("Error: Either GITHUB_ORG or GITHUB_ORGS environment variable must be set")
+        # Check for GITHUB_ORGS (multi-org) or GITHUB_ORG (single org, backward compatible)
+        orgs_env = os.environ.get('GITHUB_ORGS', '').strip()
+        org_env = os.environ.get('GITHUB_ORG', '').strip()
+        
+        if orgs_env:
+            # Multi-org mode: GITHUB_ORGS is set
+            org_names = [validate_org_name(org.strip()) for org in orgs_env.split(',') if org.strip()]
+            if not org_names:
+                print("Error: GITHUB_ORGS is set but contains no valid organization names")
+                sys.exit(1)
+            use_multi_org_format = True
+        elif org_env:
+            # Single org mode: GITHUB_ORG is set (backward compatible)
+            org_names = [validate_org_name(org_env)]
+            use_multi_org_format = False
+        else:
+            print("Error: Either GITHUB_ORG or GITHUB_ORGS environment variable must be set")
+            sys.exit(1)
+    
+    # Repository listing cache, only used when SPARTA_CACHE_DIR is set (validate path)
+    cache_dir_env = os.environ.get('SPARTA_CACHE_DIR', '').strip()
+    try:
+        cache_dir = sanitize_path(cache_dir_env, Path.cwd()) if cache_dir_env else None
+    except ValueError as e:
+        print(f"Error: Invalid SPARTA_CACHE_DIR: {e}")
         sys.exit(1)
     
     try:
@@ -99,17 +339,26 @@ def main():
             total_repos = 0
             failed_orgs = []
             
-            for org_name in org_names:
-                # Get token for this org
-                org_token = get_token_for_org(org_name, token_map, installation_token)
-                
+            # Organizations are fetched concurrently over one shared session;
+            # results are handled in the order the organizations were given
+            print(f"Fetching repositories for organization(s): {', '.join(org_names)}")
+            session = get_session()
+            with ThreadPoolExecutor(max_workers=min(ORG_FETCH_WORKERS, len(org_names))) as executor:
+                futures = [
+                    (org_name, executor.submit(
+                        get_org_repos,
+                        org_name,
+                        get_token_for_org(org_name, token_map, installation_token),
+                        tokens_to_sanitize,
+                        session,
+                        cache_dir
+                    ))
+                    for org_name in org_names
+                ]
+            
+            for org_name, future in futures:
                 try:
-                    # Create GitHub client with org-specific token
-                    token_auth = Token(org_token)
-                    g = Github(auth=token_auth)
-                    
-                    print(f"Fetching repositories for organization: {org_name}")
-                    repos = get_org_repos(org_name, g, tokens_to_sanitize)
+                    repos = future.result()
                     org_repos_list.append({
                         'org': org_name,
                         'repos': repos
@@ -136,34 +385,37 @@ def main():
             # Save repos list to file (validate path)
             base_dir = Path.cwd()
             repos_file = sanitize_path('repos.json', base_dir)
-            with open(repos_file, 'w') as f:
-                json.dump(org_repos_list, f, indent=2)
+            write_repos_file(
+                repos_file,
+                org_repos_list,
+                [(org_data['org'], org_data['repos']) for org_data in org_repos_list]
+            )
             
             # Set output
             github_output = os.environ.get('GITHUB_OUTPUT', '/dev/stdout')
             with open(github_output, 'a') as f:
-                f.write(f"count={total_repos}\n")
-                f.write(f"orgs={len(org_repos_list)}\n")
+                f.write(f"count={total_repos}\norgs={len(org_repos_list)}\n")
+            
+            return org_repos_list
         else:
             # Single org format: backward compatible (array of repos)
             org_name = org_names[0]
             # Use default token for single org mode
-            token_auth = Token(installation_token)
-            g = Github(auth=token_auth)
-            repos = get_org_repos(org_name, g, tokens_to_sanitize)
+            repos = get_org_repos(org_name, installation_token, tokens_to_sanitize, get_session(), cache_dir)
             
             print(f"Found {len(repos)} repositories")
             
             # Save repos list to file (validate path)
             base_dir = Path.cwd()
             repos_file = sanitize_path('repos.json', base_dir)
-            with open(repos_file, 'w') as f:
-                json.dump(repos, f, indent=2)
+            write_repos_file(repos_file, repos, [(org_name, repos)])
             
             # Set output (using new format)
             github_output = os.environ.get('GITHUB_OUTPUT', '/dev/stdout')
             with open(github_output, 'a') as f:
                 f.write(f"count={len(repos)}\n")
+            
+            return repos
     except Exception as e:
         error_msg = sanitize_error_message(str(e), tokens_to_sanitize)
         print(f"Error: {error_msg}")
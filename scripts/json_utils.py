@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+JSON helper functions for Sparta project.
+
+Uses orjson when it is installed and falls back to the standard library
+json module otherwise, so every script keeps working without it.
+
+Provides:
+- Fast JSON parsing from bytes or files
+- JSON serialization to bytes or files (compact or indented); dataclass
+  instances are serialized as objects with either backend
+- Newline-delimited JSON (one document per line) reading and writing
+"""
+
+import dataclasses
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can
+# catch this regardless of which parser is active
+JSONDecodeError = json.JSONDecodeError
+
+# Files at least this large are memory-mapped and parsed in place rather
+# than copied into a bytes object first (only when orjson is available,
+# since the stdlib parser cannot read from a memoryview)
+MMAP_MIN_SIZE = 32 * 1024 * 1024
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Parse a JSON document.
+
+    Args:
+        data: JSON document as bytes or str
+
+    Returns:
+        Parsed Python object
+
+    Raises:
+        JSONDecodeError: If the document is not valid JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    """
+    Read and parse a JSON file.
+
+    The file is read as bytes in one call so the parser works on a single
+    buffer without a text decoding pass. Large files are memory-mapped
+    instead, so orjson parses straight from the page cache.
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        Parsed Python object
+
+    Raises:
+        JSONDecodeError: If the file is not valid JSON
+        OSError: If the file cannot be read
+    """
+    with open(path, 'rb') as f:
+        if ORJSON_AVAILABLE and os.fstat(f.fileno()).st_size >= MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+        return loads(f.read())
+
+
+def _default(obj: Any) -> Any:
+    """Serialize dataclass instances for the stdlib encoder, as orjson does."""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to JSON.
+
+    Args:
+        obj: JSON-serializable object
+        indent: Pretty-print with a two-space indent instead of compact output
+
+    Returns:
+        UTF-8 encoded JSON document
+
+    Raises:
+        TypeError: If the object is not JSON serializable
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(obj, indent=2, default=_default).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def dump_file(obj: Any, path: Union[str, Path], indent: bool = False) -> None:
+    """
+    Serialize an object to a JSON file.
+
+    The document is serialized to a single bytes buffer and written with
+    one write() call.
+
+    Args:
+        obj: JSON-serializable object
+        path: Destination file path
+        indent: Pretty-print with a two-space indent instead of compact output
+
+    Raises:
+        TypeError: If the object is not JSON serializable
+        OSError: If the file cannot be written
+    """
+    data = dumps(obj, indent=indent)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def iter_ndjson(path: Union[str, Path]) -> Iterator[Any]:
+    """
+    Parse a newline-delimited JSON file one line at a time.
+
+    Only one line is held in memory at a time; blank lines are skipped.
+
+    Args:
+        path: Path to the NDJSON file
+
+    Yields:
+        Parsed Python object for each line
+
+    Raises:
+        JSONDecodeError: If a line is not valid JSON
+        OSError: If the file cannot be read
+    """
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def dump_ndjson(objs: Iterable[Any], path: Union[str, Path]) -> None:
+    """
+    Serialize objects to a newline-delimited JSON file, one per line.
+
+    Args:
+        objs: JSON-serializable objects
+        path: Destination file path
+
+    Raises:
+        TypeError: If an object is not JSON serializable
+        OSError: If the file cannot be written
+    """
+    with open(path, 'wb') as f:
+        for obj in objs:
+            f.write(dumps(obj) + b'\n')
@@ -13,8 +13,9 @@ This script handles the complete scanning workflow:
 
 import os
 import sys
-import json
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
 from pathlib import Path
 from typing import List, Dict, Optional
 
@@ -22,8 +23,29 @@ from typing import List, Dict, Optional
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Import modules (will import as needed to avoid circular dependencies)
-from token_manager import generate_tokens_for_orgs, get_token_for_org
-from batch_repos import split_into_batches
+from json_utils import load_file as load_json_file
+from security_utils import compile_token_sanitizer, sanitize_error_message
+from repos_file import count_org_repos, is_ndjson_file
+
+
+# Batches scanned at the same time by default; kept low to stay clear of
+# GitHub secondary rate limits while cloning
+DEFAULT_PARALLEL_BATCHES = min(4, os.cpu_count() or 1)
+
+BANNER_RULE = '=' * 60
+
+
+def print_banner(title: str, *lines: str, blank_line: bool = True) -> None:
+    """
+    Print a section banner with a single write to stdout.
+    
+    Args:
+        title: Banner title
+        *lines: Extra lines printed below the title
+        blank_line: Print an empty line after the closing rule
+    """
+    text = '\n'.join(['', BANNER_RULE, title, *lines, BANNER_RULE, ''])
+    sys.stdout.write(text + '\n' if blank_line else text)
 
 
 def parse_orgs(orgs_input: Optional[str], repository_owner: Optional[str] = None) -> List[str]:
@@ -54,36 +76,61 @@ def detect_scan_mode(orgs: List[str]) -> str:
     return 'multi-org' if len(orgs) > 1 else 'single-org'
 
 
+# Smallest serialized size of one repository entry ('{"name":"a"}'), used
+# to rule out batching from the file size alone
+MIN_REPO_ENTRY_BYTES = 12
+
+
 def needs_batching(repos_file: Path, threshold: int = 500) -> bool:
     """Check if batching is needed based on repository count."""
     try:
-        with open(repos_file, 'r') as f:
-            repos_data = json.load(f)
+        # A file too small to hold more than `threshold` entries cannot need
+        # batching, so skip parsing it
+        if Path(repos_file).stat().st_size <= (threshold + 1) * MIN_REPO_ENTRY_BYTES:
+            return False
         
-        # Check if multi-org format
-        is_multi_org = (
-            isinstance(repos_data, list) and 
-            len(repos_data) > 0 and 
-            isinstance(repos_data[0], dict) and 
-            'org' in repos_data[0] and 
-            'repos' in repos_data[0]
-        )
+        # NDJSON repos files are counted line by line instead of loaded whole
+        if is_ndjson_file(repos_file):
+            return any(count > threshold for count in count_org_repos(repos_file).values())
         
-        if is_multi_org:
-            # Check if any org has more than threshold repos
-            for org_data in repos_data:
-                if len(org_data.get('repos', [])) > threshold:
-                    return True
-            return False
-        else:
-            # Single org format
-            repos = repos_data if isinstance(repos_data, list) else []
-            return len(repos) > threshold
+        return repos_need_batching(load_json_file(repos_file), threshold)
     except Exception as e:
         print(f"Warning: Could not determine batching needs: {e}")
         return False
 
 
+def repos_need_batching(repos_data: List, threshold: int = 500) -> bool:
+    """
+    Check if a repository listing needs batching based on repository count.
+    
+    Args:
+        repos_data: Listing in repos.json form, or as returned by get_repos.main()
+        threshold: Maximum number of repositories per organization scanned without batching
+    
+    Returns:
+        True if any organization has more than threshold repositories
+    """
+    # Check if multi-org format
+    is_multi_org = (
+        isinstance(repos_data, list) and 
+        len(repos_data) > 0 and 
+        isinstance(repos_data[0], dict) and 
+        'org' in repos_data[0] and 
+        'repos' in repos_data[0]
+    )
+    
+    if is_multi_org:
+        # Check if any org has more than threshold repos
+        for org_data in repos_data:
+            if len(org_data.get('repos', [])) > threshold:
+                return True
+        return False
+    else:
+        # Single org format
+        repos = repos_data if isinstance(repos_data, list) else []
+        return len(repos) > threshold
+
+
 def normalize_org_name_for_secret(org_name: str) -> str:
     """
     Normalize organization name for use in secret names.
@@ -142,9 +189,7 @@ def generate_tokens(
     org_credentials_map: Optional[Dict[str, Dict[str, str]]] = None
 ) -> Dict[str, str]:
     """Generate tokens for organizations."""
-    print(f"\n{'='*60}")
-    print("Generating GitHub App tokens")
-    print(f"{'='*60}")
+    print_banner("Generating GitHub App tokens", blank_line=False)
     
     if org_credentials_map:
         orgs_with_custom = [org for org in orgs if org in org_credentials_map]
@@ -154,6 +199,10 @@ def generate_tokens(
         if orgs_with_default:
             print(f"Using default credentials for: {', '.join(orgs_with_default)}")
     
+    # Deferred: token_manager pulls in jwt/cryptography and requests; it
+    # also reuses tokens cached by an earlier step (SPARTA_TOKEN_CACHE)
+    from token_manager import generate_tokens_for_orgs
+    
     token_map = generate_tokens_for_orgs(
         orgs, app_id, private_key, fallback_token, org_credentials_map
     )
@@ -165,12 +214,151 @@ def generate_tokens(
     return token_map
 
 
+def repos_as_dicts(repos_data: List) -> List[Dict]:
+    """
+    Convert repository data returned by get_repos.main() to plain dictionaries.
+    
+    Args:
+        repos_data: Single-org list of RepoRecord entries, or multi-org list
+            of {'org': ..., 'repos': [...]} objects
+    
+    Returns:
+        The same data in the form scan_repos reads from repos.json
+    """
+    return [
+        {'org': entry['org'], 'repos': [asdict(repo) for repo in entry['repos']]}
+        if isinstance(entry, dict) else asdict(entry)
+        for entry in repos_data
+    ]
+
+
+def scan_batches(batches: List[Dict], default_org: str, parallel_batches: int = 1, **scan_kwargs) -> List[Dict]:
+    """
+    Scan repository batches, in separate worker processes when parallel_batches > 1.
+    
+    A batch that fails is reported and skipped; the remaining batches still run.
+    
+    Args:
+        batches: Batch dictionaries as returned by batch_repos.main()
+        default_org: Organization for batches without an 'org' field (single-org batches)
+        parallel_batches: Maximum number of batches scanned at the same time
+        **scan_kwargs: Additional keyword arguments for scan_repos.main()
+    
+    Returns:
+        Per-organization summaries from scan_repos.main() for every batch that finished
+    """
+    import scan_repos
+    
+    # Batch failures are reported as one sanitized line; tracebacks are
+    # kept for top-level failures only
+    token_map = scan_kwargs.get('token_map') or {}
+    tokens_to_sanitize = compile_token_sanitizer([*token_map.values(), scan_kwargs.get('fallback_token')])
+    
+    def report_batch_error(batch_id, e):
+        error_msg = sanitize_error_message(str(e), tokens_to_sanitize)
+        print(f"Error scanning batch {batch_id}: {type(e).__name__}: {error_msg}", file=sys.stderr)
+    
+    summaries = []
+    workers = min(parallel_batches, len(batches))
+    prepared_db = None
+    if workers > 1:
+        # Downloaded once for every worker (see scan_repos.get_trivy_cache_dir)
+        prepared_db = scan_repos.prepare_trivy_db()
+        if not prepared_db[0] and not os.environ.get('TRIVY_SERVER'):
+            print("Warning: Trivy database not downloaded, scanning batches one at a time")
+            workers = 1
+    
+    if workers <= 1:
+        print(f"Processing {len(batches)} batch(es) sequentially...\n")
+        for batch in batches:
+            batch_id = batch.get('batch_id', 'unknown')
+            org_name = batch.get('org') or default_org
+            repos = batch.get('repos', [])
+            
+            print_banner(
+                f"Processing batch: {batch_id}",
+                f"Organization: {org_name}",
+                f"Repositories: {len(repos)}"
+            )
+            
+            try:
+                summaries.extend(scan_repos.main(repos=repos, org=org_name, batch_id=batch_id, **scan_kwargs))
+            except Exception as e:
+                # Continue with next batch instead of failing completely
+                report_batch_error(batch_id, e)
+        return summaries
+    
+    # SCAN_CONCURRENCY bounds the scans running at once across all workers,
+    # so each worker gets its share instead of a full thread pool
+    scan_concurrency = scan_kwargs.pop('scan_concurrency', None) or int(
+        os.environ.get('SCAN_CONCURRENCY', scan_repos.DEFAULT_SCAN_CONCURRENCY)
+    )
+    scan_kwargs['scan_concurrency'] = max(1, scan_concurrency // workers)
+    
+    print(f"Processing {len(batches)} batch(es) with {workers} parallel worker(s), "
+          f"{scan_kwargs['scan_concurrency']} concurrent scan(s) each...\n")
+    
+    # The current repository is scanned in place ('.'), where it would pick
+    # up the clones other workers create in the working directory, so it is
+    # scanned here before any worker starts and left out of the batch
+    # handed to the pool
+    current_repo = os.environ.get('GITHUB_REPOSITORY', '')
+    pool_batches = []
+    scan_repos.use_prepared_trivy_db(prepared_db)
+    try:
+        for batch in batches:
+            repos = batch.get('repos', [])
+            other_repos = [repo for repo in repos if repo.get('full_name') != current_repo]
+            if current_repo and len(other_repos) < len(repos):
+                batch_id = batch.get('batch_id', 'unknown')
+                current = [repo for repo in repos if repo.get('full_name') == current_repo]
+                try:
+                    summaries.extend(scan_repos.main(
+                        repos=current, org=batch.get('org') or default_org, batch_id=batch_id, **scan_kwargs
+                    ))
+                except Exception as e:
+                    report_batch_error(batch_id, e)
+                batch = {**batch, 'repos': other_repos}
+            if batch.get('repos'):
+                pool_batches.append(batch)
+    finally:
+        scan_repos.use_prepared_trivy_db(None)
+    
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=scan_repos.use_prepared_trivy_db,
+        initargs=(prepared_db,)
+    ) as executor:
+        futures = {}
+        for batch in pool_batches:
+            batch_id = batch.get('batch_id', 'unknown')
+            org_name = batch.get('org') or default_org
+            repos = batch.get('repos', [])
+            print(f"Queued batch {batch_id} ({org_name}, {len(repos)} repositories)")
+            future = executor.submit(
+                scan_repos.main, repos=repos, org=org_name, batch_id=batch_id, **scan_kwargs
+            )
+            futures[future] = batch_id
+        
+        for future in as_completed(futures):
+            batch_id = futures[future]
+            try:
+                summaries.extend(future.result())
+                print(f"✓ Batch {batch_id} finished")
+            except Exception as e:
+                # Continue with the other batches instead of failing completely
+                report_batch_error(batch_id, e)
+    
+    return summaries
+
+
 def main():
     """Main orchestration function."""
     parser = argparse.ArgumentParser(description='Orchestrate organization vulnerability scanning')
     parser.add_argument('--orgs', type=str, help='Comma-separated list of organizations (defaults to GITHUB_ORG/GITHUB_ORGS or repository owner)')
     parser.add_argument('--batch-size', type=int, default=100, help='Batch size for parallel processing (default: 100)')
     parser.add_argument('--max-retries', type=int, default=3, help='Maximum retry attempts (default: 3)')
+    parser.add_argument('--parallel-batches', type=int, default=DEFAULT_PARALLEL_BATCHES, help=f'Maximum number of batches scanned in parallel (default: {DEFAULT_PARALLEL_BATCHES})')
     parser.add_argument('--app-id', type=str, help='GitHub App ID (defaults to SPARTA_APP_ID env var)')
     parser.add_argument('--app-private-key', type=str, help='GitHub App private key (defaults to SPARTA_APP_PRIVATE_KEY env var)')
     parser.add_argument('--skip-commit', action='store_true', help='Skip committing results')
@@ -179,7 +367,8 @@ def main():
     args = parser.parse_args()
     
     # Get repository owner from environment
-    repository_owner = os.environ.get('GITHUB_REPOSITORY', '').split('/')[0] if os.environ.get('GITHUB_REPOSITORY') else None
+    github_repository = os.environ.get('GITHUB_REPOSITORY', '')
+    repository_owner = github_repository.split('/')[0] if github_repository else None
     
     # Parse organizations
     try:
@@ -188,14 +377,15 @@ def main():
         print(f"Error: {e}")
         sys.exit(1)
     
-    print(f"\n{'='*60}")
-    print("Sparta - Organization Vulnerability Scan")
-    print(f"{'='*60}")
-    print(f"Organizations: {', '.join(orgs)}")
-    print(f"Mode: {detect_scan_mode(orgs)}")
-    print(f"Batch size: {args.batch_size}")
-    print(f"Max retries: {args.max_retries}")
-    print(f"{'='*60}\n")
+    print_banner(
+        "Sparta - Organization Vulnerability Scan",
+        BANNER_RULE,
+        f"Organizations: {', '.join(orgs)}",
+        f"Mode: {detect_scan_mode(orgs)}",
+        f"Batch size: {args.batch_size}",
+        f"Max retries: {args.max_retries}",
+        f"Parallel batches: {args.parallel_batches}"
+    )
     
     # Get default GitHub App credentials
     app_id = args.app_id or os.environ.get('SPARTA_APP_ID', '')
@@ -221,28 +411,21 @@ def main():
         print(f"Error generating tokens: {e}")
         sys.exit(1)
     
-    # Set environment variables for get_repos
-    os.environ['GITHUB_APP_TOKEN'] = fallback_token or list(token_map.values())[0]
-    os.environ['GITHUB_APP_TOKEN_MAP'] = json.dumps(token_map)
-    
-    if len(orgs) > 1:
-        os.environ['GITHUB_ORGS'] = ','.join(orgs)
-        if 'GITHUB_ORG' in os.environ:
-            del os.environ['GITHUB_ORG']
-    else:
-        os.environ['GITHUB_ORG'] = orgs[0]
-        if 'GITHUB_ORGS' in os.environ:
-            del os.environ['GITHUB_ORGS']
+    # Default token for orgs without their own token, also used for the push
+    default_token = fallback_token or next(iter(token_map.values()))
     
     # Get repositories
-    print(f"\n{'='*60}")
-    print("Getting organization repositories")
-    print(f"{'='*60}\n")
+    print_banner("Getting organization repositories")
     
     try:
         # Import and call get_repos
         import get_repos
-        get_repos.main()
+        repos_data = get_repos.main(
+            org_names=orgs,
+            token_map=token_map,
+            fallback_token=default_token,
+            multi=len(orgs) > 1
+        )
     except Exception as e:
         print(f"Error getting repositories: {e}")
         import traceback
@@ -255,96 +438,57 @@ def main():
         print("Error: repos.json was not created")
         sys.exit(1)
     
-    # Detect batching needs
-    batch_needed = needs_batching(repos_file, threshold=500)
+    # Detect batching needs from the listing still in memory
+    batch_needed = repos_need_batching(repos_data, threshold=500)
     
     # Handle batching if needed
     if batch_needed:
-        print(f"\n{'='*60}")
-        print("Batching enabled (large organization detected)")
-        print(f"{'='*60}\n")
-        
-        # Set batch size
-        os.environ['BATCH_SIZE'] = str(args.batch_size)
+        print_banner("Batching enabled (large organization detected)")
         
         # Import and run batch_repos to create batch files
         try:
             import batch_repos
-            batch_repos.main()
+            batches = batch_repos.main(batch_size=args.batch_size)
         except Exception as e:
             print(f"Error creating batches: {e}")
             import traceback
             traceback.print_exc()
             sys.exit(1)
         
-        # For batching, we'll process batches sequentially
-        # (For true parallel execution, use GitHub Actions matrix strategy)
-        batch_file = Path('repo-batches.json')
-        if batch_file.exists():
-            with open(batch_file, 'r') as f:
-                batches = json.load(f)
-            
-            print(f"Processing {len(batches)} batch(es) sequentially...\n")
-            
-            # Process each batch
-            for batch in batches:
-                batch_id = batch.get('batch_id', 'unknown')
-                org_name = batch.get('org', '')
-                batch_repos = batch.get('repos', [])
-                
-                print(f"\n{'='*60}")
-                print(f"Processing batch: {batch_id}")
-                print(f"Organization: {org_name}")
-                print(f"Repositories: {len(batch_repos)}")
-                print(f"{'='*60}\n")
-                
-                # Create temporary repos.json for this batch
-                with open('repos.json', 'w') as f:
-                    json.dump(batch_repos, f, indent=2)
-                
-                # Set org environment for this batch
-                if org_name:
-                    os.environ['GITHUB_ORG'] = org_name
-                    if 'GITHUB_ORGS' in os.environ:
-                        del os.environ['GITHUB_ORGS']
-                
-                # Scan this batch
-                try:
-                    import scan_repos
-                    scan_repos.main()
-                except Exception as e:
-                    print(f"Error scanning batch {batch_id}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    # Continue with next batch instead of failing completely
-                    continue
-            
-            # Restore original repos.json (for commit-results)
-            # Re-run get_repos to restore full repos.json
-            try:
-                import get_repos
-                get_repos.main()
-            except Exception as e:
-                print(f"Warning: Could not restore repos.json: {e}")
+        # Batches run in worker processes within this job
+        # (For distributing across runners, use GitHub Actions matrix strategy)
+        if batches:
+            summaries = scan_batches(
+                batches,
+                orgs[0],
+                args.parallel_batches,
+                token_map=token_map,
+                fallback_token=default_token,
+                max_retries=args.max_retries,
+                batch_size=args.batch_size
+            )
+            scanned = sum(summary['scanned'] for summary in summaries)
+            failed = sum(summary['failed'] for summary in summaries)
+            print(f"\nScanned {scanned} repositories across {len(batches)} batch(es), {failed} failed")
         
         # Skip the regular scan since we already scanned batches
-        print(f"\n{'='*60}")
-        print("Batch scanning complete")
-        print(f"{'='*60}\n")
-    
-    # Set max retries
-    os.environ['MAX_RETRIES'] = str(args.max_retries)
+        print_banner("Batch scanning complete")
     
     # Run scans (only if not already done via batching)
     if not batch_needed:
-        print(f"\n{'='*60}")
-        print("Scanning repositories")
-        print(f"{'='*60}\n")
+        print_banner("Scanning repositories")
         
         try:
             # Import and call scan_repos
             import scan_repos
-            scan_repos.main()
+            # The listing is still in memory, so repos.json is not read back
+            scan_repos.main(
+                repos=repos_as_dicts(repos_data),
+                org=orgs[0] if len(orgs) == 1 else None,
+                token_map=token_map,
+                fallback_token=default_token,
+                max_retries=args.max_retries
+            )
         except Exception as e:
             print(f"Error during scanning: {e}")
             import traceback
@@ -353,23 +497,19 @@ def main():
     
     # Commit results
     if not args.skip_commit:
-        print(f"\n{'='*60}")
-        print("Committing scan results")
-        print(f"{'='*60}\n")
+        print_banner("Committing scan results")
         
         try:
             # Import and call commit_results
             import commit_results
-            commit_results.main()
+            commit_results.main(installation_token=default_token)
         except Exception as e:
             print(f"Error committing results: {e}")
             import traceback
             traceback.print_exc()
             sys.exit(1)
     
-    print(f"\n{'='*60}")
-    print("Scan orchestration complete!")
-    print(f"{'='*60}\n")
+    print_banner("Scan orchestration complete!")
     
     return 0
 
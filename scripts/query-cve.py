@@ -9,10 +9,13 @@ Usage:
 """
 
 import argparse
-import json
+import mmap
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 # Import security utilities
@@ -20,15 +23,138 @@ try:
     from security_utils import validate_cve_id, sanitize_path
 except ImportError:
     # Fallback if running from different directory
-    import os
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from security_utils import validate_cve_id, sanitize_path
 
+from json_utils import (
+    JSONDecodeError, dump_file as dump_json_file, dumps as dumps_json,
+    load_file as load_json_file, loads
+)
+from build_cve_index import get_index_file, query_index, report_fingerprint
+from report_files import iter_report_entries, report_metadata
+
+
+# Reports are searched by a thread pool once there are enough of them to
+# make up for starting it
+PARALLEL_SEARCH_THRESHOLD = 64
+SEARCH_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+# Reports at least this large are memory-mapped for the byte search
+# instead of being read into memory up front
+REPORT_MMAP_MIN_SIZE = 10 * 1024 * 1024
+
+
+def load_report_if_mentions(report_file: str, cve_id: str) -> Optional[Any]:
+    """
+    Parse a report only if its raw bytes contain a CVE identifier.
+    
+    Reports below REPORT_MMAP_MIN_SIZE are read once and the same buffer
+    is searched and then parsed; larger ones are memory-mapped for the
+    search and only read in full when they match. Either way, reports
+    that cannot match are skipped without being decoded.
+    
+    Args:
+        report_file: Path to a trivy-report.json file
+        cve_id: CVE identifier (e.g., 'CVE-2024-1234')
+        
+    Returns:
+        Parsed report, or None if the identifier does not appear in the file
+        
+    Raises:
+        JSONDecodeError: If a matching report is not valid JSON
+        OSError: If the report cannot be read
+    """
+    needle = cve_id.encode('ascii')
+    with open(report_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return None
+        if size < REPORT_MMAP_MIN_SIZE:
+            data = f.read()
+            return loads(data) if needle in data else None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(needle) == -1:
+                return None
+    return load_json_file(report_file)
+
+
+def build_finding(vuln: Dict[str, Any], cve_id: str, org: str, repo: str, scan_date: str) -> Dict[str, Any]:
+    """
+    Build a finding entry from a Trivy vulnerability.
+    
+    Args:
+        vuln: Vulnerability entry from a Trivy report
+        cve_id: CVE identifier
+        org: Organization name
+        repo: Repository name
+        scan_date: Scan date from the report path
+        
+    Returns:
+        Finding dictionary
+    """
+    return {
+        'cve': cve_id,
+        'repository': f"{org}/{repo}",
+        'org': org,
+        'repo': repo,
+        'scan_date': scan_date,
+        'severity': vuln.get('Severity', 'UNKNOWN'),
+        'package': vuln.get('PkgName', 'unknown'),
+        'package_version': vuln.get('InstalledVersion', 'unknown'),
+        'title': vuln.get('Title', ''),
+        'description': vuln.get('Description', ''),
+        'fixed_version': vuln.get('FixedVersion', ''),
+        'published_date': vuln.get('PublishedDate', ''),
+        'last_modified_date': vuln.get('LastModifiedDate', ''),
+    }
+
+
+def search_report(report_file: str, cve_id: str) -> List[Dict[str, Any]]:
+    """
+    Search one Trivy report for a CVE.
+    
+    Args:
+        report_file: Path to a trivy-report.json file
+        cve_id: CVE identifier (e.g., 'CVE-2024-1234')
+        
+    Returns:
+        Findings for the CVE in this report (empty if the report cannot be read)
+    """
+    findings = []
+    try:
+        report_data = load_report_if_mentions(report_file, cve_id)
+        
+        # Skip reports without the CVE and error reports
+        if report_data is None or 'error' in report_data:
+            return findings
+        
+        # Path format: vulnerability-reports/{org}/{repo}/{date}/trivy-report.json
+        org, repo, scan_date = report_metadata(report_file)
+        
+        # Search for CVE in results
+        for result in report_data.get('Results') or []:
+            for vuln in result.get('Vulnerabilities') or []:
+                if vuln.get('VulnerabilityID') == cve_id:
+                    findings.append(build_finding(vuln, cve_id, org, repo, scan_date))
+    
+    except JSONDecodeError as e:
+        print(f"Warning: Failed to parse {report_file}: {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"Warning: Error processing {report_file}: {e}", file=sys.stderr)
+    
+    return findings
+
 
 def find_cve_in_reports(cve_id: str, reports_dir: Path) -> List[Dict[str, Any]]:
     """
     Search for a CVE across all Trivy scan reports.
     
+    When the reports directory has a CVE index (see build_cve_index.py)
+    built from the current reports, the lookup is answered from it. An
+    index the reports have changed since is ignored. Otherwise only
+    reports whose raw bytes contain the CVE identifier are parsed; since
+    a given CVE appears in few reports, most files are never decoded.
+    
     Args:
         cve_id: CVE identifier (e.g., 'CVE-2024-1234')
         reports_dir: Directory containing vulnerability reports
@@ -42,57 +168,24 @@ def find_cve_in_reports(cve_id: str, reports_dir: Path) -> List[Dict[str, Any]]:
         print(f"Error: Reports directory '{reports_dir}' does not exist", file=sys.stderr)
         return findings
     
-    # Walk through all report files
-    for report_file in reports_dir.rglob('trivy-report.json'):
-        try:
-            with open(report_file, 'r') as f:
-                report_data = json.load(f)
-            
-            # Extract repository info from path
-            # Path format: vulnerability-reports/{org}/{repo}/{date}/trivy-report.json
-            parts = report_file.parts
-            if len(parts) >= 4:
-                org = parts[-4] if len(parts) >= 4 else 'unknown'
-                repo = parts[-3] if len(parts) >= 3 else 'unknown'
-                scan_date = parts[-2] if len(parts) >= 2 else 'unknown'
-            else:
-                org = 'unknown'
-                repo = 'unknown'
-                scan_date = 'unknown'
-            
-            # Check if report has error
-            if 'error' in report_data:
-                continue
-            
-            # Search for CVE in results
-            if 'Results' in report_data:
-                for result in report_data.get('Results', []):
-                    if 'Vulnerabilities' in result:
-                        for vuln in result['Vulnerabilities']:
-                            if vuln.get('VulnerabilityID') == cve_id:
-                                finding = {
-                                    'cve': cve_id,
-                                    'repository': f"{org}/{repo}",
-                                    'org': org,
-                                    'repo': repo,
-                                    'scan_date': scan_date,
-                                    'severity': vuln.get('Severity', 'UNKNOWN'),
-                                    'package': vuln.get('PkgName', 'unknown'),
-                                    'package_version': vuln.get('InstalledVersion', 'unknown'),
-                                    'title': vuln.get('Title', ''),
-                                    'description': vuln.get('Description', ''),
-                                    'fixed_version': vuln.get('FixedVersion', ''),
-                                    'published_date': vuln.get('PublishedDate', ''),
-                                    'last_modified_date': vuln.get('LastModifiedDate', ''),
-                                }
-                                findings.append(finding)
-        
-        except json.JSONDecodeError as e:
-            print(f"Warning: Failed to parse {report_file}: {e}", file=sys.stderr)
-            continue
-        except Exception as e:
-            print(f"Warning: Error processing {report_file}: {e}", file=sys.stderr)
-            continue
+    entries = list(iter_report_entries(str(reports_dir)))
+    index_file = get_index_file(reports_dir)
+    if index_file.is_file():
+        indexed = query_index(index_file, cve_id, report_fingerprint(entries))
+        if indexed is not None:
+            return indexed
+    
+    report_files = [entry.path for entry in entries]
+    if len(report_files) < PARALLEL_SEARCH_THRESHOLD:
+        for report_file in report_files:
+            findings.extend(search_report(report_file, cve_id))
+        return findings
+    
+    # Reading the reports is mostly I/O, so threads overlap the reads;
+    # map() keeps the findings in walk order
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        for report_findings in executor.map(search_report, report_files, repeat(cve_id)):
+            findings.extend(report_findings)
     
     return findings
 
@@ -109,7 +202,7 @@ def format_output(findings: List[Dict[str, Any]], output_format: str = 'table')
         Formatted string
     """
     if output_format == 'json':
-        return json.dumps(findings, indent=2)
+        return dumps_json(findings, indent=True).decode('utf-8')
     
     # Table format
     if not findings:
@@ -151,8 +244,6 @@ def format_output(findings: List[Dict[str, Any]], output_format: str = 'table')
 
 
 def main():
-    import os
-    
     parser = argparse.ArgumentParser(
         description='Query CVEs across all stored Trivy scan results',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -232,8 +323,7 @@ Examples:
     try:
         with open('cve-query-results.txt', 'w') as f:
             f.write(output)
-        with open('cve-query-results.json', 'w') as f:
-            json.dump(findings, f, indent=2)
+        dump_json_file(findings, 'cve-query-results.json', indent=True)
     except Exception as e:
         print(f"Warning: Failed to write result files: {e}", file=sys.stderr)
     
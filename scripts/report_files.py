@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Discovery of stored Trivy reports.
+
+Reports live at vulnerability-reports/{org}/{repo}/{date}/trivy-report.json;
+these helpers walk that tree and read the org, repository and scan date
+back from a report path.
+"""
+
+import os
+import sys
+from typing import Iterator, Tuple
+
+REPORT_FILE_NAME = 'trivy-report.json'
+
+
+def iter_report_entries(path: str) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield trivy-report.json entries below a directory.
+    
+    Uses os.scandir() so file type checks come from the cached DirEntry
+    metadata instead of an extra stat() per entry (as Path.rglob does).
+    Like Path.rglob, symlinked report files are yielded but symlinked
+    directories are not descended into.
+    
+    Args:
+        path: Directory to walk
+        
+    Yields:
+        DirEntry objects for each trivy-report.json file
+    """
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from iter_report_entries(entry.path)
+                elif entry.name == REPORT_FILE_NAME and entry.is_file():
+                    yield entry
+    except OSError as e:
+        print(f"Warning: Cannot read directory {path}: {e}", file=sys.stderr)
+
+
+def report_metadata(report_file: str) -> Tuple[str, str, str]:
+    """
+    Extract org, repo and scan date from a report path.
+    
+    Path format: .../{org}/{repo}/{date}/trivy-report.json
+    
+    Args:
+        report_file: Path to a trivy-report.json file
+        
+    Returns:
+        Tuple of (org, repo, scan_date)
+    """
+    # Only the last four components are needed, so the directories above
+    # the reports tree are never split apart
+    parts = report_file.rsplit(os.sep, 4)
+    if len(parts) >= 4:
+        return parts[-4], parts[-3], parts[-2]
+    return 'unknown', 'unknown', 'unknown'
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Helpers for reading repos.json in either of its formats.
+
+repos.json is normally a JSON array in single-org or multi-org format.
+When SPARTA_REPOS_NDJSON is set, get_repos writes newline-delimited JSON
+instead: one repository object per line, each with an "org" field, with
+the lines of an organization kept together. Consumers read both formats
+through these helpers.
+"""
+
+import os
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+from json_utils import iter_ndjson, load_file as load_json_file
+
+# Environment variable that switches get_repos to NDJSON output
+NDJSON_ENV_VAR = 'SPARTA_REPOS_NDJSON'
+
+
+def ndjson_enabled() -> bool:
+    """Return True if repos.json should be written as NDJSON."""
+    return os.environ.get(NDJSON_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def is_ndjson_file(path: Union[str, Path]) -> bool:
+    """
+    Detect whether a repos file is NDJSON rather than a JSON array.
+
+    Args:
+        path: Path to the repos file
+
+    Returns:
+        True if the first non-whitespace character opens an object
+    """
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(64)
+            if not chunk:
+                return False
+            chunk = chunk.lstrip()
+            if chunk:
+                return chunk[:1] == b'{'
+
+
+def iter_org_repos(path: Union[str, Path]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Read an NDJSON repos file one organization at a time.
+
+    Args:
+        path: Path to the NDJSON repos file
+
+    Yields:
+        Tuple of (org name, list of repository dictionaries without "org")
+    """
+    for org_name, lines in groupby(iter_ndjson(path), key=itemgetter('org')):
+        repos = []
+        for line in lines:
+            del line['org']
+            repos.append(line)
+        yield org_name, repos
+
+
+def count_org_repos(path: Union[str, Path]) -> Counter:
+    """
+    Count repositories per organization in an NDJSON repos file.
+
+    Lines are parsed one at a time, so memory use does not grow with
+    the number of repositories.
+
+    Args:
+        path: Path to the NDJSON repos file
+
+    Returns:
+        Counter mapping org names to repository counts
+    """
+    return Counter(line['org'] for line in iter_ndjson(path))
+
+
+def load_repos_file(path: Union[str, Path]) -> Any:
+    """
+    Load a repos file in either format.
+
+    Args:
+        path: Path to repos.json
+
+    Returns:
+        The JSON array as written, or for NDJSON files the equivalent
+        multi-org list of {"org": ..., "repos": [...]} objects
+    """
+    if is_ndjson_file(path):
+        return [{'org': org_name, 'repos': repos} for org_name, repos in iter_org_repos(path)]
+    return load_json_file(path)
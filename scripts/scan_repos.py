@@ -8,10 +8,14 @@ and saves the results to vulnerability-reports/.
 
 import os
 import json
+import random
 import subprocess
 import shutil
 import sys
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 from datetime import datetime
 
@@ -19,8 +23,11 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from security_utils import (
     sanitize_path, validate_org_name, validate_repo_name,
-    validate_repo_full_name, sanitize_error_message, secure_git_clone
+    validate_repo_full_name, sanitize_error_message, compile_token_sanitizer,
+    secure_git_clone
 )
+from json_utils import JSONDecodeError, dump_file as dump_json_file, load_file as load_json_file
+from repos_file import load_repos_file
 
 # Import scan state management
 try:
@@ -29,8 +36,275 @@ try:
 except ImportError:
     STATE_MANAGEMENT_AVAILABLE = False
 
-def scan_repository(repo, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state=None, retry_count=0):
+# Repositories cloned and scanned at the same time (SCAN_CONCURRENCY env var);
+# the work is in git and trivy subprocesses, so threads are enough. Each
+# scan holds a shallow clone on disk, so this stays small enough for a
+# standard GitHub runner
+DEFAULT_SCAN_CONCURRENCY = 4
+
+# Substrings of clone or scan errors that are worth retrying
+TRANSIENT_ERROR_KEYWORDS = ('timeout', 'network', 'connection', 'rate limit', 'temporary', 'too slow')
+
+# Per-repository record of the inputs of the last successful scan
+LAST_SCAN_FILE = '.last_scan.json'
+
+# Held while printing, so lines from concurrent scans are not spliced together
+_output_lock = threading.Lock()
+
+# Clones are deleted in the background so a scan slot is freed as soon as
+# Trivy finishes; scan_repositories() waits for the deletions before returning
+_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='clone-cleanup')
+_pending_cleanups = []
+
+def log(*args, **kwargs):
+    """Print while holding the output lock; used for all output in this module."""
+    with _output_lock:
+        print(*args, **kwargs)
+
+# (skip_db_update, trivy_db_key) set by use_prepared_trivy_db() for every
+# scan in this process; None means scan_repositories() prepares the database
+_prepared_trivy_db = None
+
+def get_trivy_cache_dir():
+    """
+    Return the Trivy cache directory (TRIVY_CACHE_DIR, or .cache/trivy in the workspace).
+    
+    The directory holds only the vulnerability and Java databases, which
+    download_trivy_db() fetches once per run. Scans then open them
+    read-only (--skip-db-update) and keep their scan cache in memory
+    (--cache-backend memory), so every concurrent scan shares this one
+    directory without taking Trivy's cache lock or copying the databases.
+    """
+    return os.environ.get('TRIVY_CACHE_DIR') or f'{os.environ.get("GITHUB_WORKSPACE", ".")}/.cache/trivy'
+
+def get_clone_base_dir():
+    """
+    Return the directory repositories are cloned into.
+    
+    SPARTA_CLONE_DIR can point clones at a RAM-backed directory (such as
+    /dev/shm or a tmpfs RUNNER_TEMP) so checkouts never reach the disk. The
+    working directory is used when it is unset or not a writable directory.
+    """
+    clone_dir = os.environ.get('SPARTA_CLONE_DIR', '').strip()
+    if clone_dir and os.path.isdir(clone_dir) and os.access(clone_dir, os.W_OK):
+        return Path(clone_dir).resolve()
+    return Path.cwd()
+
+def remove_clone(repo_dir):
+    """Delete a clone directory in the background."""
+    _pending_cleanups.append(_cleanup_executor.submit(shutil.rmtree, repo_dir, ignore_errors=True))
+
+def wait_for_clone_cleanup():
+    """Wait until every clone passed to remove_clone() has been deleted."""
+    while _pending_cleanups:
+        wait([_pending_cleanups.pop() for _ in range(len(_pending_cleanups))])
+
+def is_transient_error(error_msg):
+    """Return True if an error message describes a failure worth retrying."""
+    error_lower = error_msg.lower()
+    return any(keyword in error_lower for keyword in TRANSIENT_ERROR_KEYWORDS)
+
+def wait_before_retry(retry_count, max_retries):
+    """
+    Sleep before retrying a repository, with exponential backoff.
+    
+    Up to a second of random jitter is added so repositories that failed
+    together in concurrent scans do not all retry at the same moment.
+    """
+    wait_time = min(2 ** retry_count, 60)  # Exponential backoff, max 60 seconds
+    log(f"  Retrying in {wait_time} seconds (attempt {retry_count + 1}/{max_retries})...")
+    time.sleep(wait_time + random.uniform(0, 1))
+
+# Options shared by every Trivy filesystem scan
+TRIVY_FS_ARGS = (
+    'trivy', 'fs',
+    '--format', 'json',
+    '--cache-backend', 'memory',
+    '--timeout', '120m0s',
+    '--ignore-unfixed',
+    '--scanners', 'vuln',
+    '--vuln-type', 'os,library',
+    '--severity', 'CRITICAL,HIGH,MEDIUM,LOW',
+)
+
+def trivy_fs_command(target, output_file, skip_db_update=False):
+    """Build the Trivy filesystem scan command for a target directory."""
+    command = [*TRIVY_FS_ARGS, '--output', str(output_file), '--cache-dir', get_trivy_cache_dir()]
+    if skip_db_update:
+        command.extend(['--skip-db-update', '--skip-java-db-update'])
+    command.append(str(target))
+    return command
+
+def run_trivy_scan(target, output_file, skip_db_update=False):
+    """
+    Run a Trivy filesystem scan of a target directory.
+    
+    The report goes to output_file, so stdout is discarded; stderr is kept
+    as undecoded bytes and only decoded when it is printed.
+    
+    Returns:
+        subprocess.CompletedProcess with stderr as bytes
+    
+    Raises:
+        subprocess.TimeoutExpired: If the scan takes longer than 15 minutes
+    """
+    return subprocess.run(
+        trivy_fs_command(target, output_file, skip_db_update),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        timeout=900
+    )
+
+def download_trivy_db():
+    """
+    Download or update the Trivy vulnerability and Java databases once.
+    
+    Scans can then run with --skip-db-update and --skip-java-db-update
+    (see get_trivy_cache_dir). The Java database is otherwise fetched by
+    the first scan that finds a JAR file.
+    
+    Returns:
+        True if both databases are ready, False otherwise
+    """
+    for db_option in ('--download-db-only', '--download-java-db-only'):
+        try:
+            result = subprocess.run(
+                ['trivy', 'image', db_option, '--cache-dir', get_trivy_cache_dir()],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=600
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            log(f"Warning: Failed to download Trivy database: {e}")
+            return False
+        if result.returncode != 0:
+            log(f"Warning: Failed to download Trivy database: {result.stderr.strip()}")
+            return False
+    return True
+
+def trivy_error_message(result):
+    """Describe a failed Trivy run by its exit status and last line of stderr."""
+    stderr_lines = result.stderr.decode('utf-8', errors='replace').strip().splitlines() if result.stderr else []
+    error_msg = f"Trivy exited with status {result.returncode}"
+    return f"{error_msg}: {stderr_lines[-1]}" if stderr_lines else error_msg
+
+def get_trivy_db_key():
+    """
+    Identify the Trivy version and vulnerability databases in the cache.
+    
+    Returns:
+        String that changes whenever Trivy or one of its databases is
+        updated, or None if it cannot be determined
+    """
+    try:
+        result = subprocess.run(
+            ['trivy', 'version', '--format', 'json', '--cache-dir', get_trivy_cache_dir()],
+            capture_output=True,
+            text=True,
+            timeout=60
+        )
+        version = json.loads(result.stdout) if result.returncode == 0 else None
+    except (OSError, subprocess.TimeoutExpired, json.JSONDecodeError):
+        return None
+    if not isinstance(version, dict) or not (version.get('VulnerabilityDB') or {}).get('UpdatedAt'):
+        return None
+    return '|'.join([
+        str(version.get('Version')),
+        str(version['VulnerabilityDB']['UpdatedAt']),
+        str((version.get('JavaDB') or {}).get('UpdatedAt')),
+    ])
+
+def prepare_trivy_db():
+    """
+    Get the Trivy database ready for a run of scans.
+    
+    Returns:
+        Tuple of (skip_db_update, trivy_db_key) for scan_repository(), or
+        the database set by use_prepared_trivy_db()
+    """
+    if _prepared_trivy_db is not None:
+        return _prepared_trivy_db
+    if os.environ.get('TRIVY_SERVER'):
+        # Trivy reads TRIVY_SERVER itself and runs every scan as a client of
+        # that server, which keeps the database loaded across scans. The
+        # local cache holds no database, so previous reports are not reused.
+        return False, None
+    # With the database fixed for the whole run, repositories whose head
+    # commit was already scanned against it can reuse their previous report
+    skip_db_update = download_trivy_db()
+    return skip_db_update, (get_trivy_db_key() if skip_db_update else None)
+
+def use_prepared_trivy_db(prepared_db):
+    """
+    Use a database from prepare_trivy_db() for every scan in this process.
+    
+    Parallel batch workers are initialized with the database the parent
+    prepared, so they read the shared cache instead of each updating it.
+    
+    Args:
+        prepared_db: Result of prepare_trivy_db(), or None to prepare the
+            database in every scan_repositories() call again
+    """
+    global _prepared_trivy_db
+    _prepared_trivy_db = prepared_db
+
+def reuse_previous_report(repo_reports_dir, scan_date, head_sha, trivy_db_key):
+    """
+    Reuse the last report of a repository whose scan inputs are unchanged.
+    
+    A scan of the same commit with the same Trivy version and databases
+    produces the same findings, so the report recorded in .last_scan.json
+    is copied to today's report directory instead of cloning and scanning.
+    
+    Args:
+        repo_reports_dir: vulnerability-reports/{org}/{repo} directory
+        scan_date: Date directory of the current scan
+        head_sha: Head commit of the default branch from repos.json
+        trivy_db_key: Result of get_trivy_db_key()
+    
+    Returns:
+        True if the previous report was reused
+    """
+    if not head_sha or not trivy_db_key:
+        return False
+    try:
+        last_scan = load_json_file(repo_reports_dir / LAST_SCAN_FILE)
+    except (OSError, JSONDecodeError):
+        return False
+    if (not isinstance(last_scan, dict) or last_scan.get('commit') != head_sha
+            or last_scan.get('trivy_db') != trivy_db_key):
+        return False
+    
+    last_date = last_scan.get('scan_date')
+    if not isinstance(last_date, str) or not last_date.isdigit():
+        return False
+    previous_report = repo_reports_dir / last_date / 'trivy-report.json'
+    if not previous_report.is_file():
+        return False
+    if last_date != scan_date:
+        report_dir = repo_reports_dir / scan_date
+        report_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(previous_report, report_dir / 'trivy-report.json')
+    return True
+
+def record_scan(repo_reports_dir, scan_date, head_sha, trivy_db_key):
+    """Record the inputs of a successful scan for reuse_previous_report()."""
+    if not head_sha or not trivy_db_key:
+        return
+    try:
+        dump_json_file(
+            {'commit': head_sha, 'trivy_db': trivy_db_key, 'scan_date': scan_date},
+            repo_reports_dir / LAST_SCAN_FILE
+        )
+    except OSError as e:
+        log(f"Warning: Failed to record scan of {repo_reports_dir.name}: {e}")
+
+def scan_repository(repo, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state=None, retry_count=0, max_retries=None, skip_db_update=False, trivy_db_key=None):
     """Scan a single repository with optional retry logic."""
+    if max_retries is None:
+        max_retries = int(os.environ.get('MAX_RETRIES', '3'))
+    
     try:
         # Validate repository data
         repo_name = validate_repo_name(repo['name'])
@@ -38,188 +312,211 @@ def scan_repository(repo, org_name, reports_dir, scan_date, current_repo, instal
         default_branch = repo.get('default_branch', 'main') or 'main'
     except (KeyError, ValueError) as e:
         error_msg = sanitize_error_message(str(e), tokens_to_sanitize)
-        print(f"Warning: Skipping invalid repository data: {error_msg}")
+        log(f"Warning: Skipping invalid repository data: {error_msg}")
         if scan_state:
             scan_state.mark_failed(repo_name, f"Invalid repository data: {error_msg}", retry_count)
         return False
     
     # Skip cloning Sparta repo since we're already in it
     if repo_full_name == current_repo:
-        print(f"\n{'='*60}")
-        print(f"Skipping clone for {repo_full_name} (already in this repository)")
-        print(f"Scanning current repository...")
-        print(f"{'='*60}")
+        log(f"\n{'='*60}")
+        log(f"Skipping clone for {repo_full_name} (already in this repository)")
+        log(f"Scanning current repository...")
+        log(f"{'='*60}")
         
-        # Use current directory for scan
+        # Use current directory for scan, once earlier clones in it are gone
+        wait_for_clone_cleanup()
         repo_dir = Path('.')
         try:
-            report_dir = sanitize_path(repo_name, reports_dir) / scan_date
+            report_dir = reports_dir / repo_name / scan_date
             report_dir.mkdir(parents=True, exist_ok=True)
         except Exception as e:
-            print(f"Error: Invalid report directory path - {sanitize_error_message(str(e), tokens_to_sanitize)}")
+            log(f"Error: Invalid report directory path - {sanitize_error_message(str(e), tokens_to_sanitize)}")
             return
         
-        # Run Trivy scan on current directory
-        result = subprocess.run(
-            [
-                'trivy', 'fs',
-                '--format', 'json',
-                '--output', str(report_dir / 'trivy-report.json'),
-                '--timeout', '120m0s',
-                '--ignore-unfixed',
-                '--scanners', 'vuln',
-                '--vuln-type', 'os,library',
-                '--severity', 'CRITICAL,HIGH,MEDIUM,LOW',
-                '--cache-dir', f'{os.environ.get("GITHUB_WORKSPACE", ".")}/.cache/trivy',
-                '.'
-            ],
-            capture_output=True,
-            text=True,
-            timeout=900
-        )
+        # Run Trivy scan on current directory; a timeout is retried in place
+        # like a cloned repository's
+        while True:
+            try:
+                result = run_trivy_scan('.', report_dir / 'trivy-report.json', skip_db_update)
+                break
+            except subprocess.TimeoutExpired:
+                error_msg = sanitize_error_message('Scan timeout', tokens_to_sanitize)
+                log(f"✗ Timeout scanning {repo_full_name}: {error_msg}")
+                if retry_count < max_retries:
+                    wait_before_retry(retry_count, max_retries)
+                    retry_count += 1
+                    continue
+                error_report = {
+                    'error': error_msg,
+                    'repository': repo_full_name,
+                    'timestamp': datetime.now().isoformat(),
+                    'retry_count': retry_count
+                }
+                try:
+                    dump_json_file(error_report, report_dir / 'trivy-report.json', indent=True)
+                except Exception as write_err:
+                    log(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
+                if scan_state:
+                    scan_state.mark_failed(repo_name, error_msg, retry_count)
+                return False
         
         if result.returncode == 0:
-            print(f"✓ Scan completed for {repo_full_name}")
+            log(f"✓ Scan completed for {repo_full_name}")
             if scan_state:
                 scan_state.mark_completed(repo_name)
             return True
-        else:
-            print(f"⚠ Scan completed with warnings for {repo_full_name}")
-            if result.stderr:
-                print(result.stderr)
-            if scan_state:
-                scan_state.mark_completed(repo_name)  # Still mark as completed even with warnings
-            return True
+        
+        # Trivy only exits non-zero when the scan itself failed (findings
+        # do not change the exit status), so the report cannot be trusted
+        error_msg = sanitize_error_message(trivy_error_message(result), tokens_to_sanitize)
+        log(f"✗ Error scanning {repo_full_name}: {error_msg}")
+        if result.stderr:
+            log(sanitize_error_message(result.stderr.decode('utf-8', errors='replace'), tokens_to_sanitize))
+        error_report = {
+            'error': f"Trivy scan failed: {error_msg}",
+            'repository': repo_full_name,
+            'timestamp': datetime.now().isoformat()
+        }
+        try:
+            dump_json_file(error_report, report_dir / 'trivy-report.json', indent=True)
+        except Exception as write_err:
+            log(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
+        if scan_state:
+            scan_state.mark_failed(repo_name, f"Trivy scan failed: {error_msg}", retry_count)
+        return False
     
-    print(f"\n{'='*60}")
-    print(f"Scanning: {repo_full_name}")
-    print(f"{'='*60}")
+    log(f"\n{'='*60}")
+    log(f"Scanning: {repo_full_name}")
+    log(f"{'='*60}")
+    
+    # A validated repository name is a single path component (it starts and
+    # ends with an alphanumeric character and has no separators), so the
+    # report directory is joined directly instead of being resolved again
+    # for every repository; reports_dir was sanitized once by main()
+    report_dir = reports_dir / repo_name / scan_date
+    
+    head_sha = repo.get('head_sha')
+    if reuse_previous_report(report_dir.parent, scan_date, head_sha, trivy_db_key):
+        log(f"✓ {repo_full_name} unchanged since its last scan, previous report reused")
+        if scan_state:
+            scan_state.mark_completed(repo_name)
+        return True
     
-    # Validate and create repo directory path
-    repo_dir = None
-    report_dir = None
     try:
-        base_dir = Path.cwd()
-        repo_dir_name = f'tmp-{repo_name}'
-        # Sanitize repo_dir_name to prevent path traversal
-        repo_dir_name = repo_dir_name.replace('..', '').replace('/', '').replace('\\', '')
-        repo_dir = sanitize_path(repo_dir_name, base_dir)
-        
-        # Validate and create report directory
-        report_dir = sanitize_path(repo_name, reports_dir) / scan_date
         report_dir.mkdir(parents=True, exist_ok=True)
-    except Exception as e:
+    except OSError as e:
         error_msg = sanitize_error_message(str(e), tokens_to_sanitize)
-        print(f"Error: Invalid directory path - {error_msg}")
+        log(f"Error: Invalid directory path - {error_msg}")
         if scan_state:
             scan_state.mark_failed(repo_name, f"Invalid directory path: {error_msg}", retry_count)
         return False
     
-    try:
-        # Clone repository using secure_git_clone function
-        clone_url = f"https://github.com/{repo_full_name}.git"
-        success, error_msg = secure_git_clone(
-            repo_url=clone_url,
-            target_dir=repo_dir,
-            branch=default_branch,
-            token=installation_token,
-            timeout=300
-        )
-        
-        if not success:
-            # Clone failed - create error report and handle retry logic
-            error_msg_sanitized = sanitize_error_message(error_msg, tokens_to_sanitize)
-            print(f"✗ Error cloning {repo_full_name}: {error_msg_sanitized}")
+    clone_url = f"https://github.com/{repo_full_name}.git"
+    
+    # Each pass clones and scans once; transient failures go round again
+    while True:
+        # Unique per attempt, so concurrent scans never share a clone directory
+        repo_dir = get_clone_base_dir() / f'tmp-{repo_name}-{uuid.uuid4().hex[:12]}'
+        try:
+            # Clone repository using secure_git_clone function
+            success, error_msg = secure_git_clone(
+                repo_url=clone_url,
+                target_dir=repo_dir,
+                branch=default_branch,
+                token=installation_token,
+                timeout=300
+            )
             
-            # Check if we should retry (transient errors)
-            is_transient_error = any(keyword in error_msg.lower() for keyword in ['timeout', 'network', 'connection', 'rate limit', 'temporary'])
-            should_retry = is_transient_error and retry_count < int(os.environ.get('MAX_RETRIES', '3'))
+            if not success:
+                # Clone failed - create error report and handle retry logic
+                error_msg_sanitized = sanitize_error_message(error_msg, tokens_to_sanitize)
+                log(f"✗ Error cloning {repo_full_name}: {error_msg_sanitized}")
+                
+                # Check if we should retry (transient errors)
+                if is_transient_error(error_msg) and retry_count < max_retries:
+                    wait_before_retry(retry_count, max_retries)
+                    retry_count += 1
+                    continue
+                
+                error_report = {
+                    'error': f"Git clone failed: {error_msg_sanitized}",
+                    'repository': repo_full_name,
+                    'timestamp': datetime.now().isoformat(),
+                    'clone_url': clone_url,
+                    'retry_count': retry_count
+                }
+                try:
+                    dump_json_file(error_report, report_dir / 'trivy-report.json', indent=True)
+                except Exception as write_err:
+                    log(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
+                
+                if scan_state:
+                    scan_state.mark_failed(repo_name, f"Git clone failed: {error_msg_sanitized}", retry_count)
+                return False
             
-            if should_retry:
-                wait_time = min(2 ** retry_count, 60)  # Exponential backoff, max 60 seconds
-                print(f"  Retrying in {wait_time} seconds (attempt {retry_count + 1}/{int(os.environ.get('MAX_RETRIES', '3'))})...")
-                time.sleep(wait_time)
-                return scan_repository(repo, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state, retry_count + 1)
+            # Verify the clone is in place (one stat rather than listing the
+            # directory; every successful clone has a .git directory)
+            if not (repo_dir / '.git').is_dir():
+                error_msg = f"Cloned directory is missing or empty: {repo_dir}"
+                error_msg_sanitized = sanitize_error_message(error_msg, tokens_to_sanitize)
+                log(f"✗ Error: {error_msg_sanitized}")
+                error_report = {
+                    'error': error_msg_sanitized,
+                    'repository': repo_full_name,
+                    'timestamp': datetime.now().isoformat()
+                }
+                try:
+                    dump_json_file(error_report, report_dir / 'trivy-report.json', indent=True)
+                except Exception:
+                    pass
+                return  # Skip to next repository
             
+            # Run Trivy scan; a timeout is retried against the same clone
+            # rather than cloning the repository again
+            while True:
+                try:
+                    result = run_trivy_scan(str(repo_dir), report_dir / 'trivy-report.json', skip_db_update)
+                    break
+                except subprocess.TimeoutExpired:
+                    if retry_count >= max_retries:
+                        raise
+                    log(f"✗ Timeout scanning {repo_full_name}: {sanitize_error_message('Scan timeout', tokens_to_sanitize)}")
+                    wait_before_retry(retry_count, max_retries)
+                    retry_count += 1
+            
+            if result.returncode == 0:
+                log(f"✓ Scan completed for {repo_full_name}")
+                record_scan(report_dir.parent, scan_date, head_sha, trivy_db_key)
+                if scan_state:
+                    scan_state.mark_completed(repo_name)
+                return True
+            
+            # Trivy only exits non-zero when the scan itself failed (findings
+            # do not change the exit status), so the report cannot be trusted
+            error_msg = sanitize_error_message(trivy_error_message(result), tokens_to_sanitize)
+            log(f"✗ Error scanning {repo_full_name}: {error_msg}")
+            if result.stderr:
+                log(sanitize_error_message(result.stderr.decode('utf-8', errors='replace'), tokens_to_sanitize))
             error_report = {
-                'error': f"Git clone failed: {error_msg_sanitized}",
+                'error': f"Trivy scan failed: {error_msg}",
                 'repository': repo_full_name,
                 'timestamp': datetime.now().isoformat(),
-                'clone_url': clone_url,
                 'retry_count': retry_count
             }
             try:
-                with open(report_dir / 'trivy-report.json', 'w') as f:
-                    json.dump(error_report, f, indent=2)
+                dump_json_file(error_report, report_dir / 'trivy-report.json', indent=True)
             except Exception as write_err:
-                print(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
-            
+                log(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
             if scan_state:
-                scan_state.mark_failed(repo_name, f"Git clone failed: {error_msg_sanitized}", retry_count)
+                scan_state.mark_failed(repo_name, f"Trivy scan failed: {error_msg}", retry_count)
             return False
-        
-        # Verify cloned directory exists and is not empty
-        if not repo_dir.exists() or not any(repo_dir.iterdir()):
-            error_msg = f"Cloned directory is missing or empty: {repo_dir}"
-            error_msg_sanitized = sanitize_error_message(error_msg, tokens_to_sanitize)
-            print(f"✗ Error: {error_msg_sanitized}")
-            error_report = {
-                'error': error_msg_sanitized,
-                'repository': repo_full_name,
-                'timestamp': datetime.now().isoformat()
-            }
-            try:
-                with open(report_dir / 'trivy-report.json', 'w') as f:
-                    json.dump(error_report, f, indent=2)
-            except Exception:
-                pass
-            return  # Skip to next repository
-        
-        # Run Trivy scan
-        result = subprocess.run(
-            [
-                'trivy', 'fs',
-                '--format', 'json',
-                '--output', str(report_dir / 'trivy-report.json'),
-                '--timeout', '120m0s',
-                '--ignore-unfixed',
-                '--scanners', 'vuln',
-                '--vuln-type', 'os,library',
-                '--severity', 'CRITICAL,HIGH,MEDIUM,LOW',
-                '--cache-dir', f'{os.environ.get("GITHUB_WORKSPACE", ".")}/.cache/trivy',
-                str(repo_dir)
-            ],
-            capture_output=True,
-            text=True,
-            timeout=900
-        )
-        
-        if result.returncode == 0:
-            print(f"✓ Scan completed for {repo_full_name}")
-            if scan_state:
-                scan_state.mark_completed(repo_name)
-            return True
-        else:
-            print(f"⚠ Scan completed with warnings for {repo_full_name}")
-            if result.stderr:
-                print(result.stderr)
-            if scan_state:
-                scan_state.mark_completed(repo_name)  # Still mark as completed even with warnings
-            return True
-        
-    except subprocess.TimeoutExpired:
-        error_msg = sanitize_error_message('Scan timeout', tokens_to_sanitize)
-        print(f"✗ Timeout scanning {repo_full_name}: {error_msg}")
-        
-        # Check if we should retry (timeout is transient)
-        should_retry = retry_count < int(os.environ.get('MAX_RETRIES', '3'))
-        if should_retry:
-            wait_time = min(2 ** retry_count, 60)  # Exponential backoff
-            print(f"  Retrying in {wait_time} seconds (attempt {retry_count + 1}/{int(os.environ.get('MAX_RETRIES', '3'))})...")
-            time.sleep(wait_time)
-            return scan_repository(repo, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state, retry_count + 1)
-        
-        if report_dir:
+            
+        except subprocess.TimeoutExpired:
+            error_msg = sanitize_error_message('Scan timeout', tokens_to_sanitize)
+            log(f"✗ Timeout scanning {repo_full_name}: {error_msg}")
+            
+            # Retries already ran against the existing clone
             error_report = {
                 'error': error_msg,
                 'repository': repo_full_name,
@@ -227,30 +524,24 @@ def scan_repository(repo, org_name, reports_dir, scan_date, current_repo, instal
                 'retry_count': retry_count
             }
             try:
-                with open(report_dir / 'trivy-report.json', 'w') as f:
-                    json.dump(error_report, f, indent=2)
+                dump_json_file(error_report, report_dir / 'trivy-report.json', indent=True)
             except Exception as write_err:
-                print(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
-        
-        if scan_state:
-            scan_state.mark_failed(repo_name, error_msg, retry_count)
-        return False
-    
-    except Exception as e:
-        error_msg = sanitize_error_message(str(e), tokens_to_sanitize)
-        print(f"✗ Error scanning {repo_full_name}: {error_msg}")
-        
-        # Check if we should retry (some exceptions might be transient)
-        is_transient_error = any(keyword in error_msg.lower() for keyword in ['timeout', 'network', 'connection', 'rate limit', 'temporary'])
-        should_retry = is_transient_error and retry_count < int(os.environ.get('MAX_RETRIES', '3'))
-        
-        if should_retry:
-            wait_time = min(2 ** retry_count, 60)  # Exponential backoff
-            print(f"  Retrying in {wait_time} seconds (attempt {retry_count + 1}/{int(os.environ.get('MAX_RETRIES', '3'))})...")
-            time.sleep(wait_time)
-            return scan_repository(repo, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state, retry_count + 1)
+                log(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
+            
+            if scan_state:
+                scan_state.mark_failed(repo_name, error_msg, retry_count)
+            return False
         
-        if report_dir:
+        except Exception as e:
+            error_msg = sanitize_error_message(str(e), tokens_to_sanitize)
+            log(f"✗ Error scanning {repo_full_name}: {error_msg}")
+            
+            # Check if we should retry (some exceptions might be transient)
+            if is_transient_error(error_msg) and retry_count < max_retries:
+                wait_before_retry(retry_count, max_retries)
+                retry_count += 1
+                continue
+            
             error_report = {
                 'error': error_msg,
                 'repository': repo_full_name,
@@ -258,19 +549,98 @@ def scan_repository(repo, org_name, reports_dir, scan_date, current_repo, instal
                 'retry_count': retry_count
             }
             try:
-                with open(report_dir / 'trivy-report.json', 'w') as f:
-                    json.dump(error_report, f, indent=2)
+                dump_json_file(error_report, report_dir / 'trivy-report.json', indent=True)
             except Exception as write_err:
-                print(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
+                log(f"Warning: Failed to write error report: {sanitize_error_message(str(write_err), tokens_to_sanitize)}")
+            
+            if scan_state:
+                scan_state.mark_failed(repo_name, error_msg, retry_count)
+            return False
         
-        if scan_state:
-            scan_state.mark_failed(repo_name, error_msg, retry_count)
-        return False
+        finally:
+            # Cleanup
+            if repo_dir.exists():
+                remove_clone(repo_dir)
+
+def scan_repositories(repos, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state=None, max_retries=None, concurrency=1):
+    """
+    Scan repositories, up to `concurrency` at a time.
+    
+    Args:
+        repos: Repository dictionaries to scan
+        concurrency: Maximum number of repositories cloned and scanned at once
+        (other arguments are passed to scan_repository)
+    
+    Returns:
+        scan_repository results, in the order of repos
+    """
+    if not repos:
+        return []
+    
+    skip_db_update, trivy_db_key = prepare_trivy_db()
     
+    if os.environ.get('SPARTA_CLONE_DIR', '').strip() and get_clone_base_dir() == Path.cwd():
+        log(f"Warning: SPARTA_CLONE_DIR is not a writable directory, cloning into {Path.cwd()}")
+    
+    try:
+        workers = min(concurrency, len(repos))
+        if workers > 1 and not skip_db_update and not os.environ.get('TRIVY_SERVER'):
+            # Without a downloaded database every scan would update the
+            # shared cache itself (see get_trivy_cache_dir)
+            log("Warning: Trivy database not downloaded, scanning one repository at a time")
+            workers = 1
+        if workers <= 1:
+            return [
+                scan_repository(
+                    repo, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state,
+                    max_retries=max_retries, skip_db_update=skip_db_update, trivy_db_key=trivy_db_key
+                )
+                for repo in repos
+            ]
+    
+        # The current repository is scanned in place ('.'), which would pick up
+        # other repositories being cloned into the working directory, so it is
+        # scanned before the others start
+        results = {}
+        for index, repo in enumerate(repos):
+            if repo.get('full_name') == current_repo:
+                results[index] = scan_repository(
+                    repo, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state,
+                    max_retries=max_retries, skip_db_update=skip_db_update, trivy_db_key=trivy_db_key
+                )
+    
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                index: executor.submit(
+                    scan_repository, repo, org_name, reports_dir, scan_date, current_repo, installation_token, tokens_to_sanitize, scan_state,
+                    max_retries=max_retries, skip_db_update=skip_db_update, trivy_db_key=trivy_db_key
+                )
+                for index, repo in enumerate(repos)
+                if index not in results
+            }
+            # Reap scans as they finish so progress is visible while the
+            # slowest repositories are still running
+            indexes = {future: index for index, future in futures.items()}
+            for done, future in enumerate(as_completed(indexes), start=len(results) + 1):
+                results[indexes[future]] = future.result()
+                log(f"Progress: {done}/{len(repos)} repositories scanned")
+        return [results[index] for index in range(len(repos))]
     finally:
-        # Cleanup
-        if repo_dir and repo_dir.exists():
-            shutil.rmtree(repo_dir, ignore_errors=True)
+        wait_for_clone_cleanup()
+
+def get_state_file(org_name, scan_date, batch_id=None):
+    """Return the scan state file path, or None for the default per-org file."""
+    if not batch_id:
+        return None
+    return sanitize_path(f'scan-state-{org_name}-{scan_date}-{batch_id}.json', Path.cwd())
+
+def summarize_results(org_name, results):
+    """Summarize scan_repository results for one organization."""
+    return {
+        'org': org_name,
+        'scanned': len(results),
+        'failed': sum(1 for result in results if result is not True)
+    }
 
 def get_token_for_org(org_name, token_map, default_token):
     """Get the appropriate token for an organization from the token map."""
@@ -278,38 +648,149 @@ def get_token_for_org(org_name, token_map, default_token):
         return token_map.get(org_name, default_token)
     return default_token
 
-def main():
+def scan_organization(org_name, repos, scan_date, current_repo, installation_token, token_map, tokens_to_sanitize,
+                      max_retries, scan_concurrency, batch_id=None, batch_size=None):
+    """
+    Scan the repositories of one organization, resuming from its scan state.
+    
+    Args:
+        org_name: Validated organization name
+        repos: Repository dictionaries of the organization
+        installation_token: Token used when token_map has none for the org
+        batch_id: Batch being scanned (selects the scan state file)
+        batch_size: Batch size recorded in the scan state
+        (other arguments as in main)
+    
+    Returns:
+        Summary from summarize_results(), or None if the reports directory
+        is invalid
+    """
+    # Validate and sanitize reports directory path for this org
+    try:
+        base_dir = Path.cwd()
+        reports_base = sanitize_path('vulnerability-reports', base_dir)
+        reports_dir = sanitize_path(org_name, reports_base)
+        reports_dir.mkdir(parents=True, exist_ok=True)
+    except Exception as e:
+        log(f"Error: Invalid reports directory path for {org_name} - {sanitize_error_message(str(e), tokens_to_sanitize)}")
+        return None
+    
+    # Initialize scan state if available
+    scan_state = None
+    if STATE_MANAGEMENT_AVAILABLE:
+        try:
+            scan_state = ScanState(
+                org_name, scan_date, get_state_file(org_name, scan_date, batch_id),
+                max_retries=max_retries, batch_size=batch_size
+            )
+            # Only initialize if state is new (no existing state)
+            if not scan_state.state_file.exists() or scan_state.get_summary()['completed'] == 0:
+                scan_state.initialize(len(repos), repos)
+            else:
+                # Resume mode: update pending repos from current repos list
+                scan_state.resume(len(repos), repos)
+                summary = scan_state.get_summary()
+                log(f"Resuming scan: {summary['completed']} already completed, {summary['pending']} pending")
+        except Exception as e:
+            log(f"Warning: Failed to initialize scan state: {sanitize_error_message(str(e), tokens_to_sanitize)}")
+    
+    # Filter repos based on state (resume capability)
+    repos_to_scan = repos
+    if scan_state:
+        repo_names = (validate_repo_name(repo['name']) for repo in repos)
+        repos_to_scan = [
+            repo for repo, name in zip(repos, repo_names)
+            if not scan_state.is_completed(name) or scan_state.should_retry(name)
+        ]
+        skipped_count = len(repos) - len(repos_to_scan)
+        if skipped_count > 0:
+            log(f"Skipping {skipped_count} already completed repository(ies)")
+    
+    # Get org-specific token
+    org_token = get_token_for_org(org_name, token_map, installation_token)
+    
+    # Process repos for this org
+    try:
+        results = scan_repositories(
+            repos_to_scan, org_name, reports_dir, scan_date, current_repo, org_token, tokens_to_sanitize, scan_state,
+            max_retries=max_retries, concurrency=scan_concurrency
+        )
+    finally:
+        if scan_state:
+            scan_state.flush()
+    
+    # Print summary if state management is available
+    if scan_state:
+        summary = scan_state.get_summary()
+        log(f"\nScan Summary for {org_name}:")
+        log(f"  Completed: {summary['completed']}/{summary['total_repos']} ({summary['progress_percent']}%)")
+        log(f"  Failed: {summary['failed']}")
+        log(f"  Pending: {summary['pending']}")
+    
+    return summarize_results(org_name, results)
+
+def main(repos=None, org=None, token_map=None, fallback_token=None, max_retries=None, batch_id=None, scan_concurrency=None,
+         batch_size=None):
+    """
+    Scan repositories listed in repos.json or passed in directly.
+
+    Arguments left as None are read from repos.json and the environment
+    (GITHUB_ORG, GITHUB_APP_TOKEN_MAP, GITHUB_APP_TOKEN, MAX_RETRIES and
+    SCAN_CONCURRENCY).
+
+    Args:
+        repos: Repository list (single-org or multi-org format)
+        org: Organization name for a single-org repository list; defaults
+            to GITHUB_ORG or the owner of the first repository
+        token_map: Dictionary mapping org names to installation tokens
+        fallback_token: Token used for orgs missing from token_map
+        max_retries: Maximum retry attempts per repository
+        batch_id: Batch being scanned; each batch keeps its own scan state
+            file so batches can be scanned concurrently
+        scan_concurrency: Maximum number of repositories scanned at once
+        batch_size: Batch size recorded in the scan state (defaults to the
+            BATCH_SIZE env var)
+    
+    Returns:
+        List of per-organization summaries with 'org', 'scanned' and
+        'failed' counts
+    """
     # Validate inputs
     current_repo = os.environ.get('GITHUB_REPOSITORY', '')
     scan_date = datetime.now().strftime('%Y%m%d')
-    installation_token = os.environ.get('GITHUB_APP_TOKEN', '')
-    token_map_json = os.environ.get('GITHUB_APP_TOKEN_MAP', '')
+    installation_token = fallback_token if fallback_token is not None else os.environ.get('GITHUB_APP_TOKEN', '')
+    if max_retries is None:
+        max_retries = int(os.environ.get('MAX_RETRIES', '3'))
+    if scan_concurrency is None:
+        scan_concurrency = int(os.environ.get('SCAN_CONCURRENCY', DEFAULT_SCAN_CONCURRENCY))
     
     # Parse token map if provided
-    token_map = {}
-    if token_map_json:
-        try:
-            token_map = json.loads(token_map_json)
-            tokens_to_sanitize = list(token_map.values()) + [installation_token]
-        except json.JSONDecodeError:
-            print("Warning: Failed to parse GITHUB_APP_TOKEN_MAP, using default token")
-            tokens_to_sanitize = [installation_token]
-    else:
-        tokens_to_sanitize = [installation_token]
+    if token_map is None:
+        token_map = {}
+        token_map_json = os.environ.get('GITHUB_APP_TOKEN_MAP', '')
+        if token_map_json:
+            try:
+                token_map = json.loads(token_map_json)
+            except json.JSONDecodeError:
+                log("Warning: Failed to parse GITHUB_APP_TOKEN_MAP, using default token")
+    # Sanitize all tokens; compiled once and reused for every message below
+    tokens_to_sanitize = compile_token_sanitizer([*token_map.values(), installation_token])
     
     if not installation_token:
-        print("Error: GITHUB_APP_TOKEN environment variable is not set")
+        log("Error: GITHUB_APP_TOKEN environment variable is not set")
         sys.exit(1)
     
-    # Read repos list (validate path)
-    try:
-        base_dir = Path.cwd()
-        repos_file = sanitize_path('repos.json', base_dir)
-        with open(repos_file, 'r') as f:
-            repos_data = json.load(f)
-    except Exception as e:
-        print(f"Error: Failed to read repos file - {sanitize_error_message(str(e), tokens_to_sanitize)}")
-        sys.exit(1)
+    # Read repos list (validate path) unless the caller already has it in memory
+    if repos is not None:
+        repos_data = repos
+    else:
+        try:
+            base_dir = Path.cwd()
+            repos_file = sanitize_path('repos.json', base_dir)
+            repos_data = load_repos_file(repos_file)
+        except Exception as e:
+            log(f"Error: Failed to read repos file - {sanitize_error_message(str(e), tokens_to_sanitize)}")
+            sys.exit(1)
     
     # Auto-detect format: check if it's multi-org format (array of org objects) or single-org format (array of repos)
     is_multi_org_format = (
@@ -320,91 +801,44 @@ def main():
         'repos' in repos_data[0]
     )
     
+    summaries = []
+    
     if is_multi_org_format:
         # Multi-org format: array of org objects
-        print(f"Detected multi-org format: {len(repos_data)} organization(s)")
+        log(f"Detected multi-org format: {len(repos_data)} organization(s)")
         
         for org_data in repos_data:
             try:
                 org_name = validate_org_name(org_data['org'])
                 repos = org_data['repos']
             except (KeyError, ValueError) as e:
-                print(f"Warning: Skipping invalid org data: {sanitize_error_message(str(e), tokens_to_sanitize)}")
+                log(f"Warning: Skipping invalid org data: {sanitize_error_message(str(e), tokens_to_sanitize)}")
                 continue
             
-            print(f"\n{'='*60}")
-            print(f"Processing organization: {org_name} ({len(repos)} repositories)")
-            print(f"{'='*60}")
+            log(f"\n{'='*60}")
+            log(f"Processing organization: {org_name} ({len(repos)} repositories)")
+            log(f"{'='*60}")
             
-            # Validate and sanitize reports directory path for this org
-            try:
-                base_dir = Path.cwd()
-                reports_base = sanitize_path('vulnerability-reports', base_dir)
-                reports_dir = sanitize_path(org_name, reports_base)
-                reports_dir.mkdir(parents=True, exist_ok=True)
-            except Exception as e:
-                print(f"Error: Invalid reports directory path for {org_name} - {sanitize_error_message(str(e), tokens_to_sanitize)}")
+            summary = scan_organization(
+                org_name, repos, scan_date, current_repo, installation_token, token_map, tokens_to_sanitize,
+                max_retries, scan_concurrency, batch_id, batch_size
+            )
+            if summary is None:
                 continue
+            summaries.append(summary)
             
-            # Initialize scan state if available
-            scan_state = None
-            if STATE_MANAGEMENT_AVAILABLE:
-                try:
-                    scan_state = ScanState(org_name, scan_date)
-                    # Only initialize if state is new (no existing state)
-                    if not scan_state.state_file.exists() or len(scan_state.get_completed_repos()) == 0:
-                        scan_state.initialize(len(repos), repos)
-                    else:
-                        # Resume mode: update pending repos from current repos list
-                        completed = set(scan_state.get_completed_repos())
-                        repo_names = [validate_repo_name(repo['name']) for repo in repos]
-                        scan_state.state['pending_repos'] = [r for r in repo_names if r not in completed]
-                        scan_state.state['total_repos'] = len(repos)
-                        scan_state.save()
-                        print(f"Resuming scan: {len(completed)} already completed, {len(scan_state.state['pending_repos'])} pending")
-                except Exception as e:
-                    print(f"Warning: Failed to initialize scan state: {sanitize_error_message(str(e), tokens_to_sanitize)}")
-            
-            # Filter repos based on state (resume capability)
-            repos_to_scan = repos
-            if scan_state:
-                completed = set(scan_state.get_completed_repos())
-                failed_to_retry = {f['repo'] for f in scan_state.get_failed_repos()}
-                repos_to_scan = [
-                    repo for repo in repos
-                    if validate_repo_name(repo['name']) not in completed or validate_repo_name(repo['name']) in failed_to_retry
-                ]
-                skipped_count = len(repos) - len(repos_to_scan)
-                if skipped_count > 0:
-                    print(f"Skipping {skipped_count} already completed repository(ies)")
-            
-            # Get org-specific token
-            org_token = get_token_for_org(org_name, token_map, installation_token)
-            
-            # Process repos for this org
-            for repo in repos_to_scan:
-                scan_repository(repo, org_name, reports_dir, scan_date, current_repo, org_token, tokens_to_sanitize, scan_state)
-            
-            # Print summary if state management is available
-            if scan_state:
-                summary = scan_state.get_summary()
-                print(f"\nScan Summary for {org_name}:")
-                print(f"  Completed: {summary['completed']}/{summary['total_repos']} ({summary['progress_percent']}%)")
-                print(f"  Failed: {summary['failed']}")
-                print(f"  Pending: {summary['pending']}")
-            
-            print(f"\n{'='*60}")
-            print(f"Completed scanning {org_name}. Reports saved to vulnerability-reports/{org_name}/")
-            print(f"{'='*60}")
+            log(f"\n{'='*60}")
+            log(f"Completed scanning {org_name}. Reports saved to vulnerability-reports/{org_name}/")
+            log(f"{'='*60}")
         
-        print(f"\n{'='*60}")
-        print(f"Scanning complete for all organizations.")
-        print(f"{'='*60}")
+        log(f"\n{'='*60}")
+        log(f"Scanning complete for all organizations.")
+        log(f"{'='*60}")
     else:
         # Single org format: backward compatible (array of repos)
         # Try to get org_name from GITHUB_ORG env var, or infer from first repo
         try:
-            org_name = validate_org_name(os.environ['GITHUB_ORG'])
+            org_name = validate_org_name(org or os.environ['GITHUB_ORG'])
         except (KeyError, ValueError):
             # Try to infer from first repo's full_name
             if isinstance(repos_data, list) and len(repos_data) > 0:
@@ -416,73 +850,25 @@ def main():
                     else:
                         raise ValueError("Cannot determine organization name")
                 except (ValueError, KeyError):
-                    print("Error: Cannot determine organization name. Set GITHUB_ORG environment variable.")
+                    log("Error: Cannot determine organization name. Set GITHUB_ORG environment variable.")
                     sys.exit(1)
             else:
-                print("Error: Cannot determine organization name. Set GITHUB_ORG environment variable.")
+                log("Error: Cannot determine organization name. Set GITHUB_ORG environment variable.")
                 sys.exit(1)
         
-        repos = repos_data
-        
-        # Validate and sanitize reports directory path
-        try:
-            base_dir = Path.cwd()
-            reports_base = sanitize_path('vulnerability-reports', base_dir)
-            reports_dir = sanitize_path(org_name, reports_base)
-            reports_dir.mkdir(parents=True, exist_ok=True)
-        except Exception as e:
-            print(f"Error: Invalid reports directory path - {sanitize_error_message(str(e), tokens_to_sanitize)}")
+        summary = scan_organization(
+            org_name, repos_data, scan_date, current_repo, installation_token, token_map, tokens_to_sanitize,
+            max_retries, scan_concurrency, batch_id, batch_size
+        )
+        if summary is None:
             sys.exit(1)
+        summaries.append(summary)
         
-        # Initialize scan state if available
-        scan_state = None
-        if STATE_MANAGEMENT_AVAILABLE:
-            try:
-                scan_state = ScanState(org_name, scan_date)
-                # Only initialize if state is new (no existing state)
-                if not scan_state.state_file.exists() or len(scan_state.get_completed_repos()) == 0:
-                    scan_state.initialize(len(repos), repos)
-                else:
-                    # Resume mode: update pending repos from current repos list
-                    completed = set(scan_state.get_completed_repos())
-                    repo_names = [validate_repo_name(repo['name']) for repo in repos]
-                    scan_state.state['pending_repos'] = [r for r in repo_names if r not in completed]
-                    scan_state.state['total_repos'] = len(repos)
-                    scan_state.save()
-                    print(f"Resuming scan: {len(completed)} already completed, {len(scan_state.state['pending_repos'])} pending")
-            except Exception as e:
-                print(f"Warning: Failed to initialize scan state: {sanitize_error_message(str(e), tokens_to_sanitize)}")
-        
-        # Filter repos based on state (resume capability)
-        repos_to_scan = repos
-        if scan_state:
-            completed = set(scan_state.get_completed_repos())
-            failed_to_retry = {f['repo'] for f in scan_state.get_failed_repos()}
-            repos_to_scan = [
-                repo for repo in repos
-                if validate_repo_name(repo['name']) not in completed or validate_repo_name(repo['name']) in failed_to_retry
-            ]
-            skipped_count = len(repos) - len(repos_to_scan)
-            if skipped_count > 0:
-                print(f"Skipping {skipped_count} already completed repository(ies)")
-        
-        # Get org-specific token (for single org mode, use default token)
-        org_token = get_token_for_org(org_name, token_map, installation_token)
-        
-        for repo in repos_to_scan:
-            scan_repository(repo, org_name, reports_dir, scan_date, current_repo, org_token, tokens_to_sanitize, scan_state)
-        
-        # Print summary if state management is available
-        if scan_state:
-            summary = scan_state.get_summary()
-            print(f"\nScan Summary for {org_name}:")
-            print(f"  Completed: {summary['completed']}/{summary['total_repos']} ({summary['progress_percent']}%)")
-            print(f"  Failed: {summary['failed']}")
-            print(f"  Pending: {summary['pending']}")
-        
-        print(f"\n{'='*60}")
-        print(f"Scanning complete. Reports saved to vulnerability-reports/{org_name}/")
-        print(f"{'='*60}")
+        log(f"\n{'='*60}")
+        log(f"Scanning complete. Reports saved to vulnerability-reports/{org_name}/")
+        log(f"{'='*60}")
+    
+    return summaries
 
 if __name__ == '__main__':
     main()
@@ -6,9 +6,11 @@ This script manages scan state files to enable resume capability and track
 completed/failed repositories across workflow runs.
 """
 
+import functools
 import os
-import json
 import sys
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -16,29 +18,48 @@ from typing import Dict, List, Optional
 # Import security utilities
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from security_utils import sanitize_path, sanitize_error_message, validate_org_name, validate_repo_name
+from json_utils import dump_file as dump_json_file, load_file as load_json_file
+
+# Repository results are written to the state file at most this often while
+# a scan runs; flush() writes whatever the throttled saves left pending
+SAVE_INTERVAL_SECONDS = 2.0
+
+def _synchronized(method):
+    """Run a ScanState method while holding the instance lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class ScanState:
     """Manages scan state for tracking progress."""
     
-    def __init__(self, org_name: str, scan_date: str, state_file: Optional[Path] = None):
+    def __init__(self, org_name: str, scan_date: str, state_file: Optional[Path] = None,
+                 max_retries: Optional[int] = None, batch_size: Optional[int] = None):
         self.org_name = validate_org_name(org_name)
         self.scan_date = scan_date
-        self.batch_size = int(os.environ.get('BATCH_SIZE', '100'))
-        self.max_retries = int(os.environ.get('MAX_RETRIES', '3'))
+        # Explicit values win over the BATCH_SIZE and MAX_RETRIES env vars
+        self.batch_size = batch_size if batch_size is not None else int(os.environ.get('BATCH_SIZE', '100'))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get('MAX_RETRIES', '3'))
         
         if state_file is None:
             base_dir = Path.cwd()
             state_file = sanitize_path(f'scan-state-{org_name}-{scan_date}.json', base_dir)
         
         self.state_file = state_file
+        # Repositories may be scanned from several threads at once
+        self._lock = threading.RLock()
+        self._last_save = float('-inf')
+        self._dirty = False
         self.state = self._load_state()
+        self._index_state()
     
     def _load_state(self) -> Dict:
         """Load state from file or create new state."""
         if self.state_file.exists():
             try:
-                with open(self.state_file, 'r') as f:
-                    state = json.load(f)
+                state = load_json_file(self.state_file)
                 # Validate state structure
                 if not isinstance(state, dict) or state.get('org') != self.org_name:
                     print(f"Warning: State file exists but has invalid structure. Creating new state.")
@@ -64,121 +85,174 @@ class ScanState:
             'last_updated': datetime.now().isoformat()
         }
     
+    def _index_state(self):
+        """
+        Move the repository lists into lookup tables.
+        
+        While the state is loaded, pending and completed repositories are
+        kept as insertion-ordered dicts and failed entries are keyed by
+        repository, so updates take constant time; save() writes them back
+        to the lists in self.state.
+        """
+        self._pending = dict.fromkeys(self.state.get('pending_repos', []))
+        self._completed = dict.fromkeys(self.state.get('completed_repos', []))
+        self._failed = {
+            f['repo']: f for f in self.state.get('failed_repos', [])
+            if isinstance(f, dict) and 'repo' in f
+        }
+    
+    @_synchronized
     def initialize(self, total_repos: int, repos: List[Dict]):
         """Initialize state with repository list."""
-        repo_names = [validate_repo_name(repo['name']) for repo in repos]
+        self._pending = dict.fromkeys(validate_repo_name(repo['name']) for repo in repos)
         self.state['total_repos'] = total_repos
-        self.state['pending_repos'] = repo_names
         self.state['last_updated'] = datetime.now().isoformat()
         self.save()
     
+    @_synchronized
+    def resume(self, total_repos: int, repos: List[Dict]):
+        """Resume with the current repository list; completed repositories stay completed."""
+        self._pending = {
+            name: None for name in (validate_repo_name(repo['name']) for repo in repos)
+            if name not in self._completed
+        }
+        self.state['total_repos'] = total_repos
+        self.save()
+    
+    @_synchronized
     def mark_completed(self, repo_name: str):
         """Mark a repository as completed."""
         repo_name = validate_repo_name(repo_name)
-        if repo_name in self.state['pending_repos']:
-            self.state['pending_repos'].remove(repo_name)
-        if repo_name in self.state['failed_repos']:
-            # Remove from failed repos if it was previously failed
-            self.state['failed_repos'] = [
-                f for f in self.state['failed_repos']
-                if isinstance(f, dict) and f.get('repo') != repo_name
-            ]
-        if repo_name not in self.state['completed_repos']:
-            self.state['completed_repos'].append(repo_name)
+        self._pending.pop(repo_name, None)
+        # Remove from failed repos if it was previously failed
+        self._failed.pop(repo_name, None)
+        self._completed[repo_name] = None
         self.state['last_updated'] = datetime.now().isoformat()
-        self.save()
+        self._save_throttled()
     
+    @_synchronized
     def mark_failed(self, repo_name: str, error: str, retry_count: int = 0):
         """Mark a repository as failed."""
         repo_name = validate_repo_name(repo_name)
-        if repo_name in self.state['pending_repos']:
-            self.state['pending_repos'].remove(repo_name)
-        
-        # Remove existing entry if present
-        self.state['failed_repos'] = [
-            f for f in self.state['failed_repos']
-            if isinstance(f, dict) and f.get('repo') != repo_name
-        ]
+        self._pending.pop(repo_name, None)
         
-        # Add new failed entry
-        self.state['failed_repos'].append({
+        # Replace any existing entry (the new one goes last)
+        now = datetime.now().isoformat()
+        self._failed.pop(repo_name, None)
+        self._failed[repo_name] = {
             'repo': repo_name,
             'error': error,
             'retry_count': retry_count,
-            'timestamp': datetime.now().isoformat()
-        })
-        self.state['last_updated'] = datetime.now().isoformat()
-        self.save()
+            'timestamp': now
+        }
+        self.state['last_updated'] = now
+        self._save_throttled()
     
+    @_synchronized
     def mark_batch_completed(self, batch_id: str, repos: List[str]):
         """Mark a batch as completed."""
+        now = datetime.now().isoformat()
         self.state['batches'][batch_id] = {
             'status': 'completed',
             'repos': [validate_repo_name(r) for r in repos],
-            'completed_at': datetime.now().isoformat()
+            'completed_at': now
         }
-        self.state['last_updated'] = datetime.now().isoformat()
+        self.state['last_updated'] = now
         self.save()
     
+    @_synchronized
     def mark_batch_failed(self, batch_id: str, repos: List[str]):
         """Mark a batch as failed."""
+        now = datetime.now().isoformat()
         self.state['batches'][batch_id] = {
             'status': 'failed',
             'repos': [validate_repo_name(r) for r in repos],
-            'failed_at': datetime.now().isoformat()
+            'failed_at': now
         }
-        self.state['last_updated'] = datetime.now().isoformat()
+        self.state['last_updated'] = now
         self.save()
     
+    @_synchronized
     def get_pending_repos(self) -> List[str]:
         """Get list of pending repositories."""
-        return self.state['pending_repos'].copy()
+        return list(self._pending)
     
+    @_synchronized
     def get_failed_repos(self) -> List[Dict]:
         """Get list of failed repositories with retry information."""
         return [
-            f for f in self.state['failed_repos']
-            if isinstance(f, dict) and f.get('retry_count', 0) < self.max_retries
+            f for f in self._failed.values()
+            if f.get('retry_count', 0) < self.max_retries
         ]
     
+    @_synchronized
     def get_completed_repos(self) -> List[str]:
         """Get list of completed repositories."""
-        return self.state['completed_repos'].copy()
+        return list(self._completed)
+    
+    @_synchronized
+    def is_completed(self, repo_name: str) -> bool:
+        """Check if a repository has been completed."""
+        return validate_repo_name(repo_name) in self._completed
     
+    @_synchronized
     def should_retry(self, repo_name: str) -> bool:
         """Check if a repository should be retried."""
-        repo_name = validate_repo_name(repo_name)
-        for failed_repo in self.state['failed_repos']:
-            if isinstance(failed_repo, dict) and failed_repo.get('repo') == repo_name:
-                return failed_repo.get('retry_count', 0) < self.max_retries
-        return False
+        failed_repo = self._failed.get(validate_repo_name(repo_name))
+        return failed_repo is not None and failed_repo.get('retry_count', 0) < self.max_retries
     
+    @_synchronized
     def increment_retry_count(self, repo_name: str):
         """Increment retry count for a failed repository."""
-        repo_name = validate_repo_name(repo_name)
-        for failed_repo in self.state['failed_repos']:
-            if isinstance(failed_repo, dict) and failed_repo.get('repo') == repo_name:
-                failed_repo['retry_count'] = failed_repo.get('retry_count', 0) + 1
-                failed_repo['timestamp'] = datetime.now().isoformat()
-                self.state['last_updated'] = datetime.now().isoformat()
-                self.save()
-                return
+        failed_repo = self._failed.get(validate_repo_name(repo_name))
+        if failed_repo is not None:
+            failed_repo['retry_count'] = failed_repo.get('retry_count', 0) + 1
+            now = datetime.now().isoformat()
+            failed_repo['timestamp'] = now
+            self.state['last_updated'] = now
+            self._save_throttled()
     
-    def save(self):
-        """Save state to file."""
+    @_synchronized
+    def save(self, pretty: bool = False):
+        """
+        Save state to file (written to a temporary file and moved into place).
+        
+        Args:
+            pretty: Write indented JSON instead of compact JSON
+        """
         try:
+            self.state['pending_repos'] = list(self._pending)
+            self.state['completed_repos'] = list(self._completed)
+            self.state['failed_repos'] = list(self._failed.values())
             self.state_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.state_file, 'w') as f:
-                json.dump(self.state, f, indent=2)
+            tmp_file = self.state_file.with_name(self.state_file.name + '.tmp')
+            dump_json_file(self.state, tmp_file, indent=pretty)
+            os.replace(tmp_file, self.state_file)
+            self._last_save = time.monotonic()
+            self._dirty = False
         except Exception as e:
             print(f"Warning: Failed to save state file: {sanitize_error_message(str(e), [])}")
     
+    def _save_throttled(self):
+        """Save now, unless the state was saved less than SAVE_INTERVAL_SECONDS ago."""
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL_SECONDS:
+            self.save()
+        else:
+            self._dirty = True
+    
+    @_synchronized
+    def flush(self):
+        """Save changes the throttled saves have not written yet."""
+        if self._dirty:
+            self.save()
+    
+    @_synchronized
     def get_summary(self) -> Dict:
         """Get summary statistics."""
         total = self.state['total_repos']
-        completed = len(self.state['completed_repos'])
-        failed = len(self.state['failed_repos'])
-        pending = len(self.state['pending_repos'])
+        completed = len(self._completed)
+        failed = len(self._failed)
+        pending = len(self._pending)
         
         return {
             'org': self.org_name,
@@ -213,7 +287,7 @@ def main():
         total_repos = int(sys.argv[4])
         state = ScanState(org_name, scan_date)
         state.state['total_repos'] = total_repos
-        state.save()
+        state.save(pretty=True)
         print(f"Initialized state for {org_name} on {scan_date}: {total_repos} repos")
     
     elif command == 'completed':
@@ -8,12 +8,18 @@ Provides:
 - Secure git clone helper
 """
 
+import functools
 import re
+import shlex
 import subprocess
 import os
 import tempfile
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Pattern, Tuple, Union
+
+
+# CVE format: CVE-YYYY-NNNN+ where YYYY is year and NNNN+ is at least 4 digits
+_CVE_ID_PATTERN = re.compile(r'CVE-\d{4}-\d{4,}')
 
 
 def validate_cve_id(cve_id: str) -> bool:
@@ -31,9 +37,7 @@ def validate_cve_id(cve_id: str) -> bool:
     if not cve_id or not isinstance(cve_id, str):
         return False
     
-    # CVE format: CVE-YYYY-NNNN+ where YYYY is year and NNNN+ is at least 4 digits
-    pattern = r'^CVE-\d{4}-\d{4,}$'
-    return bool(re.match(pattern, cve_id.upper()))
+    return bool(_CVE_ID_PATTERN.fullmatch(cve_id.upper()))
 
 
 def sanitize_path(user_path: str, base_dir: Path) -> Path:
@@ -74,6 +78,20 @@ def sanitize_path(user_path: str, base_dir: Path) -> Path:
     return resolved
 
 
+# Only the tip of the requested branch is needed for a filesystem scan:
+# no history, no other branches and no tags
+SHALLOW_CLONE_ARGS = ['--depth', '1', '--single-branch', '--no-tags']
+
+# A clone transferring less than GIT_HTTP_LOW_SPEED_LIMIT bytes/s for
+# GIT_HTTP_LOW_SPEED_TIME seconds is aborted ("Operation too slow") rather
+# than left to run into the clone timeout; either can be overridden
+# through the environment
+CLONE_LOW_SPEED_ENV = {
+    'GIT_HTTP_LOW_SPEED_LIMIT': '1000',
+    'GIT_HTTP_LOW_SPEED_TIME': '30',
+}
+
+
 def secure_git_clone(
     repo_url: str,
     target_dir: Path,
@@ -115,44 +133,29 @@ def secure_git_clone(
                     os.unlink(cred_file)
                 raise
         
-        # Clone repository with inline credential helper (no global config needed)
-        # Use shell=True with shlex.quote() for credential helper (most reliable for complex args)
-        import shlex
-        
         # Set up environment
         env = os.environ.copy()
         # Prevent interactive credential prompts (important for non-interactive environments)
         env['GIT_TERMINAL_PROMPT'] = '0'
+        for name, value in CLONE_LOW_SPEED_ENV.items():
+            env.setdefault(name, value)
         
+        # Clone repository with inline credential helper (no global config needed).
+        # The argument list is run directly, without a shell; git runs the
+        # helper through a shell itself, so the file path is quoted for it.
+        clone_cmd = ['git']
         if token and cred_file:
-            # Use shell command with proper quoting for credential helper
-            # shlex.quote() ensures security by properly escaping all inputs
-            safe_cred_file = shlex.quote(str(cred_file))
-            safe_branch = shlex.quote(branch)
-            safe_repo_url = shlex.quote(repo_url)
-            safe_target_dir = shlex.quote(str(target_dir))
-            
-            clone_cmd = f"git -c 'credential.helper=store --file={safe_cred_file}' clone --depth 1 --branch {safe_branch} {safe_repo_url} {safe_target_dir}"
-            result = subprocess.run(
-                clone_cmd,
-                shell=True,
-                env=env,
-                check=False,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-        else:
-            # No token, use regular list-based clone (more secure when no complex args)
-            clone_cmd = ['git', 'clone', '--depth', '1', '--branch', branch, repo_url, str(target_dir)]
-            result = subprocess.run(
-                clone_cmd,
-                env=env,
-                check=False,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
+            clone_cmd += ['-c', f'credential.helper=store --file={shlex.quote(str(cred_file))}']
+        clone_cmd += ['clone', *SHALLOW_CLONE_ARGS, '--branch', branch, repo_url, str(target_dir)]
+        result = subprocess.run(
+            clone_cmd,
+            env=env,
+            check=False,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=timeout
+        )
         
         # Clean up credential file
         if cred_file and os.path.exists(cred_file):
@@ -164,7 +167,8 @@ def secure_git_clone(
         if result.returncode == 0:
             return (True, "")
         else:
-            error_msg = result.stderr if result.stderr else result.stdout
+            # git reports errors on stderr; stdout is discarded
+            error_msg = result.stderr or f"git clone exited with status {result.returncode}"
             # Sanitize error message to remove any potential token exposure
             error_msg = error_msg.replace(token, "***") if token else error_msg
             return (False, error_msg)
@@ -179,6 +183,11 @@ def secure_git_clone(
         return (False, error_msg)
 
 
+# Null bytes and control characters removed from string input (newlines
+# and tabs are kept), as a str.translate() deletion table
+_CONTROL_CHAR_TABLE = dict.fromkeys(i for i in range(32) if chr(i) not in '\n\r\t')
+
+
 def sanitize_string_input(input_str: str, max_length: int = 1000, allowed_chars: Optional[str] = None) -> str:
     """
     Sanitize string input to prevent injection attacks.
@@ -198,7 +207,7 @@ def sanitize_string_input(input_str: str, max_length: int = 1000, allowed_chars:
         raise ValueError("Input must be a string")
     
     # Remove null bytes and control characters
-    sanitized = ''.join(char for char in input_str if ord(char) >= 32 or char in '\n\r\t')
+    sanitized = input_str.translate(_CONTROL_CHAR_TABLE)
     
     # Check length
     if len(sanitized) > max_length:
@@ -212,6 +221,16 @@ def sanitize_string_input(input_str: str, max_length: int = 1000, allowed_chars:
     return sanitized
 
 
+# GitHub org names: alphanumeric, hyphens, underscores
+_ORG_NAME_PATTERN = re.compile(r'[a-zA-Z0-9]([a-zA-Z0-9\-_]*[a-zA-Z0-9])?')
+# GitHub repo names: alphanumeric, hyphens, underscores, dots
+_REPO_NAME_PATTERN = re.compile(r'[a-zA-Z0-9]([a-zA-Z0-9._-]*[a-zA-Z0-9])?')
+
+# Validated repository names remembered per process; comfortably more than
+# the repositories of a large organization
+VALIDATION_CACHE_SIZE = 16384
+
+
 def validate_org_name(name: str) -> str:
     """
     Validate organization name format.
@@ -230,7 +249,7 @@ def validate_org_name(name: str) -> str:
     if not name or not isinstance(name, str):
         raise ValueError("Organization name must be a non-empty string")
     # GitHub org names: alphanumeric, hyphens, underscores, max 39 chars
-    if not re.match(r'^[a-zA-Z0-9]([a-zA-Z0-9\-_]*[a-zA-Z0-9])?$', name):
+    if not _ORG_NAME_PATTERN.fullmatch(name):
         raise ValueError(f"Invalid organization name format: {name}")
     if len(name) > 39:
         raise ValueError(f"Organization name too long: {name}")
@@ -254,8 +273,16 @@ def validate_repo_name(name: str) -> str:
     """
     if not name or not isinstance(name, str):
         raise ValueError("Repository name must be a non-empty string")
+    return _validate_repo_name(name)
+
+
+# A repository name is validated by the resume filter, scan_repository and
+# every ScanState update; valid results are cached (errors are not)
+@functools.lru_cache(maxsize=VALIDATION_CACHE_SIZE)
+def _validate_repo_name(name: str) -> str:
+    """Validate a non-empty repository name string (see validate_repo_name)."""
     # GitHub repo names: alphanumeric, hyphens, underscores, dots, max 100 chars
-    if not re.match(r'^[a-zA-Z0-9]([a-zA-Z0-9._-]*[a-zA-Z0-9])?$', name):
+    if not _REPO_NAME_PATTERN.fullmatch(name):
         raise ValueError(f"Invalid repository name format: {name}")
     if len(name) > 100:
         raise ValueError(f"Repository name too long: {name}")
@@ -277,6 +304,12 @@ def validate_repo_full_name(full_name: str) -> str:
     """
     if not full_name or not isinstance(full_name, str):
         raise ValueError("Repository full name must be a non-empty string")
+    return _validate_repo_full_name(full_name)
+
+
+@functools.lru_cache(maxsize=VALIDATION_CACHE_SIZE)
+def _validate_repo_full_name(full_name: str) -> str:
+    """Validate a non-empty full repository name string (see validate_repo_full_name)."""
     # Full name format: org/repo
     if '/' not in full_name:
         raise ValueError(f"Full repository name must be in format 'org/repo': {full_name}")
@@ -285,29 +318,82 @@ def validate_repo_full_name(full_name: str) -> str:
         raise ValueError(f"Invalid full repository name format: {full_name}")
     org_part, repo_part = parts
     # Validate org part
-    if not re.match(r'^[a-zA-Z0-9]([a-zA-Z0-9\-_]*[a-zA-Z0-9])?$', org_part):
+    if not _ORG_NAME_PATTERN.fullmatch(org_part):
         raise ValueError(f"Invalid organization name in full name: {full_name}")
     # Validate repo part
-    if not re.match(r'^[a-zA-Z0-9]([a-zA-Z0-9._-]*[a-zA-Z0-9])?$', repo_part):
+    if not _REPO_NAME_PATTERN.fullmatch(repo_part):
         raise ValueError(f"Invalid repository name in full name: {full_name}")
     if len(full_name) > 200:  # org (39) + / + repo (100) + buffer
         raise ValueError(f"Full repository name too long: {full_name}")
     return sanitize_string_input(full_name, max_length=200)
 
 
-def sanitize_error_message(msg, tokens_to_sanitize: list) -> str:
+def validate_repo_full_name_split(full_name: str) -> Tuple[str, str]:
+    """
+    Validate a full repository name (org/repo) and split it into its parts.
+    
+    Applies the same rules as validate_org_name and validate_repo_name to
+    the two parts in one pass, for hot loops that need both.
+    
+    Args:
+        full_name: Full repository name in format 'org/repo'
+        
+    Returns:
+        Tuple of (org name, repository name)
+        
+    Raises:
+        ValueError: If full repository name is invalid
+    """
+    if not full_name or not isinstance(full_name, str):
+        raise ValueError("Repository full name must be a non-empty string")
+    org_part, sep, repo_part = full_name.partition('/')
+    if not sep:
+        raise ValueError(f"Full repository name must be in format 'org/repo': {full_name}")
+    # fullmatch rather than match with '$', which would accept a trailing newline
+    if len(org_part) > 39 or not _ORG_NAME_PATTERN.fullmatch(org_part):
+        raise ValueError(f"Invalid organization name in full name: {full_name}")
+    if len(repo_part) > 100 or not _REPO_NAME_PATTERN.fullmatch(repo_part):
+        raise ValueError(f"Invalid repository name in full name: {full_name}")
+    return org_part, repo_part
+
+
+def compile_token_sanitizer(tokens: Iterable[str]) -> Pattern:
+    """
+    Compile a set of tokens into a single pattern for sanitize_error_message.
+    
+    Compile once and reuse the pattern when sanitizing many messages with
+    the same tokens.
+    
+    Args:
+        tokens: Tokens to remove from messages (empty values are ignored)
+        
+    Returns:
+        Compiled pattern matching any of the tokens
+    """
+    # Longest first, so a token that is a prefix of another cannot leave
+    # the rest of the longer token behind
+    unique_tokens = sorted({token for token in tokens if token}, key=len, reverse=True)
+    if not unique_tokens:
+        return re.compile(r'(?!)')  # Never matches
+    return re.compile('|'.join(re.escape(token) for token in unique_tokens))
+
+
+def sanitize_error_message(msg, tokens_to_sanitize: Union[list, Pattern]) -> str:
     """
     Remove all tokens from error messages to prevent token exposure.
     
     Args:
         msg: Error message to sanitize
-        tokens_to_sanitize: List of tokens to remove from the message
+        tokens_to_sanitize: List of tokens to remove from the message, or a
+            pattern from compile_token_sanitizer
         
     Returns:
         Sanitized error message
     """
     if not msg or not isinstance(msg, str):
         return str(msg) if msg else ""
+    if isinstance(tokens_to_sanitize, re.Pattern):
+        return tokens_to_sanitize.sub("***", msg)
     sanitized = msg
     for token in tokens_to_sanitize:
         if token:
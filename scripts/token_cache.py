@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of GitHub App installation tokens.
+
+Installation tokens are valid for one hour. When SPARTA_TOKEN_CACHE names
+a file, generated tokens are stored there with the expiry GitHub reported
+(readable by the owner only) and reused by later steps until they are
+within ten minutes of expiring, so JWTs and installation tokens are not
+minted again for every step.
+
+Tokens are keyed by organization and GitHub App ID, so an organization
+switched to different App credentials gets a fresh token.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from json_utils import JSONDecodeError, dumps, load_file as load_json_file
+
+# Path of the token cache file; unset or empty disables the cache
+TOKEN_CACHE_ENV_VAR = 'SPARTA_TOKEN_CACHE'
+
+# Cached tokens with less than this much validity left are not reused
+MIN_REMAINING_SECONDS = 600
+
+
+def get_token_cache_file() -> Optional[Path]:
+    """
+    Get the configured token cache file.
+
+    Returns:
+        Path from SPARTA_TOKEN_CACHE, or None if the cache is disabled
+    """
+    cache_file = os.environ.get(TOKEN_CACHE_ENV_VAR, '').strip()
+    return Path(cache_file) if cache_file else None
+
+
+def resolve_app_ids(orgs, default_app_id: str,
+                    org_credentials_map: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, str]:
+    """
+    Map each organization to the GitHub App ID its token is generated with.
+
+    Args:
+        orgs: Organization names
+        default_app_id: App ID used for orgs without their own credentials
+        org_credentials_map: Optional per-org credentials
+
+    Returns:
+        Dictionary mapping org names to App IDs
+    """
+    org_credentials_map = org_credentials_map or {}
+    return {
+        org.strip(): org_credentials_map.get(org.strip(), {}).get('app_id', default_app_id)
+        for org in orgs if org.strip()
+    }
+
+
+def _cache_key(org: str, app_id: str) -> str:
+    return f"{app_id}/{org}"
+
+
+def _load_entries(cache_file: Path, now: float) -> Dict[str, Dict]:
+    """Load cache entries that are still valid for at least MIN_REMAINING_SECONDS."""
+    try:
+        entries = load_json_file(cache_file)
+    except FileNotFoundError:
+        return {}
+    except (JSONDecodeError, OSError) as e:
+        print(f"Warning: Ignoring unreadable token cache: {type(e).__name__}", file=sys.stderr)
+        return {}
+
+    if not isinstance(entries, dict):
+        return {}
+    return {
+        key: entry for key, entry in entries.items()
+        if isinstance(entry, dict) and isinstance(entry.get('token'), str)
+        and isinstance(entry.get('expires_at'), (int, float))
+        and entry['expires_at'] - now > MIN_REMAINING_SECONDS
+    }
+
+
+def get_cached_tokens(org_app_ids: Dict[str, str], cache_file: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Get cached tokens that can still be used.
+
+    Args:
+        org_app_ids: Dictionary mapping org names to App IDs (see resolve_app_ids)
+        cache_file: Token cache file (defaults to get_token_cache_file())
+
+    Returns:
+        Dictionary mapping org names to cached tokens, for the orgs that
+        have one
+    """
+    cache_file = cache_file or get_token_cache_file()
+    if cache_file is None or not org_app_ids:
+        return {}
+
+    entries = _load_entries(cache_file, time.time())
+    cached = {}
+    for org, app_id in org_app_ids.items():
+        entry = entries.get(_cache_key(org, app_id))
+        if entry:
+            cached[org] = entry['token']
+    return cached
+
+
+def store_tokens(tokens: Dict[str, Tuple[str, Optional[float]]], org_app_ids: Dict[str, str],
+                 cache_file: Optional[Path] = None) -> None:
+    """
+    Add newly generated tokens to the cache.
+
+    Valid entries already in the cache are kept; expired ones are dropped.
+    Tokens without a known expiry are not cached. The file is written with
+    mode 0600 and moved into place.
+
+    Args:
+        tokens: Dictionary mapping org names to (token, expires_at) tuples,
+            expires_at being the expiry GitHub returned as a Unix timestamp
+        org_app_ids: Dictionary mapping org names to App IDs
+        cache_file: Token cache file (defaults to get_token_cache_file())
+    """
+    cache_file = cache_file or get_token_cache_file()
+    tokens = {org: entry for org, entry in tokens.items() if entry[1] is not None}
+    if cache_file is None or not tokens:
+        return
+
+    entries = _load_entries(cache_file, time.time())
+    for org, (token, expires_at) in tokens.items():
+        entries[_cache_key(org, org_app_ids[org])] = {
+            'token': token,
+            'expires_at': int(expires_at),
+        }
+
+    tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file.unlink(missing_ok=True)
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dumps(entries))
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Warning: Failed to save token cache: {type(e).__name__}", file=sys.stderr)
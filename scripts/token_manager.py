@@ -9,9 +9,12 @@ import os
 import json
 import jwt
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 
+from token_cache import get_cached_tokens, resolve_app_ids, store_tokens
+
 
 def generate_jwt(app_id: str, private_key: str) -> str:
     """Generate JWT for GitHub App authentication."""
@@ -24,13 +27,32 @@ def generate_jwt(app_id: str, private_key: str) -> str:
     return jwt.encode(payload, private_key, algorithm='RS256')
 
 
-def get_installation_token(jwt_token: str, org_name: str) -> Tuple[Optional[str], Optional[str]]:
+def parse_token_expiry(expires_at: Optional[str]) -> Optional[float]:
+    """
+    Convert the expires_at timestamp of an installation token to epoch seconds.
+    
+    Args:
+        expires_at: ISO 8601 timestamp as returned by the GitHub API
+            (e.g. '2025-01-01T12:00:00Z')
+    
+    Returns:
+        Expiry as a Unix timestamp, or None if it is missing or invalid
+    """
+    try:
+        return datetime.fromisoformat(expires_at.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_installation_token(jwt_token: str, org_name: str) -> Tuple[Optional[str], Optional[str], Optional[float]]:
     """
     Get installation access token for an organization.
     
     Returns:
-        Tuple of (token, error_message). If successful, token is returned and error is None.
-        If failed, token is None and error contains the error message.
+        Tuple of (token, error_message, expires_at). If successful, token is
+        returned, error is None and expires_at is the token's expiry as a Unix
+        timestamp (None if GitHub did not report one). If failed, token and
+        expires_at are None and error contains the error message.
     """
     headers = {
         'Authorization': f'Bearer {jwt_token}',
@@ -46,9 +68,9 @@ def get_installation_token(jwt_token: str, org_name: str) -> Tuple[Optional[str]
         )
         
         if response.status_code == 404:
-            return None, f"GitHub App not installed on {org_name}"
+            return None, f"GitHub App not installed on {org_name}", None
         elif response.status_code != 200:
-            return None, f"Error checking installation: {response.status_code}"
+            return None, f"Error checking installation: {response.status_code}", None
         
         installation_id = response.json()['id']
         
@@ -60,13 +82,40 @@ def get_installation_token(jwt_token: str, org_name: str) -> Tuple[Optional[str]
         )
         
         if response.status_code != 201:
-            return None, f"Error generating token: {response.status_code}"
+            return None, f"Error generating token: {response.status_code}", None
         
-        return response.json()['token'], None
+        token_data = response.json()
+        return token_data['token'], None, parse_token_expiry(token_data.get('expires_at'))
     except requests.RequestException as e:
-        return None, f"Network error: {str(e)}"
+        return None, f"Network error: {str(e)}", None
     except Exception as e:
-        return None, f"Unexpected error: {str(e)}"
+        return None, f"Unexpected error: {str(e)}", None
+
+
+# Maximum number of installation token requests issued concurrently
+TOKEN_REQUEST_WORKERS = 8
+
+
+def request_installation_tokens(jwt_by_org: Dict[str, str]) -> Dict[str, Tuple[Optional[str], Optional[str], Optional[float]]]:
+    """
+    Get installation access tokens for several organizations concurrently.
+    
+    Args:
+        jwt_by_org: Dictionary mapping org names to the JWT used for that org
+    
+    Returns:
+        Dictionary mapping org names to (token, error_message, expires_at) tuples as
+        returned by get_installation_token, in the order of jwt_by_org
+    """
+    if not jwt_by_org:
+        return {}
+    
+    def request(item):
+        org, jwt_token = item
+        return get_installation_token(jwt_token, org)
+    
+    with ThreadPoolExecutor(max_workers=min(TOKEN_REQUEST_WORKERS, len(jwt_by_org))) as executor:
+        return dict(zip(jwt_by_org, executor.map(request, jwt_by_org.items())))
 
 
 def generate_tokens_for_orgs_with_credentials(
@@ -93,11 +142,19 @@ def generate_tokens_for_orgs_with_credentials(
     token_map = {}
     failed_orgs = []
     jwt_cache = {}  # Cache JWTs per app_id to avoid regenerating
+    jwt_by_org = {}
+    
+    # Reuse unexpired tokens from earlier steps (SPARTA_TOKEN_CACHE)
+    org_app_ids = resolve_app_ids(orgs, default_app_id, org_credentials_map)
+    cached_tokens = get_cached_tokens(org_app_ids)
+    for org, token in cached_tokens.items():
+        token_map[org] = token
+        print(f"✓ Reusing cached token for {org}")
     
-    # Generate token for each org
+    # Resolve the JWT for each org
     for org in orgs:
         org = org.strip()
-        if not org:
+        if not org or org in cached_tokens:
             continue
         
         # Get credentials for this org (fallback to default)
@@ -121,10 +178,14 @@ def generate_tokens_for_orgs_with_credentials(
         else:
             jwt_token = jwt_cache[app_id]
         
-        # Generate installation token
-        token, error = get_installation_token(jwt_token, org)
+        jwt_by_org[org] = jwt_token
+    
+    # Generate installation tokens
+    generated_tokens = {}
+    for org, (token, error, expires_at) in request_installation_tokens(jwt_by_org).items():
         if token:
             token_map[org] = token
+            generated_tokens[org] = (token, expires_at)
             cred_source = "org-specific" if org in org_credentials_map else "default"
             print(f"✓ Token generated for {org} (using {cred_source} credentials)")
         else:
@@ -135,6 +196,8 @@ def generate_tokens_for_orgs_with_credentials(
                 token_map[org] = fallback_token
                 print(f"  Using fallback token for {org}")
     
+    store_tokens(generated_tokens, org_app_ids)
+    
     # If no tokens generated and we have a fallback, use it for all
     if not token_map and fallback_token:
         print("Warning: No org-specific tokens generated, using fallback token for all orgs")
@@ -179,6 +242,14 @@ def generate_tokens_for_orgs(
     token_map = {}
     failed_orgs = []
     
+    # Reuse unexpired tokens from earlier steps (SPARTA_TOKEN_CACHE)
+    org_app_ids = resolve_app_ids(orgs, app_id)
+    for org, token in get_cached_tokens(org_app_ids).items():
+        token_map[org] = token
+        print(f"✓ Reusing cached token for {org}")
+    if len(token_map) == len(org_app_ids):
+        return token_map
+    
     # Generate JWT once
     try:
         jwt_token = generate_jwt(app_id, private_key)
@@ -186,18 +257,16 @@ def generate_tokens_for_orgs(
         print(f"Error generating JWT: {e}")
         if fallback_token:
             print("Using fallback token for all orgs")
-            return {org: fallback_token for org in orgs}
+            return {org: token_map.get(org, fallback_token) for org in orgs}
         raise
     
-    # Generate token for each org
-    for org in orgs:
-        org = org.strip()
-        if not org:
-            continue
-            
-        token, error = get_installation_token(jwt_token, org)
+    # Generate token for each org without a cached one
+    jwt_by_org = {org: jwt_token for org in org_app_ids if org not in token_map}
+    generated_tokens = {}
+    for org, (token, error, expires_at) in request_installation_tokens(jwt_by_org).items():
         if token:
             token_map[org] = token
+            generated_tokens[org] = (token, expires_at)
             print(f"✓ Token generated for {org}")
         else:
             print(f"⚠ Warning: {error}")
@@ -207,6 +276,8 @@ def generate_tokens_for_orgs(
                 token_map[org] = fallback_token
                 print(f"  Using fallback token for {org}")
     
+    store_tokens(generated_tokens, org_app_ids)
+    
     # If no tokens generated and we have a fallback, use it for all
     if not token_map and fallback_token:
         print("Warning: No org-specific tokens generated, using fallback token for all orgs")
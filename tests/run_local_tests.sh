@@ -53,6 +53,31 @@ echo "9. Running credential format tests..."
 python3 -m pytest tests/test_credential_format.py -v 2>&1 | head -30 || echo "⚠ Pytest not available, skipping"
 echo ""
 
+# Test 10: Aggregation tests
+echo "10. Running aggregation tests..."
+python3 tests/test_aggregate_scans.py
+echo ""
+
+# Test 11: Repository listing tests
+echo "11. Running repository listing tests..."
+python3 tests/test_get_repos.py
+echo ""
+
+# Test 12: CVE query tests
+echo "12. Running CVE query tests..."
+python3 tests/test_query_cve.py
+echo ""
+
+# Test 13: Repository scanning tests
+echo "13. Running repository scanning tests..."
+python3 tests/test_scan_repos.py
+echo ""
+
+# Test 14: Scan state tests
+echo "14. Running scan state tests..."
+python3 tests/test_scan_state.py
+echo ""
+
 echo "=========================================="
 echo "All Local Tests Completed"
 echo "=========================================="
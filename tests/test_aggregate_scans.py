@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Unit tests for aggregate-scans.py script.
+
+Tests report discovery, metadata extraction, and statistics aggregation.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import importlib.util
+from pathlib import Path
+
+# Add scripts to path
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+# aggregate-scans.py has a hyphen in its name, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    'aggregate_scans', os.path.join(SCRIPTS_DIR, 'aggregate-scans.py')
+)
+aggregate_scans = importlib.util.module_from_spec(_spec)
+sys.modules['aggregate_scans'] = aggregate_scans
+_spec.loader.exec_module(aggregate_scans)
+
+
+def make_vuln(cve_id, severity, pkg='pkg', installed='1.0.0', fixed='1.0.1'):
+    """Build a minimal Trivy vulnerability entry."""
+    return {
+        'VulnerabilityID': cve_id,
+        'Severity': severity,
+        'PkgName': pkg,
+        'InstalledVersion': installed,
+        'FixedVersion': fixed,
+    }
+
+
+def write_report(reports_dir, org, repo, scan_date, data):
+    """Write a trivy-report.json in the standard reports layout."""
+    report_dir = Path(reports_dir) / org / repo / scan_date
+    report_dir.mkdir(parents=True, exist_ok=True)
+    with open(report_dir / 'trivy-report.json', 'w') as f:
+        json.dump(data, f)
+
+
+def build_reports_tree(reports_dir):
+    """Create a small reports tree covering the common cases."""
+    write_report(reports_dir, 'org1', 'repo-a', '20250101', {
+        'Results': [
+            {'Target': 'requirements.txt', 'Vulnerabilities': [
+                make_vuln('CVE-2024-0001', 'CRITICAL', pkg='requests'),
+                make_vuln('CVE-2024-0002', 'high', pkg='urllib3'),
+            ]},
+            {'Target': 'go.mod'},  # Result without vulnerabilities
+        ]
+    })
+    write_report(reports_dir, 'org1', 'repo-b', '20250102', {
+        'Results': [
+            {'Target': 'package-lock.json', 'Vulnerabilities': [
+                make_vuln('CVE-2024-0001', 'CRITICAL', pkg='requests'),
+                make_vuln('CVE-2024-0003', 'LOW', pkg='lodash'),
+                make_vuln('CVE-2024-0004', 'UNKNOWN', pkg='lodash'),
+            ]},
+        ]
+    })
+    write_report(reports_dir, 'org2', 'repo-c', '20250102', {
+        'Results': [
+            {'Target': 'pom.xml', 'Vulnerabilities': [
+                make_vuln('CVE-2024-0005', 'MEDIUM', pkg='log4j'),
+                {'Severity': 'HIGH', 'PkgName': 'no-id'},  # Missing VulnerabilityID
+            ]},
+        ]
+    })
+    # Error report written by scan_repos.py when a clone fails
+    write_report(reports_dir, 'org2', 'repo-d', '20250102', {
+        'error': 'Git clone failed',
+        'repository': 'org2/repo-d',
+    })
+    # Unrelated files must be ignored
+    (Path(reports_dir) / 'org1' / 'notes.txt').write_text('ignored')
+    (Path(reports_dir) / 'org1' / 'repo-a' / '20250101' / 'other.json').write_text('{}')
+
+
+def test_load_scan_reports_discovers_reports():
+    """Test that all trivy-report.json files are found with path metadata."""
+    print("\n=== Test 1: Load Scan Reports ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        reports = list(aggregate_scans.load_scan_reports(Path(tmpdir)))
+
+        assert len(reports) == 4
+        keys = sorted((r['org'], r['repo'], r['scan_date']) for r in reports)
+        assert keys == [
+            ('org1', 'repo-a', '20250101'),
+            ('org1', 'repo-b', '20250102'),
+            ('org2', 'repo-c', '20250102'),
+            ('org2', 'repo-d', '20250102'),
+        ]
+        print("✓ Found all reports and extracted org/repo/date from paths")
+
+
+def test_load_scan_reports_skips_invalid_json():
+    """Test that unparsable reports are skipped with a warning."""
+    print("\n=== Test 2: Skip Invalid Reports ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        bad_dir = Path(tmpdir) / 'org3' / 'broken' / '20250103'
+        bad_dir.mkdir(parents=True)
+        (bad_dir / 'trivy-report.json').write_text('{not json')
+
+        reports = list(aggregate_scans.load_scan_reports(Path(tmpdir)))
+        assert len(reports) == 4
+        assert all(r['org'] != 'org3' for r in reports)
+        print("✓ Invalid report skipped")
+
+
+def test_load_scan_reports_missing_dir():
+    """Test that a missing reports directory yields no reports."""
+    print("\n=== Test 3: Missing Reports Directory ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        reports = list(aggregate_scans.load_scan_reports(Path(tmpdir) / 'missing'))
+        assert reports == []
+        print("✓ Missing directory handled")
+
+
+def test_load_scan_reports_parallel():
+    """Test that parsing in worker processes matches sequential parsing."""
+    print("\n=== Test 4: Parallel Report Parsing ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        original_threshold = aggregate_scans.PARALLEL_PARSE_THRESHOLD
+        aggregate_scans.PARALLEL_PARSE_THRESHOLD = 1
+        try:
+            parallel = list(aggregate_scans.load_scan_reports(Path(tmpdir), workers=2))
+        finally:
+            aggregate_scans.PARALLEL_PARSE_THRESHOLD = original_threshold
+        sequential = list(aggregate_scans.load_scan_reports(Path(tmpdir), workers=1))
+
+        def key(report):
+            return report['file']
+
+        assert sorted(parallel, key=key) == sorted(sequential, key=key)
+        print("✓ Parallel parsing matches sequential parsing")
+
+
+def test_load_scan_reports_cache():
+    """Test that unchanged reports are served from the cache."""
+    print("\n=== Test 5: Report Cache ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        reports_dir = Path(tmpdir) / 'reports'
+        cache_file = Path(tmpdir) / 'cache.json'
+        build_reports_tree(reports_dir)
+
+        first = list(aggregate_scans.load_scan_reports(reports_dir, workers=1, cache_file=cache_file))
+        assert cache_file.exists()
+
+        # Change one report; only that one may be parsed again
+        write_report(reports_dir, 'org1', 'repo-a', '20250101', {
+            'Results': [{'Target': 'x', 'Vulnerabilities': [make_vuln('CVE-2024-9999', 'LOW')]}]
+        })
+        parsed = []
+        original_parse_one = aggregate_scans._parse_one
+
+        def tracking_parse_one(report_file):
+            parsed.append(report_file)
+            return original_parse_one(report_file)
+
+        aggregate_scans._parse_one = tracking_parse_one
+        try:
+            second = list(aggregate_scans.load_scan_reports(reports_dir, workers=1, cache_file=cache_file))
+        finally:
+            aggregate_scans._parse_one = original_parse_one
+
+        assert [Path(p).parts[-4:-1] for p in parsed] == [('org1', 'repo-a', '20250101')]
+        assert [r['file'] for r in second] == [r['file'] for r in first]
+        by_repo = {r['repo']: r for r in second}
+        assert by_repo['repo-a']['findings'][0][0] == 'CVE-2024-9999'
+        assert by_repo['repo-b']['findings'] == [r for r in first if r['repo'] == 'repo-b'][0]['findings']
+        assert by_repo['repo-d']['scan_failed']
+        print("✓ Unchanged reports reused from cache, modified report re-parsed")
+
+
+def test_aggregate_statistics():
+    """Test aggregated counts, CVE index, and package statistics."""
+    print("\n=== Test 6: Aggregate Statistics ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        stats = aggregate_scans.aggregate_statistics(
+            aggregate_scans.load_scan_reports(Path(tmpdir))
+        )
+
+        # Error report is not counted as a scan
+        assert stats['total_scans'] == 3
+        assert stats['total_repositories'] == ['org1/repo-a', 'org1/repo-b', 'org2/repo-c']
+        assert stats['total_orgs'] == ['org1', 'org2']
+        assert stats['scan_dates'] == ['20250101', '20250102']
+
+        # Severity is normalized to upper case; missing IDs are ignored
+        assert dict(stats['severity_distribution']) == {
+            'CRITICAL': 2, 'HIGH': 1, 'MEDIUM': 1, 'LOW': 1, 'UNKNOWN': 1
+        }
+
+        repo_b = stats['repo_vulnerabilities']['org1/repo-b']
+        assert repo_b['total'] == 3
+        assert (repo_b['critical'], repo_b['high'], repo_b['medium'], repo_b['low']) == (1, 0, 0, 1)
+        assert repo_b['cves'] == ['CVE-2024-0001', 'CVE-2024-0003', 'CVE-2024-0004']
+
+        occurrences = stats['cve_index']['CVE-2024-0001']
+        assert len(occurrences) == 2
+        assert {o['repository'] for o in occurrences} == {'org1/repo-a', 'org1/repo-b'}
+        assert occurrences[0]['package'] == 'requests'
+        assert occurrences[0]['fixed_version'] == '1.0.1'
+
+        lodash = stats['package_vulnerabilities']['lodash']
+        assert lodash['cves'] == ['CVE-2024-0003', 'CVE-2024-0004']
+        assert lodash['repos'] == ['org1/repo-b']
+        print("✓ Statistics aggregated correctly")
+
+
+def test_generate_summary_report():
+    """Test the human-readable summary renders aggregated data."""
+    print("\n=== Test 7: Summary Report ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        stats = aggregate_scans.aggregate_statistics(
+            aggregate_scans.load_scan_reports(Path(tmpdir))
+        )
+        summary = aggregate_scans.generate_summary_report(stats)
+
+        assert "Total Scans: 3" in summary
+        assert "Unique CVEs Found: 5" in summary
+        assert "CVE-2024-0001: Found in 2 repository scan(s)" in summary
+        assert "org1/repo-b: 3 vulnerabilities (C: 1, H: 0, M: 0, L: 1)" in summary
+        print("✓ Summary report rendered correctly")
+
+
+def test_statistics_document_reuses_serialized_sections():
+    """Test that splicing pre-serialized sections matches a full dump."""
+    print("\n=== Test 8: Statistics Document Serialization ===")
+
+    from json_utils import dumps
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        stats = aggregate_scans.aggregate_statistics(
+            aggregate_scans.load_scan_reports(Path(tmpdir))
+        )
+        serialized = {
+            'cve_index': dumps(stats['cve_index'], indent=True),
+            'repo_vulnerabilities': dumps(stats['repo_vulnerabilities'], indent=True),
+        }
+        document = aggregate_scans._dumps_indented_object(stats, serialized)
+
+        assert document == dumps(stats, indent=True)
+        assert json.loads(document)['repo_vulnerabilities']['org1/repo-b']['total'] == 3
+        print("✓ statistics.json bytes match a full serialization")
+
+
+def test_load_scan_reports_follows_symlinked_reports():
+    """Test that a symlinked report file is loaded like a regular one."""
+    print("\n=== Test 9: Symlinked Reports ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        reports_dir = Path(tmpdir) / 'reports'
+        build_reports_tree(reports_dir)
+        link_dir = reports_dir / 'org3' / 'repo-e' / '20250103'
+        link_dir.mkdir(parents=True)
+        os.symlink(reports_dir / 'org1' / 'repo-a' / '20250101' / 'trivy-report.json', link_dir / 'trivy-report.json')
+        reports = list(aggregate_scans.load_scan_reports(reports_dir))
+
+        assert len(reports) == 5
+        assert ('org3', 'repo-e', '20250103') in {(r['org'], r['repo'], r['scan_date']) for r in reports}
+        print("✓ Symlinked report file found")
+
+
+def run_all_tests():
+    """Run all aggregation tests."""
+    print("=" * 60)
+    print("Aggregate Scans Tests")
+    print("=" * 60)
+
+    tests = [
+        test_load_scan_reports_discovers_reports,
+        test_load_scan_reports_skips_invalid_json,
+        test_load_scan_reports_missing_dir,
+        test_load_scan_reports_parallel,
+        test_load_scan_reports_cache,
+        test_aggregate_statistics,
+        test_generate_summary_report,
+        test_statistics_document_reuses_serialized_sections,
+        test_load_scan_reports_follows_symlinked_reports,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"✗ {test.__name__} error: {e}")
+            import traceback
+            traceback.print_exc()
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
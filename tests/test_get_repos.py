@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Unit tests for get_repos.py script.
+
+Tests GraphQL repository listing, pagination, and error handling.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add scripts to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import get_repos
+
+
+def make_page(nodes, end_cursor=None, has_next_page=False):
+    """Build a mock GraphQL response for one page of repositories."""
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {
+        'data': {
+            'organization': {
+                'repositories': {
+                    'pageInfo': {'endCursor': end_cursor, 'hasNextPage': has_next_page},
+                    'nodes': nodes
+                }
+            }
+        }
+    }
+    return response
+
+
+def make_node(name, org='test-org', private=False, default_branch='main', head_sha=None):
+    """Build a GraphQL repository node."""
+    return {
+        'name': name,
+        'nameWithOwner': f'{org}/{name}',
+        'isPrivate': private,
+        'defaultBranchRef': {'name': default_branch, 'target': {'oid': head_sha}} if default_branch else None
+    }
+
+
+def test_get_org_repos_paginates():
+    """Test that all GraphQL pages are fetched and mapped to repos.json entries."""
+    print("\n=== Test 1: GraphQL Pagination ===")
+
+    pages = [
+        make_page([make_node('repo-a', head_sha='a' * 40), make_node('repo-b', private=True)], 'cursor-1', True),
+        make_page([make_node('repo-c', default_branch=None)]),
+    ]
+
+    with patch('get_repos.requests.post', side_effect=pages) as mock_post:
+        repos = get_repos.get_org_repos('test-org', 'ghs_token', ['ghs_token'])
+
+    assert mock_post.call_count == 2
+    first_vars = mock_post.call_args_list[0].kwargs['json']['variables']
+    second_vars = mock_post.call_args_list[1].kwargs['json']['variables']
+    assert first_vars == {'org': 'test-org', 'cursor': None}
+    assert second_vars == {'org': 'test-org', 'cursor': 'cursor-1'}
+    assert mock_post.call_args_list[0].kwargs['headers']['Authorization'] == 'Bearer ghs_token'
+
+    assert [asdict(r) for r in repos] == [
+        {'name': 'repo-a', 'full_name': 'test-org/repo-a', 'private': False, 'default_branch': 'main', 'head_sha': 'a' * 40},
+        {'name': 'repo-b', 'full_name': 'test-org/repo-b', 'private': True, 'default_branch': 'main', 'head_sha': None},
+        {'name': 'repo-c', 'full_name': 'test-org/repo-c', 'private': False, 'default_branch': 'main', 'head_sha': None},
+    ]
+    print("✓ Fetched 2 pages and mapped 3 repositories")
+
+
+def test_get_org_repos_skips_invalid_names():
+    """Test that repositories with invalid names are skipped."""
+    print("\n=== Test 2: Skip Invalid Repository Names ===")
+
+    mismatched = make_node('other-repo')
+    mismatched['nameWithOwner'] = 'test-org/renamed-repo'
+    page = make_page([make_node('good-repo'), make_node('bad;repo'), mismatched])
+    with patch('get_repos.requests.post', return_value=page):
+        repos = get_repos.get_org_repos('test-org', 'ghs_token', ['ghs_token'])
+
+    assert [r.name for r in repos] == ['good-repo']
+    print("✓ Invalid repository skipped")
+
+
+def test_get_org_repos_graphql_error():
+    """Test that GraphQL errors are raised instead of returning partial data."""
+    print("\n=== Test 3: GraphQL Error ===")
+
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {
+        'data': {'organization': None},
+        'errors': [{'message': "Could not resolve to an Organization with the login of 'missing-org'."}]
+    }
+
+    with patch('get_repos.requests.post', return_value=response):
+        try:
+            get_repos.get_org_repos('missing-org', 'ghs_token', ['ghs_token'])
+            assert False, "Expected RuntimeError"
+        except RuntimeError as e:
+            assert 'missing-org' in str(e)
+    print("✓ GraphQL error raised")
+
+
+def test_main_fetches_orgs_concurrently():
+    """Test multi-org listing keeps org order and records failed orgs."""
+    print("\n=== Test 4: Multi-Org Fetch ===")
+
+    def mock_post(url, headers=None, json=None, timeout=None):
+        org = json['variables']['org']
+        if org == 'org-missing':
+            response = MagicMock()
+            response.json.return_value = {'data': {'organization': None}}
+            return response
+        return make_page([make_node(f'{org}-repo', org=org)])
+
+    session = MagicMock()
+    session.post.side_effect = mock_post
+
+    env = {
+        'GITHUB_APP_TOKEN': 'ghs_default',
+        'GITHUB_APP_TOKEN_MAP': '',
+        'GITHUB_ORGS': 'org-b,org-missing,org-a',
+        'GITHUB_OUTPUT': os.devnull,
+        'SPARTA_CACHE_DIR': '',
+    }
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        try:
+            with patch.dict(os.environ, env), \
+                 patch('get_repos.get_session', return_value=session):
+                get_repos.main()
+            with open('repos.json') as f:
+                repos_data = json.load(f)
+        finally:
+            os.chdir(original_cwd)
+
+    assert session.post.call_count == 3
+    assert [org['org'] for org in repos_data] == ['org-b', 'org-a']
+    assert repos_data[1]['repos'][0]['full_name'] == 'org-a/org-a-repo'
+    print("✓ Orgs fetched with one session, failed org skipped, order preserved")
+
+
+def test_repo_listing_cache():
+    """Test that an unchanged fingerprint reuses the cached listing."""
+    print("\n=== Test 5: Repository Listing Cache ===")
+
+    state = {'updated_at': '2025-01-01T00:00:00Z'}
+
+    def mock_post(url, headers=None, json=None, timeout=None):
+        if 'totalCount' in json['query']:
+            response = MagicMock()
+            response.json.return_value = {'data': {'organization': {'repositories': {
+                'totalCount': 1,
+                'nodes': [{'nameWithOwner': 'test-org/repo-a', 'updatedAt': state['updated_at']}]
+            }}}}
+            return response
+        return make_page([make_node('repo-a')])
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with patch('get_repos.requests.post', side_effect=mock_post) as post:
+            first = get_repos.get_org_repos('test-org', 'ghs_token', [], cache_dir=Path(tmpdir))
+            assert post.call_count == 2  # fingerprint + one page
+
+            second = get_repos.get_org_repos('test-org', 'ghs_token', [], cache_dir=Path(tmpdir))
+            assert post.call_count == 3  # fingerprint only
+            assert second == first
+
+            state['updated_at'] = '2025-02-01T00:00:00Z'
+            get_repos.get_org_repos('test-org', 'ghs_token', [], cache_dir=Path(tmpdir))
+            assert post.call_count == 5  # fingerprint changed, listing refetched
+
+        assert (Path(tmpdir) / 'test-org.json').exists()
+    print("✓ Cached listing reused until the fingerprint changed")
+
+
+def test_main_accepts_arguments():
+    """Test that main() uses passed orgs and tokens instead of the environment."""
+    print("\n=== Test 6: Main With Structured Arguments ===")
+
+    def mock_post(url, headers=None, json=None, timeout=None):
+        org = json['variables']['org']
+        assert headers['Authorization'] == f'Bearer ghs_{org}'
+        return make_page([make_node(f'{org}-repo', org=org)])
+
+    session = MagicMock()
+    session.post.side_effect = mock_post
+
+    env = {'GITHUB_OUTPUT': os.devnull, 'SPARTA_CACHE_DIR': ''}
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        try:
+            with patch.dict(os.environ, env, clear=True), \
+                 patch('get_repos.get_session', return_value=session):
+                repos_data = get_repos.main(
+                    org_names=['org-a', 'org-b'],
+                    token_map={'org-a': 'ghs_org-a', 'org-b': 'ghs_org-b'},
+                    fallback_token='ghs_default',
+                )
+            with open('repos.json') as f:
+                assert json.load(f) == [
+                    {'org': org['org'], 'repos': [asdict(r) for r in org['repos']]}
+                    for org in repos_data
+                ]
+        finally:
+            os.chdir(original_cwd)
+
+    assert [org['org'] for org in repos_data] == ['org-a', 'org-b']
+    print("✓ Orgs and tokens taken from arguments, repos data returned")
+
+
+def run_all_tests():
+    """Run all get_repos tests."""
+    print("=" * 60)
+    print("Get Repos Tests")
+    print("=" * 60)
+
+    tests = [
+        test_get_org_repos_paginates,
+        test_get_org_repos_skips_invalid_names,
+        test_get_org_repos_graphql_error,
+        test_main_fetches_orgs_concurrently,
+        test_repo_listing_cache,
+        test_main_accepts_arguments,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"✗ {test.__name__} error: {e}")
+            import traceback
+            traceback.print_exc()
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -19,7 +19,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 from orchestrate_scan import (
     parse_orgs,
     detect_scan_mode,
-    needs_batching
+    needs_batching,
+    repos_as_dicts,
+    repos_need_batching,
+    scan_batches
 )
 
 
@@ -244,6 +247,146 @@ def test_error_handling_missing_credentials():
         print("✓ Missing credentials would be detected")
 
 
+def test_needs_batching_size_short_circuit():
+    """Test that small files are decided from their size without parsing."""
+    print("\n=== Test 13: Batching Detection (Size Short-Circuit) ===")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repos_file = Path(tmpdir) / 'repos.json'
+        
+        # Too small to hold 500 repos, so it is never parsed
+        repos_file.write_text('[' + ','.join(['{"name":"a"}'] * 400) + ', not json')
+        assert needs_batching(repos_file, threshold=500) == False
+        
+        # Smallest possible entries just over the threshold are still counted
+        repos_file.write_text('[' + ','.join(['{"name":"a"}'] * 501) + ']')
+        assert needs_batching(repos_file, threshold=500) == True
+        
+        print("✓ File size rules out batching without parsing")
+
+
+def test_scan_batches_sequential():
+    """Test that batches are scanned with their own state and failures are skipped."""
+    print("\n=== Test 14: Scan Batches (Sequential) ===")
+    
+    batches = [
+        {'batch_id': 'batch-1', 'repos': [{'name': 'repo1'}]},
+        {'batch_id': 'batch-2', 'repos': [{'name': 'repo2'}]},
+        {'batch_id': 'org2-batch-1', 'org': 'org2', 'repos': [{'name': 'repo3'}, {'name': 'repo4'}]},
+    ]
+    
+    def mock_main(repos, org, batch_id, **kwargs):
+        if batch_id == 'batch-2':
+            raise RuntimeError("scan failed")
+        return [{'org': org, 'scanned': len(repos), 'failed': 0}]
+    
+    with patch('scan_repos.main', side_effect=mock_main) as main:
+        summaries = scan_batches(batches, 'org1', 1, max_retries=2)
+    
+    assert main.call_count == 3
+    assert main.call_args_list[0].kwargs['org'] == 'org1'
+    assert main.call_args_list[0].kwargs['max_retries'] == 2
+    assert summaries == [
+        {'org': 'org1', 'scanned': 1, 'failed': 0},
+        {'org': 'org2', 'scanned': 2, 'failed': 0},
+    ]
+    print("✓ Batches scanned in order, failed batch skipped")
+
+
+def test_needs_batching_ndjson():
+    """Test batching detection for NDJSON repos files."""
+    print("\n=== Test 15: Batching Detection (NDJSON) ===")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repos_file = Path(tmpdir) / 'repos.json'
+        
+        def write_ndjson(counts):
+            with open(repos_file, 'w') as f:
+                for org, count in counts.items():
+                    for i in range(count):
+                        f.write(json.dumps({"org": org, "name": f"repo{i}"}) + "\n")
+        
+        write_ndjson({"org1": 400, "org2": 400})
+        assert needs_batching(repos_file, threshold=500) == False
+        
+        write_ndjson({"org1": 100, "org2": 600})
+        assert needs_batching(repos_file, threshold=500) == True
+        
+        print("✓ NDJSON repos counted per organization")
+
+
+def test_repos_as_dicts():
+    """Test conversion of in-memory repository listings to repos.json form."""
+    print("\n=== Test 16: Repository Listing Conversion ===")
+    
+    from get_repos import RepoRecord
+    
+    repo = RepoRecord(name='repo-a', full_name='org1/repo-a', private=False, default_branch='main', head_sha='a' * 40)
+    expected = {'name': 'repo-a', 'full_name': 'org1/repo-a', 'private': False, 'default_branch': 'main', 'head_sha': 'a' * 40}
+    
+    assert repos_as_dicts([repo]) == [expected]
+    assert repos_as_dicts([{'org': 'org1', 'repos': [repo]}]) == [{'org': 'org1', 'repos': [expected]}]
+    assert repos_as_dicts([]) == []
+    
+    print("✓ Single-org and multi-org listings converted")
+
+
+def test_repos_need_batching_in_memory():
+    """Test batching detection on a listing returned by get_repos.main()."""
+    print("\n=== Test 17: Batching Detection (In-Memory Listing) ===")
+    
+    from get_repos import RepoRecord
+    
+    def records(org, count):
+        return [RepoRecord(name=f'repo{i}', full_name=f'{org}/repo{i}', private=False, default_branch='main')
+                for i in range(count)]
+    
+    assert repos_need_batching(records('org1', 500), threshold=500) == False
+    assert repos_need_batching(records('org1', 501), threshold=500) == True
+    assert repos_need_batching([
+        {'org': 'org1', 'repos': records('org1', 100)},
+        {'org': 'org2', 'repos': records('org2', 600)},
+    ], threshold=500) == True
+    assert repos_need_batching([], threshold=500) == False
+    
+    print("✓ Listing checked without reading repos.json")
+
+
+def test_scan_batches_parallel_scans_current_repo_first():
+    """Test that the current repository is scanned before parallel batch workers start."""
+    print("\n=== Test 18: Scan Batches (Parallel, Current Repository First) ===")
+    
+    from concurrent.futures import ThreadPoolExecutor
+    import scan_repos
+    
+    batches = [
+        {'batch_id': 'batch-1', 'repos': [{'name': 'repo1', 'full_name': 'org1/repo1'},
+                                          {'name': 'sparta', 'full_name': 'org1/sparta'}]},
+        {'batch_id': 'batch-2', 'repos': [{'name': 'repo2', 'full_name': 'org1/repo2'}]},
+    ]
+    calls = []
+    
+    def mock_main(repos, org, batch_id, **kwargs):
+        calls.append((batch_id, [repo['name'] for repo in repos], kwargs['scan_concurrency']))
+        assert scan_repos._prepared_trivy_db == (True, 'db-1')
+        return [{'org': org, 'scanned': len(repos), 'failed': 0}]
+    
+    with patch.dict(os.environ, {'GITHUB_REPOSITORY': 'org1/sparta', 'SCAN_CONCURRENCY': '4'}), \
+         patch('orchestrate_scan.ProcessPoolExecutor', ThreadPoolExecutor), \
+         patch('scan_repos.prepare_trivy_db', return_value=(True, 'db-1')) as prepare, \
+         patch('scan_repos._prepared_trivy_db', None), \
+         patch('scan_repos.main', side_effect=mock_main):
+        summaries = scan_batches(batches, 'org1', 2)
+    
+    # The database is prepared once for the current repository and every worker
+    prepare.assert_called_once()
+    assert calls[0] == ('batch-1', ['sparta'], 2)
+    # SCAN_CONCURRENCY is split between the two workers
+    assert sorted(calls[1:]) == [('batch-1', ['repo1'], 2), ('batch-2', ['repo2'], 2)]
+    assert sum(summary['scanned'] for summary in summaries) == 3
+    print("✓ Current repository scanned alone before the workers, other repos scanned once")
+
+
 def run_all_tests():
     """Run all orchestration tests."""
     print("=" * 60)
@@ -262,7 +405,13 @@ def run_all_tests():
         test_orchestrate_flow_single_org_mock,
         test_orchestrate_flow_multi_org_mock,
         test_orchestrate_flow_large_org_batching,
-        test_error_handling_missing_credentials
+        test_error_handling_missing_credentials,
+        test_needs_batching_size_short_circuit,
+        test_scan_batches_sequential,
+        test_needs_batching_ndjson,
+        test_repos_as_dicts,
+        test_repos_need_batching_in_memory,
+        test_scan_batches_parallel_scans_current_repo_first,
     ]
     
     passed = 0
@@ -170,10 +170,10 @@ def test_generate_tokens_with_per_org_credentials():
     
     def mock_get_token(jwt, org):
         if jwt == mock_jwt_org1 and org == "org1":
-            return mock_token_org1, None
+            return mock_token_org1, None, None
         elif jwt == mock_jwt_default and org == "org2":
-            return mock_token_org2, None
-        return None, "Error"
+            return mock_token_org2, None, None
+        return None, "Error", None
     
     with patch('token_manager.generate_jwt', side_effect=mock_generate_jwt), \
          patch('token_manager.get_installation_token', side_effect=mock_get_token):
@@ -206,10 +206,10 @@ def test_generate_tokens_fallback_to_default():
     
     def mock_get_token(jwt, org):
         if org == "org1":
-            return mock_token_org1, None
+            return mock_token_org1, None, None
         elif org == "org2":
-            return mock_token_org2, None
-        return None, "Error"
+            return mock_token_org2, None, None
+        return None, "Error", None
     
     with patch('token_manager.generate_jwt', side_effect=mock_generate_jwt), \
          patch('token_manager.get_installation_token', side_effect=mock_get_token):
@@ -261,12 +261,12 @@ def test_generate_tokens_mixed_credentials():
     
     def mock_get_token(jwt, org):
         if org == "org1" and jwt == mock_jwt_org1:
-            return "ghs_token_org1", None
+            return "ghs_token_org1", None, None
         elif org == "org2" and jwt == mock_jwt_default:
-            return "ghs_token_org2", None
+            return "ghs_token_org2", None, None
         elif org == "org3" and jwt == mock_jwt_org3:
-            return "ghs_token_org3", None
-        return None, "Error"
+            return "ghs_token_org3", None, None
+        return None, "Error", None
     
     with patch('token_manager.generate_jwt', side_effect=mock_generate_jwt), \
          patch('token_manager.get_installation_token', side_effect=mock_get_token):
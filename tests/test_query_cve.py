@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Unit tests for query-cve.py script.
+
+Tests CVE lookup across stored Trivy reports.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import importlib.util
+from pathlib import Path
+
+# Add scripts to path
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+# query-cve.py has a hyphen in its name, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    'query_cve', os.path.join(SCRIPTS_DIR, 'query-cve.py')
+)
+query_cve = importlib.util.module_from_spec(_spec)
+sys.modules['query_cve'] = query_cve
+_spec.loader.exec_module(query_cve)
+
+
+def write_report(reports_dir, org, repo, scan_date, data):
+    """Write a trivy-report.json in the standard reports layout."""
+    report_dir = Path(reports_dir) / org / repo / scan_date
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_file = report_dir / 'trivy-report.json'
+    if isinstance(data, str):
+        report_file.write_text(data)
+    else:
+        report_file.write_text(json.dumps(data))
+    return report_file
+
+
+def build_reports_tree(reports_dir):
+    """Create a small reports tree covering the common cases."""
+    write_report(reports_dir, 'org1', 'repo-a', '20250101', {
+        'Results': [
+            {'Target': 'requirements.txt', 'Vulnerabilities': [
+                {'VulnerabilityID': 'CVE-2024-0001', 'Severity': 'CRITICAL',
+                 'PkgName': 'requests', 'InstalledVersion': '2.0.0', 'FixedVersion': '2.0.1'},
+                {'VulnerabilityID': 'CVE-2024-0002', 'Severity': 'HIGH', 'PkgName': 'urllib3'},
+            ]},
+            {'Target': 'go.mod', 'Vulnerabilities': None},
+        ]
+    })
+    write_report(reports_dir, 'org1', 'repo-b', '20250102', {
+        'Results': [
+            {'Target': 'package-lock.json', 'Vulnerabilities': [
+                {'VulnerabilityID': 'CVE-2024-0003', 'Severity': 'LOW', 'PkgName': 'lodash'},
+            ]},
+        ]
+    })
+    # Mentions the CVE only in free text, so it is parsed but has no finding
+    write_report(reports_dir, 'org2', 'repo-c', '20250102', {
+        'Results': [
+            {'Target': 'pom.xml', 'Vulnerabilities': [
+                {'VulnerabilityID': 'CVE-2024-0005', 'Description': 'Similar to CVE-2024-0001'},
+            ]},
+        ]
+    })
+    write_report(reports_dir, 'org2', 'repo-d', '20250102', {
+        'error': 'Git clone failed',
+        'repository': 'org2/repo-d',
+    })
+    write_report(reports_dir, 'org2', 'repo-e', '20250102', '')
+
+
+def test_find_cve_in_reports():
+    """Test that matching vulnerabilities are returned with path metadata."""
+    print("\n=== Test 1: Find CVE In Reports ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        findings = query_cve.find_cve_in_reports('CVE-2024-0001', Path(tmpdir))
+
+    assert len(findings) == 1
+    finding = findings[0]
+    assert finding['repository'] == 'org1/repo-a'
+    assert finding['scan_date'] == '20250101'
+    assert finding['severity'] == 'CRITICAL'
+    assert finding['package'] == 'requests'
+    assert finding['fixed_version'] == '2.0.1'
+    print("✓ CVE found with repository and package details")
+
+
+def test_find_cve_skips_reports_without_cve():
+    """Test that reports not mentioning the CVE are never parsed."""
+    print("\n=== Test 2: Skip Reports Without The CVE ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        # Invalid JSON that does not mention the CVE is not parsed at all
+        write_report(tmpdir, 'org3', 'broken', '20250103', '{not json')
+
+        parsed = []
+        original_load = query_cve.load_json_file
+        original_loads = query_cve.loads
+
+        def tracking_load(path):
+            parsed.append(Path(path).parts[-3])
+            return original_load(path)
+
+        def tracking_loads(data):
+            parsed.append(original_loads(data)['Results'][0]['Target'])
+            return original_loads(data)
+
+        query_cve.load_json_file = tracking_load
+        query_cve.loads = tracking_loads
+        try:
+            findings = query_cve.find_cve_in_reports('CVE-2024-0003', Path(tmpdir))
+            # Large reports are memory-mapped for the search instead
+            original_min_size = query_cve.REPORT_MMAP_MIN_SIZE
+            query_cve.REPORT_MMAP_MIN_SIZE = 1
+            try:
+                mapped_findings = query_cve.find_cve_in_reports('CVE-2024-0003', Path(tmpdir))
+            finally:
+                query_cve.REPORT_MMAP_MIN_SIZE = original_min_size
+        finally:
+            query_cve.load_json_file = original_load
+            query_cve.loads = original_loads
+
+    assert [f['repository'] for f in findings] == ['org1/repo-b']
+    assert mapped_findings == findings
+    assert parsed == ['package-lock.json', 'repo-b']
+    print("✓ Only the report containing the CVE was parsed")
+
+
+def test_find_cve_missing_dir():
+    """Test that a missing reports directory yields no findings."""
+    print("\n=== Test 3: Missing Reports Directory ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        findings = query_cve.find_cve_in_reports('CVE-2024-0001', Path(tmpdir) / 'missing')
+    assert findings == []
+    print("✓ Missing directory handled")
+
+
+def test_find_cve_uses_index():
+    """Test that an index answers lookups with the same findings as the reports."""
+    print("\n=== Test 4: CVE Index Lookup ===")
+
+    import build_cve_index
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        reports_dir = Path(tmpdir)
+        build_reports_tree(reports_dir)
+        from_reports = query_cve.find_cve_in_reports('CVE-2024-0001', reports_dir)
+
+        assert build_cve_index.build_index(reports_dir) == 4
+        index_file = build_cve_index.get_index_file(reports_dir)
+        assert index_file.exists()
+
+        # Reports are not searched while the index is up to date
+        original_search_report = query_cve.search_report
+        query_cve.search_report = None
+        try:
+            from_index = query_cve.find_cve_in_reports('CVE-2024-0001', reports_dir)
+            assert query_cve.find_cve_in_reports('CVE-2099-0001', reports_dir) == []
+        finally:
+            query_cve.search_report = original_search_report
+        assert json.dumps(from_index) == json.dumps(from_reports)
+
+        # A report added after the index was built is still found
+        write_report(reports_dir, 'org3', 'repo-f', '20250103', {
+            'Results': [{'Target': 'go.mod', 'Vulnerabilities': [{'VulnerabilityID': 'CVE-2099-0001'}]}]
+        })
+        assert [f['repository'] for f in query_cve.find_cve_in_reports('CVE-2099-0001', reports_dir)] == ['org3/repo-f']
+        assert build_cve_index.build_index(reports_dir) == 5
+
+        # An index from another schema version is ignored
+        import sqlite3
+        conn = sqlite3.connect(index_file)
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+        conn.close()
+        assert build_cve_index.query_index(index_file, 'CVE-2024-0001') is None
+        assert json.dumps(query_cve.find_cve_in_reports('CVE-2024-0001', reports_dir)) == json.dumps(from_reports)
+    print("✓ Index lookups match report lookups, stale index and schema ignored")
+
+
+def test_find_cve_parallel():
+    """Test that searching reports in threads matches the sequential search."""
+    print("\n=== Test 5: Parallel Report Search ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        build_reports_tree(tmpdir)
+        for i in range(10):
+            write_report(tmpdir, 'org3', f'repo-{i}', '20250104', {
+                'Results': [{'Target': 'go.mod', 'Vulnerabilities': [
+                    {'VulnerabilityID': 'CVE-2024-0001', 'Severity': 'LOW', 'PkgName': f'pkg-{i}'},
+                ]}]
+            })
+
+        sequential = query_cve.find_cve_in_reports('CVE-2024-0001', Path(tmpdir))
+        original_threshold = query_cve.PARALLEL_SEARCH_THRESHOLD
+        query_cve.PARALLEL_SEARCH_THRESHOLD = 1
+        try:
+            parallel = query_cve.find_cve_in_reports('CVE-2024-0001', Path(tmpdir))
+        finally:
+            query_cve.PARALLEL_SEARCH_THRESHOLD = original_threshold
+
+    assert len(sequential) == 11
+    assert parallel == sequential
+    print("✓ Parallel search matches sequential search")
+
+
+def run_all_tests():
+    """Run all query-cve tests."""
+    print("=" * 60)
+    print("Query CVE Tests")
+    print("=" * 60)
+
+    tests = [
+        test_find_cve_in_reports,
+        test_find_cve_skips_reports_without_cve,
+        test_find_cve_missing_dir,
+        test_find_cve_uses_index,
+        test_find_cve_parallel,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"✗ {test.__name__} error: {e}")
+            import traceback
+            traceback.print_exc()
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Unit tests for scan_repos.py script.
+
+Tests concurrent scanning, Trivy failure handling and report reuse, with
+git and Trivy replaced by fakes.
+"""
+
+import os
+import sys
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add scripts to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import scan_repos
+
+
+def make_repo(name, org='test-org', head_sha=None):
+    """Build a repository entry as found in repos.json."""
+    return {'name': name, 'full_name': f'{org}/{name}', 'default_branch': 'main', 'head_sha': head_sha}
+
+
+def fake_clone(repo_url, target_dir, branch='main', token=None, timeout=300):
+    """Stand-in for secure_git_clone that creates an empty checkout."""
+    (Path(target_dir) / '.git').mkdir(parents=True)
+    return (True, '')
+
+
+def fake_download_trivy_db():
+    """Stand-in for download_trivy_db that puts databases in the shared cache."""
+    for name in ('db', 'java-db'):
+        db_dir = Path(scan_repos.get_trivy_cache_dir()) / name
+        db_dir.mkdir(parents=True, exist_ok=True)
+        (db_dir / 'metadata.json').write_text('{}')
+    return True
+
+
+def test_concurrent_scans_share_database():
+    """Test that concurrent scans read the one shared database and keep their scan cache in memory."""
+    print("\n=== Test 1: Concurrent Scans Share the Database ===")
+
+    running = []
+    peak = []
+    commands = []
+
+    def fake_trivy(target, output_file, skip_db_update=False):
+        command = scan_repos.trivy_fs_command(target, output_file, skip_db_update)
+        commands.append(command)
+        running.append(command)
+        peak.append(len(running))
+        time.sleep(0.05)  # Keep the threads busy at the same time
+        running.remove(command)
+        Path(output_file).write_text('{"Results": []}')
+        return subprocess.CompletedProcess(command, 0, stderr=b'')
+
+    def scan(download_trivy_db):
+        running.clear()
+        peak.clear()
+        commands.clear()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            clone_dir = Path(tmpdir) / 'clones'
+            clone_dir.mkdir()
+            env = {'TRIVY_CACHE_DIR': os.path.join(tmpdir, 'trivy'), 'SPARTA_CLONE_DIR': str(clone_dir)}
+            with patch.dict(os.environ, env), \
+                 patch('scan_repos.secure_git_clone', side_effect=fake_clone), \
+                 patch('scan_repos.download_trivy_db', side_effect=download_trivy_db), \
+                 patch('scan_repos.get_trivy_db_key', return_value=None), \
+                 patch('scan_repos.run_trivy_scan', side_effect=fake_trivy):
+                results = scan_repos.scan_repositories(
+                    [make_repo(f'repo-{i}') for i in range(6)], 'test-org', Path(tmpdir) / 'reports', '20250101',
+                    '', 'ghs_token', [], concurrency=3
+                )
+            assert list(clone_dir.iterdir()) == []
+            assert all(command[command.index('--cache-dir') + 1] == env['TRIVY_CACHE_DIR'] for command in commands)
+        return results
+
+    results = scan(fake_download_trivy_db)
+    assert results == [True] * 6
+    assert max(peak) > 1
+    assert all('--skip-db-update' in command for command in commands)
+    assert all(command[command.index('--cache-backend') + 1] == 'memory' for command in commands)
+
+    # Scans that would update the database themselves run one at a time
+    results = scan(lambda: False)
+    assert results == [True] * 6
+    assert max(peak) == 1
+    assert not any('--skip-db-update' in command for command in commands)
+    print("✓ Concurrent scans used the shared cache read-only; without a database they ran one at a time")
+
+
+def test_trivy_failure_marks_repository_failed():
+    """Test that a non-zero Trivy exit is recorded as a failure, not a completed scan."""
+    print("\n=== Test 2: Trivy Failure ===")
+
+    def failing_trivy(target, output_file, skip_db_update=False):
+        Path(output_file).write_text('{"Results": [')  # Partial report
+        return subprocess.CompletedProcess([], 1, stderr=b'FATAL cache may be in use by another process\n')
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        scan_state = MagicMock()
+        with patch.dict(os.environ, {'SPARTA_CLONE_DIR': tmpdir}), \
+             patch('scan_repos.secure_git_clone', side_effect=fake_clone), \
+             patch('scan_repos.run_trivy_scan', side_effect=failing_trivy):
+            result = scan_repos.scan_repository(
+                make_repo('repo-a'), 'test-org', Path(tmpdir) / 'reports', '20250101', '',
+                'ghs_token', [], scan_state, max_retries=0
+            )
+            scan_repos.wait_for_clone_cleanup()
+
+        assert result is False
+        scan_state.mark_completed.assert_not_called()
+        error = scan_state.mark_failed.call_args.args[1]
+        assert 'status 1' in error and 'cache may be in use' in error
+        with open(Path(tmpdir) / 'reports' / 'repo-a' / '20250101' / 'trivy-report.json') as f:
+            assert json.load(f)['error'].startswith('Trivy scan failed')
+    print("✓ Repository marked failed and error report written")
+
+
+def test_main_passes_limits_to_scan_state():
+    """Test that max_retries and batch_size reach the scan state without env vars."""
+    print("\n=== Test 3: Scan State Limits ===")
+
+    from scan_state import ScanState
+
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        try:
+            with patch.dict(os.environ, {'MAX_RETRIES': '3', 'BATCH_SIZE': '100'}), \
+                 patch('scan_repos.scan_repositories', return_value=[True]) as scan, \
+                 patch('scan_repos.ScanState', wraps=ScanState) as state_class:
+                scan_repos.main(
+                    repos=[make_repo('repo-a')], org='test-org', fallback_token='ghs_token',
+                    max_retries=5, batch_id='batch-1', batch_size=50
+                )
+            scan_state = scan.call_args.args[7]
+            with open(state_class.call_args.args[2]) as f:
+                saved = json.load(f)
+        finally:
+            os.chdir(original_cwd)
+
+    assert scan_state.max_retries == 5
+    assert saved['batch_size'] == 50
+    print("✓ --max-retries and --batch-size applied to the scan state")
+
+
+def test_batch_worker_uses_prepared_database():
+    """Test that a batch worker scans with the database its parent prepared."""
+    print("\n=== Test 4: Batch Worker Database ===")
+
+    def fake_trivy(target, output_file, skip_db_update=False):
+        assert skip_db_update
+        Path(output_file).write_text('{"Results": []}')
+        return subprocess.CompletedProcess([], 0, stderr=b'')
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        scan_repos.use_prepared_trivy_db((True, 'db-1'))
+        try:
+            with patch.dict(os.environ, {'SPARTA_CLONE_DIR': tmpdir}), \
+                 patch('scan_repos.secure_git_clone', side_effect=fake_clone), \
+                 patch('scan_repos.download_trivy_db', side_effect=AssertionError("database downloaded")), \
+                 patch('scan_repos.get_trivy_db_key', side_effect=AssertionError("database key read")), \
+                 patch('scan_repos.run_trivy_scan', side_effect=fake_trivy):
+                results = scan_repos.scan_repositories(
+                    [make_repo(f'repo-{i}', head_sha='abc123') for i in range(2)], 'test-org',
+                    Path(tmpdir) / 'reports', '20250101', '', 'ghs_token', [], concurrency=2
+                )
+        finally:
+            scan_repos.use_prepared_trivy_db(None)
+
+        assert results == [True, True]
+        with open(Path(tmpdir) / 'reports' / 'repo-0' / scan_repos.LAST_SCAN_FILE) as f:
+            assert json.load(f)['trivy_db'] == 'db-1'
+    print("✓ Worker scanned without downloading the database again")
+
+
+def test_unchanged_repository_reuses_previous_report():
+    """Test that a repository with the same commit and databases is not scanned again."""
+    print("\n=== Test 5: Report Reuse ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        reports_dir = Path(tmpdir) / 'reports'
+        previous_dir = reports_dir / 'repo-a' / '20250101'
+        previous_dir.mkdir(parents=True)
+        (previous_dir / 'trivy-report.json').write_text('{"Results": []}')
+        scan_repos.record_scan(previous_dir.parent, '20250101', 'abc123', 'db-1')
+
+        scan_state = MagicMock()
+        with patch('scan_repos.secure_git_clone', side_effect=AssertionError("cloned")), \
+             patch('scan_repos.run_trivy_scan', side_effect=AssertionError("scanned")):
+            result = scan_repos.scan_repository(
+                make_repo('repo-a', head_sha='abc123'), 'test-org', reports_dir, '20250102', '',
+                'ghs_token', [], scan_state, trivy_db_key='db-1'
+            )
+
+        assert result is True
+        scan_state.mark_completed.assert_called_once_with('repo-a')
+        assert (reports_dir / 'repo-a' / '20250102' / 'trivy-report.json').read_text() == '{"Results": []}'
+    print("✓ Previous report copied without cloning or scanning")
+
+
+def test_report_reuse_misses():
+    """Test that a new commit, new databases or a corrupt marker force a scan."""
+    print("\n=== Test 6: Report Reuse Misses ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo_dir = Path(tmpdir) / 'repo-a'
+        (repo_dir / '20250101').mkdir(parents=True)
+        (repo_dir / '20250101' / 'trivy-report.json').write_text('{"Results": []}')
+        scan_repos.record_scan(repo_dir, '20250101', 'abc123', 'db-1')
+
+        assert not scan_repos.reuse_previous_report(repo_dir, '20250102', 'def456', 'db-1')
+        assert not scan_repos.reuse_previous_report(repo_dir, '20250102', 'abc123', 'db-2')
+        assert not scan_repos.reuse_previous_report(repo_dir, '20250102', 'abc123', None)
+
+        (repo_dir / scan_repos.LAST_SCAN_FILE).write_text('{"commit": "abc123", "trivy_db":')
+        assert not scan_repos.reuse_previous_report(repo_dir, '20250102', 'abc123', 'db-1')
+        (repo_dir / scan_repos.LAST_SCAN_FILE).write_text('["abc123", "db-1"]')
+        assert not scan_repos.reuse_previous_report(repo_dir, '20250102', 'abc123', 'db-1')
+
+        assert not (repo_dir / '20250102').exists()
+    print("✓ Changed commit, changed databases and corrupt markers not reused")
+
+
+def test_current_repository_timeout_retried():
+    """Test that a Trivy timeout on the current repository is retried, then recorded as a failure."""
+    print("\n=== Test 7: Current Repository Timeout ===")
+
+    outcomes = []
+
+    def timing_out_trivy(target, output_file, skip_db_update=False):
+        assert target == '.'
+        if outcomes.pop(0):
+            Path(output_file).write_text('{"Results": []}')
+            return subprocess.CompletedProcess([], 0, stderr=b'')
+        raise subprocess.TimeoutExpired(['trivy'], 900)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        reports_dir = Path(tmpdir) / 'reports'
+        with patch('scan_repos.run_trivy_scan', side_effect=timing_out_trivy), \
+             patch('scan_repos.wait_before_retry') as wait_before_retry:
+            outcomes[:] = [False, True]
+            scan_state = MagicMock()
+            assert scan_repos.scan_repository(
+                make_repo('sparta'), 'test-org', reports_dir, '20250101', 'test-org/sparta',
+                'ghs_token', [], scan_state, max_retries=2
+            ) is True
+            scan_state.mark_completed.assert_called_once_with('sparta')
+            assert wait_before_retry.call_count == 1
+
+            outcomes[:] = [False, False, False]
+            scan_state = MagicMock()
+            assert scan_repos.scan_repository(
+                make_repo('sparta'), 'test-org', reports_dir, '20250101', 'test-org/sparta',
+                'ghs_token', [], scan_state, max_retries=2
+            ) is False
+            assert scan_state.mark_failed.call_args.args[2] == 2
+            assert outcomes == []
+
+        with open(reports_dir / 'sparta' / '20250101' / 'trivy-report.json') as f:
+            assert json.load(f)['error'] == 'Scan timeout'
+    print("✓ Timeouts retried in place, failure recorded once retries ran out")
+
+
+def run_all_tests():
+    """Run all scan_repos tests."""
+    print("=" * 60)
+    print("Scan Repos Tests")
+    print("=" * 60)
+
+    tests = [
+        test_concurrent_scans_share_database,
+        test_trivy_failure_marks_repository_failed,
+        test_main_passes_limits_to_scan_state,
+        test_batch_worker_uses_prepared_database,
+        test_unchanged_repository_reuses_previous_report,
+        test_report_reuse_misses,
+        test_current_repository_timeout_retried,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"✗ {test.__name__} error: {e}")
+            import traceback
+            traceback.print_exc()
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
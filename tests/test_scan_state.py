@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Unit tests for scan_state.py script.
+
+Tests the repository indexes kept while a scan runs, throttled saves and
+the final flush.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Add scripts to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import scan_repos
+import scan_state
+from scan_state import ScanState
+
+
+def make_repos(*names):
+    """Build repository entries as found in repos.json."""
+    return [{'name': name} for name in names]
+
+
+def load_saved_state(state_file):
+    """Read the state file as written to disk."""
+    with open(state_file) as f:
+        return json.load(f)
+
+
+def test_indexes_consistent_after_mark():
+    """Test that pending, completed and failed repositories stay disjoint and are saved."""
+    print("\n=== Test 1: Repository Indexes ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state_file = Path(tmpdir) / 'state.json'
+        state = ScanState('test-org', '20250101', state_file, max_retries=2)
+        state.initialize(4, make_repos('repo-a', 'repo-b', 'repo-c', 'repo-d'))
+
+        state.mark_completed('repo-a')
+        state.mark_failed('repo-b', 'clone failed')
+        state.mark_failed('repo-c', 'clone failed')
+        state.mark_failed('repo-b', 'scan failed', retry_count=1)
+        state.mark_completed('repo-c')
+
+        assert state.get_pending_repos() == ['repo-d']
+        assert state.get_completed_repos() == ['repo-a', 'repo-c']
+        assert [(f['repo'], f['error']) for f in state.get_failed_repos()] == [('repo-b', 'scan failed')]
+        assert state.is_completed('repo-c') and not state.is_completed('repo-b')
+        assert state.should_retry('repo-b') and not state.should_retry('repo-c')
+        state.increment_retry_count('repo-b')
+        assert not state.should_retry('repo-b')
+        summary = state.get_summary()
+        assert (summary['completed'], summary['failed'], summary['pending']) == (2, 1, 1)
+
+        state.flush()
+        saved = load_saved_state(state_file)
+        assert saved['pending_repos'] == ['repo-d']
+        assert saved['completed_repos'] == ['repo-a', 'repo-c']
+        assert [(f['repo'], f['retry_count']) for f in saved['failed_repos']] == [('repo-b', 2)]
+
+        # A reloaded state resumes with completed repositories left out
+        resumed = ScanState('test-org', '20250101', state_file, max_retries=2)
+        resumed.resume(5, make_repos('repo-a', 'repo-b', 'repo-c', 'repo-d', 'repo-e'))
+        assert resumed.get_pending_repos() == ['repo-b', 'repo-d', 'repo-e']
+        assert resumed.get_completed_repos() == ['repo-a', 'repo-c']
+    print("✓ Indexes updated by mark_* and written back on save")
+
+
+def test_throttled_saves_flushed():
+    """Test that results within the save interval are held back until flush()."""
+    print("\n=== Test 2: Throttled Save and Flush ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state_file = Path(tmpdir) / 'state.json'
+        state = ScanState('test-org', '20250101', state_file)
+        with patch.object(scan_state, 'SAVE_INTERVAL_SECONDS', 3600):
+            state.initialize(2, make_repos('repo-a', 'repo-b'))
+            state.mark_completed('repo-a')
+            assert load_saved_state(state_file)['completed_repos'] == []
+
+            state.flush()
+            assert load_saved_state(state_file)['completed_repos'] == ['repo-a']
+
+        # Nothing pending: flush() does not write again
+        os.remove(state_file)
+        state.flush()
+        assert not state_file.exists()
+    print("✓ Throttled results written by flush()")
+
+
+def test_scan_organization_flushes_on_error():
+    """Test that results are saved when the scan stops with an exception."""
+    print("\n=== Test 3: Flush on Exit ===")
+
+    def interrupted_scan(repos, org_name, reports_dir, scan_date, current_repo, token, tokens, state, **kwargs):
+        state.mark_completed('repo-a')
+        raise KeyboardInterrupt
+
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        try:
+            with patch.object(scan_state, 'SAVE_INTERVAL_SECONDS', 3600), \
+                 patch('scan_repos.scan_repositories', side_effect=interrupted_scan):
+                try:
+                    scan_repos.scan_organization(
+                        'test-org', make_repos('repo-a', 'repo-b'), '20250101', '', 'ghs_token', None, [],
+                        max_retries=3, scan_concurrency=1
+                    )
+                    assert False, "KeyboardInterrupt not raised"
+                except KeyboardInterrupt:
+                    pass
+            saved = load_saved_state(Path(tmpdir) / 'scan-state-test-org-20250101.json')
+        finally:
+            os.chdir(original_cwd)
+
+    assert saved['completed_repos'] == ['repo-a']
+    assert saved['pending_repos'] == ['repo-b']
+    print("✓ Pending results flushed when the scan is interrupted")
+
+
+def run_all_tests():
+    """Run all scan state tests."""
+    print("=" * 60)
+    print("Scan State Tests")
+    print("=" * 60)
+
+    tests = [
+        test_indexes_consistent_after_mark,
+        test_throttled_saves_flushed,
+        test_scan_organization_flushes_on_error,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"✗ {test.__name__} error: {e}")
+            import traceback
+            traceback.print_exc()
+            failed += 1
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {passed} passed, {failed} failed")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -58,14 +58,18 @@ def test_get_installation_token_success():
     
     mock_token_response = MagicMock()
     mock_token_response.status_code = 201
-    mock_token_response.json.return_value = {'token': 'ghs_test_token_12345'}
+    mock_token_response.json.return_value = {
+        'token': 'ghs_test_token_12345',
+        'expires_at': '2025-01-01T12:00:00Z'
+    }
     
     with patch('token_manager.requests.get', return_value=mock_response), \
          patch('token_manager.requests.post', return_value=mock_token_response):
-        token, error = get_installation_token(jwt_token, org_name)
+        token, error, expires_at = get_installation_token(jwt_token, org_name)
         
         assert token == 'ghs_test_token_12345'
         assert error is None
+        assert expires_at == 1735732800
         print("✓ Installation token retrieved successfully")
 
 
@@ -81,7 +85,7 @@ def test_get_installation_token_not_installed():
     mock_response.status_code = 404
     
     with patch('token_manager.requests.get', return_value=mock_response):
-        token, error = get_installation_token(jwt_token, org_name)
+        token, error, expires_at = get_installation_token(jwt_token, org_name)
         
         assert token is None
         assert error is not None
@@ -101,7 +105,7 @@ def test_get_installation_token_api_error():
     mock_response.status_code = 500
     
     with patch('token_manager.requests.get', return_value=mock_response):
-        token, error = get_installation_token(jwt_token, org_name)
+        token, error, expires_at = get_installation_token(jwt_token, org_name)
         
         assert token is None
         assert error is not None
@@ -122,7 +126,7 @@ def test_generate_tokens_for_orgs_success():
     
     # Mock successful token retrieval for all orgs
     def mock_get_token(jwt, org):
-        return f"ghs_token_{org}", None
+        return f"ghs_token_{org}", None, None
     
     with patch('token_manager.generate_jwt', return_value=mock_jwt), \
          patch('token_manager.get_installation_token', side_effect=mock_get_token):
@@ -150,8 +154,8 @@ def test_generate_tokens_for_orgs_partial_failure():
     # Mock: org1 and org3 succeed, org2 fails
     def mock_get_token(jwt, org):
         if org == "org2":
-            return None, "App not installed"
-        return f"ghs_token_{org}", None
+            return None, "App not installed", None
+        return f"ghs_token_{org}", None, None
     
     with patch('token_manager.generate_jwt', return_value=mock_jwt), \
          patch('token_manager.get_installation_token', side_effect=mock_get_token):
@@ -177,7 +181,7 @@ def test_generate_tokens_for_orgs_all_fail_with_fallback():
     
     # Mock: all orgs fail
     def mock_get_token(jwt, org):
-        return None, "App not installed"
+        return None, "App not installed", None
     
     with patch('token_manager.generate_jwt', return_value=mock_jwt), \
          patch('token_manager.get_installation_token', side_effect=mock_get_token):
@@ -234,6 +238,49 @@ def test_generate_tokens_network_error():
             print(f"⚠ Network error test (may propagate): {type(e).__name__}")
 
 
+def test_generate_tokens_reuses_cached_tokens():
+    """Test that unexpired cached tokens are reused without a new JWT."""
+    print("\n=== Test 10: Reuse Cached Tokens ===")
+    
+    import tempfile
+    import token_cache
+    
+    orgs = ["org1", "org2"]
+    app_id = "12345"
+    private_key = "mock_private_key"
+    
+    def mock_get_token(jwt_token, org):
+        return f"ghs_{org}_{jwt_token}", None, time.time() + 3600
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_file = os.path.join(tmpdir, 'tokens.json')
+        with patch.dict(os.environ, {'SPARTA_TOKEN_CACHE': cache_file}):
+            with patch('token_manager.generate_jwt', return_value="jwt1"), \
+                 patch('token_manager.get_installation_token', side_effect=mock_get_token):
+                first = generate_tokens_for_orgs(["org1"], app_id, private_key)
+            assert first == {"org1": "ghs_org1_jwt1"}
+            assert os.stat(cache_file).st_mode & 0o777 == 0o600
+            
+            # Only org2 needs a new token
+            with patch('token_manager.generate_jwt', return_value="jwt2") as mock_jwt, \
+                 patch('token_manager.get_installation_token', side_effect=mock_get_token) as mock_get:
+                second = generate_tokens_for_orgs(orgs, app_id, private_key)
+                assert mock_jwt.call_count == 1
+                assert mock_get.call_count == 1
+            assert second == {"org1": "ghs_org1_jwt1", "org2": "ghs_org2_jwt2"}
+            
+            # Every org cached: no JWT is generated
+            with patch('token_manager.generate_jwt', side_effect=AssertionError("JWT generated")):
+                assert generate_tokens_for_orgs(orgs, app_id, private_key) == second
+            
+            # A different App ID, or a token close to expiry, is not reused
+            assert token_cache.get_cached_tokens(token_cache.resolve_app_ids(orgs, "67890")) == {}
+            with patch('token_cache.time.time', return_value=time.time() + 3000):
+                assert token_cache.get_cached_tokens(token_cache.resolve_app_ids(orgs, app_id)) == {}
+    
+    print("✓ Cached tokens reused until close to expiry")
+
+
 def run_all_tests():
     """Run all token manager tests."""
     print("=" * 60)
@@ -249,7 +296,8 @@ def run_all_tests():
         test_generate_tokens_for_orgs_partial_failure,
         test_generate_tokens_for_orgs_all_fail_with_fallback,
         test_get_token_for_org,
-        test_generate_tokens_network_error
+        test_generate_tokens_network_error,
+        test_generate_tokens_reuses_cached_tokens
     ]
     
     passed = 0